@@ -0,0 +1,105 @@
+"""
+Excel输出格式基准测试
+
+生成几类有代表性的工作簿（纵向数值表、宽文本表、含日期和空值的混合表），
+分别以各输出格式序列化，输出结果的字节数、序列化耗时以及相对json格式的体积比例。
+legacy一行为full模式默认输出（indent=2的逐行对象JSON）。
+
+用法:
+    python benchmarks/bench_excel_formats.py --rows 20000
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FORMATS = ("json", "columns", "rows", "csv", "markdown")
+
+
+def build_workbooks(tmp_dir: str, rows: int) -> dict:
+    """生成测试工作簿，返回 名称 -> 文件路径"""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(42)
+    frames = {
+        "numeric": pd.DataFrame({
+            "id": np.arange(rows),
+            "price": rng.random(rows).round(4) * 1000,
+            "quantity": rng.integers(0, 500, rows),
+            "ratio": rng.random(rows),
+        }),
+        "wide_text": pd.DataFrame({
+            f"字段{i}": [f"记录{r}的第{i}列说明文本" for r in range(rows)] for i in range(12)
+        }),
+        "mixed": pd.DataFrame({
+            "订单号": [f"SO{r:08d}" for r in range(rows)],
+            "日期": pd.date_range("2024-01-01", periods=rows, freq="h"),
+            "客户": [f"客户{r % 97}" for r in range(rows)],
+            "金额": np.where(rng.random(rows) < 0.1, np.nan, rng.random(rows) * 10000),
+            "备注": [None if r % 3 else "加急 | 已确认" for r in range(rows)],
+        }),
+    }
+    paths = {}
+    for name, frame in frames.items():
+        path = os.path.join(tmp_dir, f"{name}.xlsx")
+        frame.to_excel(path, index=False)
+        paths[name] = path
+    return paths
+
+
+def serialize(df, output_format: str) -> str:
+    from mcp_tool.tools.excel_tool import ExcelTool
+
+    if output_format == "legacy":
+        result = {
+            "row_count": len(df),
+            "column_count": len(df.columns),
+            "columns": df.columns.tolist(),
+            "data": df.to_dict(orient="records"),
+        }
+        return json.dumps(result, ensure_ascii=False, indent=2, default=str)
+
+    out = io.StringIO()
+    frame = df.astype(object).where(df.notna(), None)
+    names = [str(name) for name in frame.columns]
+    returned = ExcelTool._write_sheet(out, output_format, names, frame.itertuples(index=False, name=None))
+    ExcelTool._close_sheet(out, output_format, {"offset": 0, "returned_rows": returned})
+    return out.getvalue()
+
+
+def main() -> None:
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3, help="每个格式重复序列化的次数，取最快一次")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, path in build_workbooks(tmp_dir, args.rows).items():
+            df = pd.read_excel(path)
+            print(f"\n{name}: rows={len(df)} columns={len(df.columns)}")
+            print(f"{'format':>10} {'bytes':>12} {'ms':>10} {'vs json':>8}")
+            baseline = None
+            for output_format in ("legacy",) + FORMATS:
+                elapsed = float("inf")
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    text = serialize(df, output_format)
+                    elapsed = min(elapsed, time.perf_counter() - start)
+                size = len(text.encode("utf-8"))
+                if output_format == "json":
+                    baseline = size
+                ratio = f"{size / baseline:>8.2f}" if baseline else f"{'-':>8}"
+                print(f"{output_format:>10} {size:>12} {elapsed * 1000:>10.1f} {ratio}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+MaxKB工具流式响应基准测试
+
+在本地启动一个模拟MaxKB的SSE服务（按固定间隔逐段返回内容），通过MaxKbTool发起请求，
+测量首段内容推送给客户端的时间（time-to-first-token）和总耗时。
+
+用法:
+    python benchmarks/bench_maxkb.py --chunks 200 --interval 0.01 --runs 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def start_stand_in_server(chunks: int, interval: float, first_delay: float) -> asyncio.AbstractServer:
+    """模拟MaxKB的chat_message接口：分块传输的text/event-stream响应"""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        while True:
+            # 读取请求头和请求体，支持同一连接上的多次请求
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except asyncio.IncompleteReadError:
+                break
+            length = 0
+            for line in head.decode("latin-1").split("\r\n"):
+                if line.lower().startswith("content-length:"):
+                    length = int(line.split(":", 1)[1])
+            await reader.readexactly(length)
+
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream;charset=utf-8\r\n"
+                b"Transfer-Encoding: chunked\r\n\r\n"
+            )
+            await asyncio.sleep(first_delay)
+            for index in range(chunks + 1):
+                event = {
+                    "chat_id": "bench",
+                    "content": f"token{index} " if index < chunks else "",
+                    "is_end": index == chunks,
+                }
+                payload = f"data: {json.dumps(event)}\n\n".encode()
+                writer.write(f"{len(payload):x}\r\n".encode() + payload + b"\r\n")
+                await writer.drain()
+                if index < chunks:
+                    await asyncio.sleep(interval)
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+class _RecordingSession:
+    """记录部分结果推送时间的会话替身"""
+
+    def __init__(self):
+        self.first_partial = None
+        self.partials = 0
+        self.progress = 0
+
+    async def send_log_message(self, level, data, logger=None):
+        if self.first_partial is None:
+            self.first_partial = time.perf_counter()
+        self.partials += 1
+
+    async def send_progress_notification(self, progress_token, progress, total=None):
+        self.progress += 1
+
+
+async def run_once(tool) -> dict:
+    from mcp_tool.tools.utils.progress import ProgressReporter, progress_context
+
+    session = _RecordingSession()
+    reporter = ProgressReporter(session, progress_token=1, tool_name="maxkb", partial_results=True)
+    start = time.perf_counter()
+    with progress_context(reporter):
+        result = await tool.execute({"message": "hello"})
+    total = time.perf_counter() - start
+    return {
+        "ttft": (session.first_partial or time.perf_counter()) - start,
+        "total": total,
+        "partials": session.partials,
+        "progress": session.progress,
+        "chars": len(result[0].text),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.01, help="相邻两段内容之间的间隔（秒）")
+    parser.add_argument("--first-delay", type=float, default=0.2, help="模拟模型生成第一段内容前的延迟（秒）")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    server = await start_stand_in_server(args.chunks, args.interval, args.first_delay)
+    port = server.sockets[0].getsockname()[1]
+    os.environ.update({
+        "MAXKB_HOST": f"http://127.0.0.1:{port}",
+        "MAXKB_CHAT_ID": "bench",
+        "MAXKB_APPLICATION_ID": "bench",
+        "MAXKB_AUTHORIZATION": "bench",
+    })
+
+    import logging
+
+    from mcp_tool.tools.maxkb_tool import MaxKbTool
+    from mcp_tool.tools.utils.http_client import close_http_clients
+
+    # 关闭工具模块开启的DEBUG日志，避免日志输出影响计时
+    logging.getLogger().setLevel(logging.WARNING)
+
+    tool = MaxKbTool()
+    runs = [await run_once(tool) for _ in range(args.runs)]
+    await close_http_clients()
+    server.close()
+
+    expected = args.first_delay + args.chunks * args.interval
+    print(f"chunks={args.chunks} interval={args.interval}s first_delay={args.first_delay}s "
+          f"(stream duration ~{expected:.2f}s)")
+    print(f"{'run':>4} {'ttft ms':>10} {'total ms':>10} {'partials':>9} {'progress':>9} {'chars':>7}")
+    for index, run in enumerate(runs, 1):
+        print(f"{index:>4} {run['ttft'] * 1000:>10.1f} {run['total'] * 1000:>10.1f} "
+              f"{run['partials']:>9} {run['progress']:>9} {run['chars']:>7}")
+    print(f"{'med':>4} {statistics.median(r['ttft'] for r in runs) * 1000:>10.1f} "
+          f"{statistics.median(r['total'] for r in runs) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+"""
+PDF完整解析模式的并行OCR基准测试
+
+生成一个每页包含若干张不同图片的扫描风格PDF，分别以不同的OCR并发数运行
+PdfTool的完整解析，输出耗时以及相对串行识别的加速比。
+
+用法:
+    python benchmarks/bench_ocr.py --pages 50 --images-per-page 2
+    python benchmarks/bench_ocr.py --concurrency 1 2 4 8
+
+需要系统中已安装tesseract。
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def build_scanned_pdf(path: str, pages: int, images_per_page: int) -> None:
+    """生成每页包含多张文字图片的PDF，每张图片内容不同"""
+    import fitz
+    from PIL import Image, ImageDraw
+
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        for img_idx in range(images_per_page):
+            image = Image.new("RGB", (800, 200), "white")
+            draw = ImageDraw.Draw(image)
+            for line in range(4):
+                draw.text(
+                    (20, 20 + line * 40),
+                    f"Page {page_num + 1} image {img_idx + 1} line {line + 1} clause {page_num * 31 + line}",
+                    fill="black",
+                )
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG")
+            top = 72 + img_idx * 180
+            page.insert_image(fitz.Rect(72, top, 540, top + 117), stream=buffer.getvalue())
+    doc.save(path)
+    doc.close()
+
+
+async def run_once(file_path: str, concurrency: int) -> float:
+    from mcp_tool.tools.pdf_tool import PdfTool
+
+    tool = PdfTool()
+    start = time.perf_counter()
+    await tool._full_parse_pdf(file_path, ocr_concurrency=concurrency)
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--images-per-page", type=int, default=2)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=sorted({1, 2, 4, cpu_count} | {c for c in (8, 16) if c <= cpu_count}),
+    )
+    args = parser.parse_args()
+
+    # 进程池需要足够大以容纳最大并发数
+    os.environ["MCP_PROCESS_WORKERS"] = str(max(args.concurrency))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "scanned.pdf")
+        build_scanned_pdf(file_path, args.pages, args.images_per_page)
+        total_images = args.pages * args.images_per_page
+
+        # 预热进程池，避免将工作进程的启动时间计入第一轮结果
+        await run_once(file_path, max(args.concurrency))
+
+        print(f"pages={args.pages} images={total_images} cpus={cpu_count}")
+        print(f"{'concurrency':>12} {'seconds':>10} {'images/s':>10} {'speedup':>8}")
+        baseline = None
+        for concurrency in args.concurrency:
+            elapsed = await run_once(file_path, concurrency)
+            baseline = baseline or elapsed
+            print(
+                f"{concurrency:>12} {elapsed:>10.2f} "
+                f"{total_images / elapsed:>10.1f} {baseline / elapsed:>8.2f}"
+            )
+
+    from mcp_tool.tools.utils.executor import shutdown_executors
+
+    shutdown_executors()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
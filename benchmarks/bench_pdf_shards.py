@@ -0,0 +1,76 @@
+"""
+PDF快速预览模式的分片并行提取基准测试
+
+生成一个纯文本PDF（见corpus.py），分别以不同的进程池大小运行PdfTool的快速预览，
+输出耗时、每秒页数以及相对单进程（分批依次提取）的加速比。工作进程数为1时走
+原有的分批提取路径，大于1时按页码分片并行提取（基准测试中固定设置MCP_PDF_POOL=process）。
+
+用法:
+    python benchmarks/bench_pdf_shards.py --pages 2000
+    python benchmarks/bench_pdf_shards.py --pages 200 --format markdown --workers 1 2 4
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+
+async def run_once(file_path: str, output_format: str) -> float:
+    from mcp_tool.tools.pdf_tool import PdfTool
+
+    tool = PdfTool()
+    start = time.perf_counter()
+    results = await tool._quick_preview_pdf(file_path, output_format=output_format)
+    elapsed = time.perf_counter() - start
+    if tool.is_error_result(results):
+        raise RuntimeError(results[0].text)
+    return elapsed
+
+
+async def main() -> None:
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--format", choices=["text", "markdown"], default="text")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, 2, 4, cpu_count} | {c for c in (8, 16) if c <= cpu_count}),
+    )
+    args = parser.parse_args()
+
+    from corpus import build_text_pdf
+    from mcp_tool.tools.utils.executor import shutdown_executors
+
+    os.environ["MCP_CACHE_ENABLED"] = "false"
+    # 只有工具配置为使用进程池时才会分片
+    os.environ["MCP_PDF_POOL"] = "process"
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "text.pdf")
+        build_text_pdf(file_path, args.pages)
+
+        print(f"pages={args.pages} format={args.format} cpus={cpu_count}")
+        print(f"{'workers':>8} {'seconds':>10} {'pages/s':>10} {'speedup':>8}")
+        baseline = None
+        for workers in args.workers:
+            # 进程池大小在创建时确定，每轮重新创建，并预热以排除工作进程的启动时间
+            shutdown_executors()
+            os.environ["MCP_PROCESS_WORKERS"] = str(workers)
+            await run_once(file_path, args.format)
+            elapsed = await run_once(file_path, args.format)
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>10.2f} {args.pages / elapsed:>10.1f} {baseline / elapsed:>8.2f}")
+
+    shutdown_executors()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
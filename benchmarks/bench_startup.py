@@ -0,0 +1,129 @@
+"""
+服务冷启动基准测试
+
+每轮启动一个新的Python进程（与stdio客户端每个会话启动一个服务进程的情形一致），
+测量以下阶段的耗时：
+- import: 导入mcp_tool.server
+- list_tools: 加载所有工具并生成工具列表
+- 首次调用: 对生成的样例文件分别调用一次excel/word/pdf工具（此时才导入对应的重型依赖）
+
+同时检查list_tools完成时哪些重型依赖已经被导入，并给出直接导入全部重型依赖的耗时作为对比。
+
+用法:
+    python benchmarks/bench_startup.py --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("pandas", "openpyxl", "fitz", "pymupdf4llm", "PyPDF2", "PIL", "pytesseract", "docx")
+
+STARTUP_SCRIPT = r"""
+import asyncio, json, sys, time
+start = time.perf_counter()
+import mcp_tool.server
+timings = {"import": time.perf_counter() - start}
+
+from mcp_tool.tools import ToolRegistry
+from mcp_tool.tools.loader import get_tool_instances
+start = time.perf_counter()
+tools = get_tool_instances()
+ToolRegistry.list_tools()
+timings["list_tools"] = time.perf_counter() - start
+loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+
+async def first_calls():
+    for name, arguments in CALLS:
+        start = time.perf_counter()
+        await tools[name].execute(arguments)
+        timings["first " + name] = time.perf_counter() - start
+
+if __name__ == "__main__":
+    asyncio.run(first_calls())
+    print(json.dumps({"timings": timings, "loaded": loaded}))
+"""
+
+EAGER_SCRIPT = r"""
+import importlib, json, time
+start = time.perf_counter()
+for name in HEAVY_MODULES:
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        pass
+print(json.dumps({"timings": {"import heavy deps": time.perf_counter() - start}, "loaded": []}))
+"""
+
+
+def build_samples(tmp_dir: str) -> list:
+    """生成每种文件一个小样例，返回 (工具名, 参数) 列表"""
+    import docx
+    import fitz
+    import pandas as pd
+
+    xlsx_path = os.path.join(tmp_dir, "sample.xlsx")
+    pd.DataFrame({"a": range(10), "b": [f"v{i}" for i in range(10)]}).to_excel(xlsx_path, index=False)
+
+    docx_path = os.path.join(tmp_dir, "sample.docx")
+    document = docx.Document()
+    document.add_paragraph("sample paragraph")
+    document.save(docx_path)
+
+    pdf_path = os.path.join(tmp_dir, "sample.pdf")
+    pdf = fitz.open()
+    pdf.new_page().insert_text((72, 72), "sample page")
+    pdf.save(pdf_path)
+    pdf.close()
+
+    return [
+        ("excel", {"file_path": xlsx_path}),
+        ("word", {"file_path": docx_path}),
+        ("pdf", {"file_path": pdf_path, "mode": "quick"}),
+    ]
+
+
+def run_script(script: str, tmp_dir: str, calls: list) -> dict:
+    source = f"HEAVY_MODULES = {HEAVY_MODULES!r}\nCALLS = {calls!r}\n" + script
+    script_path = os.path.join(tmp_dir, "startup_case.py")
+    with open(script_path, "w", encoding="utf-8") as f:
+        f.write(source)
+    env = dict(os.environ, PYTHONPATH=ROOT, MCP_CACHE_ENABLED="false")
+    output = subprocess.run(
+        [sys.executable, script_path], env=env, cwd=tmp_dir, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        calls = build_samples(tmp_dir)
+        for title, script in (("server", STARTUP_SCRIPT), ("eager baseline", EAGER_SCRIPT)):
+            samples = {}
+            loaded = []
+            for _ in range(args.runs):
+                result = run_script(script, tmp_dir, calls)
+                loaded = result["loaded"]
+                for phase, seconds in result["timings"].items():
+                    samples.setdefault(phase, []).append(seconds)
+
+            print(f"\n{title} (runs={args.runs})")
+            print(f"{'phase':>18} {'median ms':>10} {'min ms':>10}")
+            for phase, values in samples.items():
+                print(f"{phase:>18} {statistics.median(values) * 1000:>10.1f} {min(values) * 1000:>10.1f}")
+            if script is STARTUP_SCRIPT:
+                print(f"heavy modules loaded by list_tools: {', '.join(loaded) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
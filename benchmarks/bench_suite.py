@@ -0,0 +1,215 @@
+"""
+文档解析工具的基准测试套件
+
+使用确定性生成的语料（见corpus.py），对PdfTool、WordTool和ExcelTool的各个模式分别测量：
+- 耗时：execute的墙钟时间（不含第三方库的导入时间）
+- 峰值内存：子进程的峰值RSS（每个用例、每次重复都在新的子进程中运行）
+- 输出字节数：返回内容的UTF-8字节数
+
+结果可以保存为基线（benchmarks/baselines/<规模>.json），之后的运行与基线比较，
+耗时或内存超过容差时标记为回归。基线与机器相关，请在同一台机器上比较。
+
+用法:
+    python benchmarks/bench_suite.py --size small                  # 运行并与基线比较
+    python benchmarks/bench_suite.py --size small --save-baseline  # 运行并保存为基线
+    python benchmarks/bench_suite.py --cases excel --check         # 只运行excel用例，有回归时返回非0
+
+结果缓存和OCR缓存在测试中被禁用；没有安装tesseract时跳过需要OCR的用例。
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+
+# 用例：(用例名, 工具名, 语料文档, 参数, 是否需要tesseract)
+CASES = [
+    ("pdf-text-quick", "pdf", "text.pdf", {"mode": "quick"}, False),
+    ("pdf-text-full", "pdf", "text.pdf", {"mode": "full"}, False),
+    ("pdf-images-quick", "pdf", "images.pdf", {"mode": "quick"}, False),
+    ("pdf-images-full", "pdf", "images.pdf", {"mode": "full"}, True),
+    ("word-tables", "word", "tables.docx", {}, False),
+    ("excel-tall-full", "excel", "tall.xlsx", {"mode": "full"}, False),
+    ("excel-tall-stream", "excel", "tall.xlsx", {"mode": "stream", "max_rows": 10 ** 9}, False),
+    ("excel-tall-csv", "excel", "tall.xlsx", {"mode": "stream", "max_rows": 10 ** 9, "format": "csv"}, False),
+    ("excel-tall-profile", "excel", "tall.xlsx", {"mode": "profile"}, False),
+    ("excel-wide-full", "excel", "wide.xlsx", {"mode": "full"}, False),
+    ("excel-wide-stream", "excel", "wide.xlsx", {"mode": "stream", "max_rows": 10 ** 9}, False),
+]
+
+WORKER_SCRIPT = r"""
+import asyncio, json, resource, sys, time
+sys.path.insert(0, ROOT)
+
+# 预先导入第三方库，计时只包含解析本身
+import docx, fitz, openpyxl, pandas  # noqa: F401
+from mcp_tool.tools.loader import get_tool_instances
+from mcp_tool.tools.utils.executor import shutdown_executors
+
+
+def content_size(item):
+    text = getattr(item, "text", None)
+    if text is not None:
+        return len(text.encode("utf-8"))
+    return len(getattr(item, "data", "") or "")
+
+
+async def main():
+    tool = get_tool_instances()[TOOL]
+    arguments = dict(ARGUMENTS, file_path=FILE_PATH)
+    start = time.perf_counter()
+    results = await tool.execute(arguments)
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": elapsed,
+        "output_bytes": sum(content_size(item) for item in results),
+        "error": tool.is_error_result(results),
+    }
+
+
+if __name__ == "__main__":
+    result = asyncio.run(main())
+    shutdown_executors()
+    # Linux下ru_maxrss的单位为KB
+    result["rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    result["child_rss_mb"] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(json.dumps(result))
+"""
+
+
+def run_case(tool: str, file_path: str, arguments: dict, work_dir: str) -> dict:
+    """在新的子进程中运行一次用例"""
+    script_path = os.path.join(work_dir, "bench_worker.py")
+    with open(script_path, "w", encoding="utf-8") as f:
+        f.write(
+            f"ROOT = {ROOT!r}\nTOOL = {tool!r}\nFILE_PATH = {file_path!r}\n"
+            f"ARGUMENTS = {arguments!r}\n" + WORKER_SCRIPT
+        )
+    env = dict(
+        os.environ,
+        MCP_CACHE_ENABLED="false",
+        MCP_OCR_CACHE_ENABLED="false",
+        MCP_METRICS_ENABLED="false",
+        MCP_PARTIAL_RESULTS="false",
+    )
+    completed = subprocess.run(
+        [sys.executable, script_path], env=env, cwd=work_dir, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr else "worker failed")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run_suite(paths: dict, case_filter: list, repeat: int) -> dict:
+    has_tesseract = shutil.which("tesseract") is not None
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, tool, document, arguments, needs_ocr in CASES:
+            if case_filter and not any(pattern in name for pattern in case_filter):
+                continue
+            if needs_ocr and not has_tesseract:
+                print(f"{name:<20} skipped (tesseract not installed)")
+                continue
+            try:
+                runs = [run_case(tool, paths[document], arguments, work_dir) for _ in range(repeat)]
+            except RuntimeError as e:
+                print(f"{name:<20} failed: {e}")
+                continue
+            results[name] = {
+                "seconds": statistics.median(run["seconds"] for run in runs),
+                "rss_mb": max(run["rss_mb"] for run in runs),
+                "child_rss_mb": max(run["child_rss_mb"] for run in runs),
+                "output_bytes": runs[-1]["output_bytes"],
+                "error": any(run["error"] for run in runs),
+            }
+            result = results[name]
+            print(
+                f"{name:<20} {result['seconds'] * 1000:>10.1f} ms {result['rss_mb']:>8.1f} MB "
+                f"{result['output_bytes']:>12} bytes" + ("  (error result)" if result["error"] else "")
+            )
+    return results
+
+
+def compare(results: dict, baseline: dict, time_tolerance: float, rss_tolerance: float) -> list:
+    """与基线比较，返回回归描述列表"""
+    regressions = []
+    print(f"\n{'case':<20} {'time':>8} {'rss':>8} {'output':>8}")
+    for name, result in results.items():
+        base = baseline.get("cases", {}).get(name)
+        if base is None:
+            print(f"{name:<20} {'(no baseline)':>26}")
+            continue
+        time_ratio = result["seconds"] / base["seconds"] if base["seconds"] else 1.0
+        rss_ratio = result["rss_mb"] / base["rss_mb"] if base["rss_mb"] else 1.0
+        output_ratio = result["output_bytes"] / base["output_bytes"] if base["output_bytes"] else 1.0
+        flags = []
+        # 很短的用例受噪声影响大，绝对差值小于20ms时不计为回归
+        if time_ratio > 1 + time_tolerance and result["seconds"] - base["seconds"] > 0.02:
+            flags.append("slower")
+        if rss_ratio > 1 + rss_tolerance:
+            flags.append("more memory")
+        if result["output_bytes"] != base["output_bytes"]:
+            flags.append("output changed")
+        print(f"{name:<20} {time_ratio:>7.2f}x {rss_ratio:>7.2f}x {output_ratio:>7.2f}x  {' '.join(flags)}")
+        regressions.extend(f"{name}: {flag}" for flag in flags if flag != "output changed")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", choices=["small", "medium", "large"], default="small")
+    parser.add_argument("--repeat", type=int, default=3, help="每个用例运行的次数，耗时取中位数")
+    parser.add_argument("--cases", nargs="*", default=[], help="只运行名称包含这些字符串的用例")
+    parser.add_argument("--corpus-dir", default=os.path.join(tempfile.gettempdir(), "mcp-bench-corpus"))
+    parser.add_argument("--baseline", help="基线文件路径，默认 benchmarks/baselines/<size>.json")
+    parser.add_argument("--save-baseline", action="store_true", help="将本次结果保存为基线")
+    parser.add_argument("--time-tolerance", type=float, default=0.25)
+    parser.add_argument("--rss-tolerance", type=float, default=0.2)
+    parser.add_argument("--check", action="store_true", help="存在回归时以非0状态码退出")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from corpus import ensure_corpus
+
+    paths = ensure_corpus(args.corpus_dir, args.size)
+    baseline_path = args.baseline or os.path.join(BENCH_DIR, "baselines", f"{args.size}.json")
+
+    print(f"\nsize={args.size} repeat={args.repeat} python={platform.python_version()} cpus={os.cpu_count()}")
+    results = run_suite(paths, args.cases, args.repeat)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        baseline = {
+            "size": args.size,
+            "machine": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+            "cases": results,
+        }
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nbaseline saved to {baseline_path}")
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print(f"\nno baseline at {baseline_path}, run with --save-baseline to create one")
+        return 0
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.time_tolerance, args.rss_tolerance)
+    if regressions:
+        print("\nregressions:\n  " + "\n  ".join(regressions))
+        return 1 if args.check else 0
+    print("\nno regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
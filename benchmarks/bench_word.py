@@ -0,0 +1,114 @@
+"""
+Word文档解析基准测试：流式读取与python-docx对比
+
+生成一份长篇合同风格的docx（见corpus.py），分别用当前的流式实现
+（WordTool._read_word_document，iterparse逐个元素读取word/document.xml）和此前基于
+python-docx的实现（完整加载文档对象，逐段用+=拼接文本，段落和表格分开输出）解析，
+输出耗时和进程内存峰值。每次解析在单独的子进程中进行，内存峰值互不影响。
+
+用法:
+    python benchmarks/bench_word.py --pages 1000
+    python benchmarks/bench_word.py --pages 200 500 1000 --repeat 3
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+IMPLEMENTATIONS = ("python-docx", "streaming")
+
+
+def read_with_python_docx(file_path: str) -> str:
+    """此前的实现：python-docx加载完整文档，段落和表格分别拼接"""
+    import docx
+
+    doc = docx.Document(file_path)
+    content_text = "## 文档内容\n\n"
+    content_text += f"### 段落 (共{len(doc.paragraphs)}个)\n\n"
+    for para in doc.paragraphs:
+        if para.text.strip():
+            content_text += f"{para.text}\n\n"
+    if doc.tables:
+        content_text += f"### 表格 (共{len(doc.tables)}个)\n\n"
+        for i, table in enumerate(doc.tables):
+            content_text += f"#### 表格 {i+1}\n\n"
+            rows = [[cell.text.replace('\n', ' ').strip() for cell in row.cells] for row in table.rows]
+            if rows:
+                content_text += "| " + " | ".join(rows[0]) + " |\n"
+                content_text += "| " + " | ".join(["---"] * len(rows[0])) + " |\n"
+                for row in rows[1:]:
+                    content_text += "| " + " | ".join(row) + " |\n"
+                content_text += "\n"
+    return content_text
+
+
+def read_streaming(file_path: str) -> str:
+    from mcp_tool.tools.word_tool import WordTool
+
+    return "".join(item.text for item in WordTool._read_word_document(file_path))
+
+
+def run_child(implementation: str, file_path: str) -> None:
+    """子进程入口：解析一次并以JSON输出耗时、输出字符数和内存峰值"""
+    # 预先导入依赖，导入时间不计入解析耗时
+    import docx  # noqa: F401
+    from mcp_tool.tools.word_tool import WordTool  # noqa: F401
+
+    reader = read_with_python_docx if implementation == "python-docx" else read_streaming
+    start = time.perf_counter()
+    text = reader(file_path)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "chars": len(text), "peak_mb": peak_kb / 1024}))
+
+
+def measure(implementation: str, file_path: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", implementation, file_path],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1000])
+    parser.add_argument("--repeat", type=int, default=1, help="每种实现解析的次数，耗时取最小值")
+    parser.add_argument("--child", nargs=2, metavar=("IMPLEMENTATION", "FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    from corpus import build_contract_docx
+
+    print(f"{'pages':>6} {'MB':>6} {'implementation':>14} {'seconds':>9} {'chars':>10} {'peak MB':>8} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for pages in args.pages:
+            file_path = os.path.join(tmp_dir, f"contract-{pages}.docx")
+            build_contract_docx(file_path, pages)
+            size_mb = os.path.getsize(file_path) / 1024 / 1024
+            baseline = None
+            for implementation in IMPLEMENTATIONS:
+                runs = [measure(implementation, file_path) for _ in range(args.repeat)]
+                best = min(runs, key=lambda run: run["seconds"])
+                baseline = baseline or best["seconds"]
+                print(
+                    f"{pages:>6} {size_mb:>6.1f} {implementation:>14} {best['seconds']:>9.2f} {best['chars']:>10} "
+                    f"{max(run['peak_mb'] for run in runs):>8.1f} "
+                    f"{baseline / best['seconds']:>8.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
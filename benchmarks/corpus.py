@@ -0,0 +1,206 @@
+"""
+基准测试使用的确定性文档语料
+
+所有文档都由固定随机种子生成，同一参数在任何机器上生成的内容都相同，
+因此不同版本之间的测试结果可以直接比较。每个文档只在不存在时生成一次。
+"""
+
+import io
+import os
+import random
+from typing import Callable, Dict, List
+
+# 生成文本用的词表，中英文混合，接近实际业务文档
+_WORDS = (
+    "合同 条款 甲方 乙方 付款 交付 验收 违约 责任 期限 金额 发票 服务 质量 保密 "
+    "contract clause payment delivery acceptance liability invoice service quality "
+    "amount period party agreement schedule report revenue margin quarter forecast"
+).split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def build_text_pdf(path: str, pages: int) -> None:
+    """每页约40行文字的纯文本PDF"""
+    import fitz
+
+    rng = random.Random(f"text-pdf-{pages}")
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        lines = [f"Page {page_num + 1}"] + [_sentence(rng, 12) for _ in range(40)]
+        page.insert_text((48, 48), "\n".join(lines), fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def build_image_pdf(path: str, pages: int, images_per_page: int = 3) -> None:
+    """每页包含多张文字图片的扫描风格PDF，每页有一张重复出现的logo"""
+    import fitz
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(f"image-pdf-{pages}-{images_per_page}")
+
+    def render(lines: List[str], size=(800, 200)) -> bytes:
+        image = Image.new("RGB", size, "white")
+        draw = ImageDraw.Draw(image)
+        for index, line in enumerate(lines):
+            draw.text((20, 20 + index * 36), line, fill="black")
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    logo = render(["ACME Corporation"], size=(300, 80))
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        page.insert_text((48, 40), f"Scanned page {page_num + 1}", fontsize=9)
+        page.insert_image(fitz.Rect(400, 20, 560, 62), stream=logo)
+        for img_idx in range(images_per_page):
+            stream = render([_sentence(rng, 8) for _ in range(4)])
+            top = 90 + img_idx * 220
+            page.insert_image(fitz.Rect(48, top, 560, top + 128), stream=stream)
+    doc.save(path)
+    doc.close()
+
+
+def build_table_docx(path: str, tables: int, rows: int, columns: int = 8) -> None:
+    """包含若干段落和大表格的Word文档"""
+    import docx
+
+    rng = random.Random(f"table-docx-{tables}-{rows}-{columns}")
+    document = docx.Document()
+    document.core_properties.title = "Benchmark document"
+    document.core_properties.author = "benchmarks"
+    for table_idx in range(tables):
+        document.add_heading(f"Section {table_idx + 1}", level=1)
+        for _ in range(5):
+            document.add_paragraph(_sentence(rng, 30))
+        table = document.add_table(rows=rows + 1, cols=columns)
+        for col in range(columns):
+            table.cell(0, col).text = f"列{col + 1}"
+        for row in range(1, rows + 1):
+            cells = table.rows[row].cells
+            for col in range(columns):
+                cells[col].text = str(rng.randint(0, 100000)) if col % 2 else rng.choice(_WORDS)
+    document.save(path)
+
+
+def build_contract_docx(path: str, pages: int) -> None:
+    """
+    长篇合同风格的Word文档：每页约30个段落（含编号条款）和一个小表格
+
+    python-docx逐段添加上千页内容太慢，这里直接生成word/document.xml，
+    其余部件（样式、编号定义等）取自python-docx的默认模板。
+    """
+    import zipfile
+    from xml.sax.saxutils import escape
+
+    import docx
+
+    rng = random.Random(f"contract-docx-{pages}")
+    template = io.BytesIO()
+    docx.Document().save(template)
+
+    def paragraph(text: str, style: str = "") -> str:
+        style_xml = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+        return f"<w:p>{style_xml}<w:r><w:t xml:space=\"preserve\">{escape(text)}</w:t></w:r></w:p>"
+
+    def cell(text: str) -> str:
+        return f"<w:tc><w:tcPr><w:tcW w:w=\"2000\" w:type=\"dxa\"/></w:tcPr>{paragraph(text)}</w:tc>"
+
+    body = []
+    for page in range(pages):
+        body.append(paragraph(f"第{page + 1}条 {_sentence(rng, 4)}", "Heading1"))
+        for _ in range(20):
+            body.append(paragraph(_sentence(rng, 40)))
+        for _ in range(8):
+            body.append(paragraph(_sentence(rng, 15), "ListNumber"))
+        rows = [["项目", "金额", "期限", "备注"]] + [
+            [rng.choice(_WORDS), str(rng.randint(1000, 999999)), f"{rng.randint(1, 36)}个月", _sentence(rng, 3)]
+            for _ in range(4)
+        ]
+        body.append("<w:tbl>" + "".join(
+            "<w:tr>" + "".join(cell(value) for value in row) + "</w:tr>" for row in rows
+        ) + "</w:tbl>")
+
+    with zipfile.ZipFile(template) as source, zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as target:
+        for item in source.infolist():
+            data = source.read(item.filename)
+            if item.filename == "word/document.xml":
+                text = data.decode("utf-8")
+                start = text.index("<w:body>") + len("<w:body>")
+                data = (text[:start] + "".join(body) + text[start:]).encode("utf-8")
+            target.writestr(item, data)
+
+
+def build_workbook(path: str, rows: int, columns: int, sheets: int = 1) -> None:
+    """数值、文本、日期混合的工作簿"""
+    import datetime
+
+    import openpyxl
+
+    rng = random.Random(f"workbook-{rows}-{columns}-{sheets}")
+    workbook = openpyxl.Workbook(write_only=True)
+    start = datetime.datetime(2024, 1, 1)
+    for sheet_idx in range(sheets):
+        sheet = workbook.create_sheet(f"Sheet{sheet_idx + 1}")
+        sheet.append([f"col_{col}" for col in range(columns)])
+        for row in range(rows):
+            values = []
+            for col in range(columns):
+                kind = col % 4
+                if kind == 0:
+                    values.append(row)
+                elif kind == 1:
+                    values.append(round(rng.random() * 10000, 2))
+                elif kind == 2:
+                    values.append(rng.choice(_WORDS))
+                else:
+                    values.append(start + datetime.timedelta(hours=row))
+            sheet.append(values)
+    workbook.save(path)
+
+
+# 语料规模：名称 -> {文档名: (生成函数, 参数)}
+SIZES: Dict[str, Dict[str, tuple]] = {
+    "small": {
+        "text.pdf": (build_text_pdf, {"pages": 20}),
+        "images.pdf": (build_image_pdf, {"pages": 5}),
+        "tables.docx": (build_table_docx, {"tables": 2, "rows": 200}),
+        "tall.xlsx": (build_workbook, {"rows": 10000, "columns": 8}),
+        "wide.xlsx": (build_workbook, {"rows": 500, "columns": 120}),
+    },
+    "medium": {
+        "text.pdf": (build_text_pdf, {"pages": 200}),
+        "images.pdf": (build_image_pdf, {"pages": 30}),
+        "tables.docx": (build_table_docx, {"tables": 5, "rows": 1000}),
+        "tall.xlsx": (build_workbook, {"rows": 100000, "columns": 8}),
+        "wide.xlsx": (build_workbook, {"rows": 5000, "columns": 200}),
+    },
+    "large": {
+        "text.pdf": (build_text_pdf, {"pages": 1000}),
+        "images.pdf": (build_image_pdf, {"pages": 100}),
+        "tables.docx": (build_table_docx, {"tables": 10, "rows": 5000}),
+        "tall.xlsx": (build_workbook, {"rows": 500000, "columns": 8}),
+        "wide.xlsx": (build_workbook, {"rows": 20000, "columns": 300}),
+    },
+}
+
+
+def ensure_corpus(directory: str, size: str, log: Callable[[str], None] = print) -> Dict[str, str]:
+    """生成（或复用已生成的）指定规模的语料，返回 文档名 -> 路径"""
+    target = os.path.join(directory, size)
+    os.makedirs(target, exist_ok=True)
+    paths = {}
+    for name, (builder, params) in SIZES[size].items():
+        path = os.path.join(target, name)
+        if not os.path.exists(path):
+            log(f"generating {size}/{name} {params}")
+            tmp_path = path + ".tmp" + os.path.splitext(name)[1]
+            builder(tmp_path, **params)
+            os.replace(tmp_path, path)
+        paths[name] = path
+    return paths
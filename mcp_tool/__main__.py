@@ -2,4 +2,6 @@ import sys
 
 from .server import main
 
-sys.exit(main())
+# 进程池使用spawn方式启动子进程时会重新导入主模块，需要避免重复启动服务
+if __name__ == "__main__":
+    sys.exit(main())
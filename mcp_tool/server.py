@@ -1,3 +1,8 @@
+import asyncio
+import contextlib
+import os
+import sys
+
 import anyio
 import click
 import mcp.types as types
@@ -6,6 +11,41 @@ from mcp.server.lowlevel import Server
 # 导入工具注册器和工具加载器
 from .tools import ToolRegistry
 from .tools.loader import get_tool_instances
+from .tools.utils.cache import get_result_cache
+from .tools.utils.executor import THREAD_POOL, env_int, run_in_pool, shutdown_executors
+from .tools.utils.http_cache import get_http_cache
+from .tools.utils.http_client import close_http_clients
+from .tools.utils.metrics import get_metrics, track_call
+from .tools.utils.ocr import get_ocr_cache
+from .tools.utils.progress import ProgressReporter, progress_context
+from .tools.utils.response_budget import apply_budget, get_continuation_store, response_budget
+from .tools.utils.warmup import WarmupWorker
+
+
+def _register_cache_collectors() -> None:
+    """将各缓存的命中统计加入指标输出"""
+    metrics = get_metrics()
+    for name, get_cache in (
+        ("result", get_result_cache),
+        ("ocr", get_ocr_cache),
+        ("url", get_http_cache),
+        ("continuation", get_continuation_store),
+    ):
+        # 缓存被禁用时get_cache返回None，不输出该缓存的统计
+        metrics.register_collector(
+            name, lambda get_cache=get_cache: get_cache().stats() if get_cache() is not None else None
+        )
+
+
+async def _dump_metrics_periodically(path: str, interval: int) -> None:
+    """stdio模式下定期将指标写入文件"""
+    while True:
+        await anyio.sleep(interval)
+        try:
+            await run_in_pool(THREAD_POOL, get_metrics().write_file, path)
+        except OSError as e:
+            print(f"Warning: Failed to write metrics to {path}: {e}", file=sys.stderr)
+
 
 @click.command()
 @click.option("--port", default=8000, help="Port to listen on for SSE")
@@ -20,6 +60,12 @@ def main(port: int, transport: str) -> int:
     
     # 加载所有工具实例
     tool_instances = get_tool_instances()
+    _register_cache_collectors()
+
+    # 设置MCP_WARMUP_ENABLED=true后在后台预解析监视目录中的文件
+    warmup = WarmupWorker.from_env(tool_instances)
+    if warmup is not None:
+        get_metrics().register_collector("warmup", warmup.stats)
 
     @app.call_tool()
     async def fetch_tool( # type: ignore[unused-function]
@@ -29,7 +75,28 @@ def main(port: int, transport: str) -> int:
             tool_instance = tool_instances.get(name)
             if tool_instance:
                 try:
-                    return await tool_instance.execute(arguments)
+                    # 绑定进度上报器，工具在执行过程中可以发送进度通知和部分结果
+                    ctx = app.request_context
+                    meta = ctx.meta
+                    partial_results = os.environ.get("MCP_PARTIAL_RESULTS", "false").lower() == "true"
+                    if meta is not None and getattr(meta, "partialResults", None) is not None:
+                        partial_results = bool(getattr(meta, "partialResults"))
+                    reporter = ProgressReporter(
+                        ctx.session,
+                        progress_token=meta.progressToken if meta else None,
+                        tool_name=name,
+                        partial_results=partial_results,
+                    )
+                    # 记录调用次数、耗时、返回字节数和错误数；交互调用执行期间后台预解析暂停提交新任务
+                    interactive = warmup.interactive_call() if warmup is not None else contextlib.nullcontext()
+                    with interactive, progress_context(reporter), track_call(name) as call:
+                        results = await tool_instance.run(arguments)
+                        # 超过响应预算的部分暂存在服务端，客户端通过continue工具续取
+                        if tool_instance.split_response:
+                            budget = response_budget(getattr(meta, "maxResponseTokens", None) if meta else None)
+                            results = apply_budget(name, results, budget)
+                        call.set_result(results)
+                        return results
                 except Exception as e:
                     import traceback
                     error_details = traceback.format_exc()
@@ -58,6 +125,7 @@ def main(port: int, transport: str) -> int:
         from starlette.routing import Mount, Route
         from starlette.middleware import Middleware
         from starlette.middleware.cors import CORSMiddleware
+        from starlette.responses import PlainTextResponse
 
         sse = SseServerTransport("/messages/")
 
@@ -71,6 +139,13 @@ def main(port: int, transport: str) -> int:
                     streams[0], streams[1], app.create_initialization_options()
                 )
 
+        async def handle_metrics(request):
+            # Prometheus文本格式的运行指标
+            return PlainTextResponse(
+                get_metrics().render_prometheus(),
+                media_type="text/plain; version=0.0.4; charset=utf-8",
+            )
+
         # 添加CORS中间件以允许跨域请求
         middleware = [
             Middleware(
@@ -81,13 +156,28 @@ def main(port: int, transport: str) -> int:
             )
         ]
 
+        @contextlib.asynccontextmanager
+        async def lifespan(_app):
+            warmup_task = asyncio.create_task(warmup.run()) if warmup is not None else None
+            try:
+                yield
+            finally:
+                if warmup_task is not None:
+                    warmup_task.cancel()
+                    with contextlib.suppress(asyncio.CancelledError):
+                        await warmup_task
+                # 在uvicorn的事件循环中关闭共享HTTP客户端
+                await close_http_clients()
+
         starlette_app = Starlette(
             debug=True,
             routes=[
                 Route("/sse", endpoint=handle_sse),
+                Route("/metrics", endpoint=handle_metrics),
                 Mount("/messages/", app=sse.handle_post_message),
             ],
             middleware=middleware,
+            lifespan=lifespan,
         )
 
         import uvicorn
@@ -99,15 +189,42 @@ def main(port: int, transport: str) -> int:
             port=port,
             timeout_keep_alive=300,  # 增加保持连接的超时时间
         )
+        
+        # 服务退出时关闭共享工作池
+        shutdown_executors()
     else:
         from mcp.server.stdio import stdio_server
 
+        # stdio模式没有HTTP端口，设置MCP_METRICS_FILE后将指标定期写入该文件
+        metrics_file = os.environ.get("MCP_METRICS_FILE")
+
         async def arun():
-            async with stdio_server() as streams:
-                await app.run(
-                    streams[0], streams[1], app.create_initialization_options()
-                )
+            try:
+                async with stdio_server() as streams, anyio.create_task_group() as tg:
+                    if metrics_file:
+                        tg.start_soon(
+                            _dump_metrics_periodically,
+                            metrics_file,
+                            env_int("MCP_METRICS_INTERVAL", 15),
+                        )
+                    if warmup is not None:
+                        tg.start_soon(warmup.run)
+                    await app.run(
+                        streams[0], streams[1], app.create_initialization_options()
+                    )
+                    tg.cancel_scope.cancel()
+            finally:
+                await close_http_clients()
+                if metrics_file:
+                    try:
+                        get_metrics().write_file(metrics_file)
+                    except OSError as e:
+                        print(f"Warning: Failed to write metrics to {metrics_file}: {e}", file=sys.stderr)
 
-        anyio.run(arun)
+        try:
+            anyio.run(arun)
+        finally:
+            # 服务退出时关闭共享工作池
+            shutdown_executors()
 
     return 0
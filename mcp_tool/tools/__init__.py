@@ -1,13 +1,24 @@
-from typing import Dict, Type, List
+from typing import Any, Callable, Dict, Type, List
 import mcp.types as types
 import os
 
+from .utils.cache import get_result_cache, track_cacheable
+from .utils.executor import THREAD_POOL, run_in_pool
+from .utils.metrics import phase
+
 # 工具基类
 class BaseTool:
     """所有工具的基类"""
     name: str = ""
     description: str = ""
     input_schema: dict = {}
+    # 阻塞任务默认使用的工作池："thread" 或 "process"
+    # 可通过环境变量 MCP_<工具名>_POOL 覆盖，例如 MCP_PDF_POOL=process
+    worker_pool: str = "thread"
+    # 是否缓存解析结果，缓存键由文件内容指纹、工具名和其余参数组成
+    cacheable: bool = False
+    # 服务端是否按MCP_RESPONSE_MAX_TOKENS拆分过长的结果，自行控制返回长度的工具设为False
+    split_response: bool = True
     
     @classmethod
     def get_tool_definition(cls) -> types.Tool:
@@ -22,6 +33,64 @@ class BaseTool:
         """执行工具逻辑，需要在子类中实现"""
         raise NotImplementedError("Tool implementation must override execute method")
     
+    async def run(self, arguments: dict) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+        """
+        执行工具，服务端和组合工具都应通过此方法调用工具
+        
+        对可缓存的工具，先按文件内容和参数查询结果缓存，未命中时再调用execute并写入缓存；
+        错误结果和execute中通过mark_uncacheable标记为不可缓存的结果不写入缓存。
+        """
+        cache = get_result_cache()
+        if not self.cacheable or cache is None or "file_path" not in arguments:
+            return await self.execute(arguments)
+        
+        # 补全参数默认值，使省略参数和显式传入默认值的调用命中同一缓存条目
+        params = {
+            key: prop["default"]
+            for key, prop in self.input_schema.get("properties", {}).items()
+            if "default" in prop
+        }
+        params.update(arguments)
+        file_path = self.process_file_path(arguments["file_path"])
+        
+        # 计算内容哈希和读取磁盘缓存都是阻塞操作
+        with phase("cache"):
+            key = await run_in_pool(THREAD_POOL, cache.make_key, self.name, file_path, params)
+            cached = await run_in_pool(THREAD_POOL, cache.get, key) if key is not None else None
+        if key is None:
+            return await self.execute(arguments)
+        if cached is not None:
+            return cached
+        
+        with track_cacheable() as state:
+            results = await self.execute(arguments)
+        if state["cacheable"] and not self.is_error_result(results):
+            with phase("cache"):
+                await run_in_pool(THREAD_POOL, cache.put, key, results)
+        return results
+    
+    @staticmethod
+    def is_error_result(results: list) -> bool:
+        """判断结果是否为错误信息，错误结果不写入缓存"""
+        return any(
+            isinstance(item, types.TextContent) and item.text.startswith(("错误:", "Error:"))
+            for item in results
+        )
+    
+    def get_worker_pool(self) -> str:
+        """获取当前工具使用的工作池类型"""
+        return os.environ.get(f"MCP_{self.name.upper()}_POOL", self.worker_pool)
+    
+    async def run_blocking(self, func: Callable[..., Any], *args: Any, pool: str | None = None, **kwargs: Any) -> Any:
+        """
+        在共享工作池中执行阻塞函数，避免阻塞事件循环
+        
+        Args:
+            func: 要执行的函数，使用进程池时必须是模块级函数或静态方法
+            pool: 工作池类型，默认使用工具自身配置的工作池
+        """
+        return await run_in_pool(pool or self.get_worker_pool(), func, *args, **kwargs)
+    
     def process_file_path(self, file_path: str) -> str:
         """
         处理文件路径，支持挂载目录的转换
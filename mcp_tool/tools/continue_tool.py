@@ -0,0 +1,62 @@
+"""
+续取工具，获取因超过响应预算而暂存在服务端的结果的下一部分
+"""
+
+from typing import Any, Dict, List
+import mcp.types as types
+from . import BaseTool, ToolRegistry
+from .utils.executor import THREAD_POOL
+from .utils.response_budget import continuation_notice, get_continuation_store, response_budget
+
+@ToolRegistry.register
+class ContinueTool(BaseTool):
+    """
+    续取工具
+
+    任何工具的结果超过MCP_RESPONSE_MAX_TOKENS时，服务端只返回预算以内的部分，
+    末尾附带续取句柄（同时写在该条内容的_meta.continuation中）。本工具按句柄从暂存中
+    取出下一部分，仍有剩余时末尾再次附带同一句柄；全部取完或超过有效期后句柄失效。
+    """
+    name = "continue"
+    description = "获取被截断的工具结果的下一部分，传入上一次结果末尾给出的handle"
+    # 本工具按max_tokens自行拆分，不再由服务端拆分
+    split_response = False
+    input_schema = {
+        "type": "object",
+        "required": ["handle"],
+        "properties": {
+            "handle": {
+                "type": "string",
+                "description": "上一次结果末尾给出的续取句柄",
+            },
+            "max_tokens": {
+                "type": "integer",
+                "description": "本次最多返回的近似token数（默认MCP_RESPONSE_MAX_TOKENS）",
+                "minimum": 1
+            }
+        },
+    }
+
+    async def execute(self, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+        """取出下一部分内容"""
+        handle = (arguments.get("handle") or "").strip()
+        if not handle:
+            return [types.TextContent(
+                type="text",
+                text="错误: 缺少必要参数 'handle'"
+            )]
+
+        max_tokens = response_budget(arguments.get("max_tokens"))
+        taken = await self.run_blocking(get_continuation_store().take, handle, max_tokens, pool=THREAD_POOL)
+        if taken is None:
+            return [types.TextContent(
+                type="text",
+                text=f"错误: 续取句柄不存在或已过期: {handle}，请重新调用原工具"
+            )]
+
+        contents, info = taken
+        if info["remaining_tokens"]:
+            contents = list(contents) + [
+                continuation_notice(handle, info["tool"], info["part"], info["remaining_tokens"])
+            ]
+        return contents
@@ -1,14 +1,31 @@
+import csv
+import io
+import math
 import os
-import pandas as pd
+import zipfile
 import json
+from xml.etree import ElementTree
 import mcp.types as types
 from . import BaseTool, ToolRegistry
+from .utils.executor import THREAD_POOL, env_int
+from .utils.lazy import lazy_import
+from .utils.metrics import phase
+from .utils.progress import emit_partial, report_progress, threadsafe_progress
+
+pd = lazy_import("pandas")
+openpyxl = lazy_import("openpyxl")
+
+# 以纯文本形式输出的格式，其余格式输出JSON
+TEXT_FORMATS = ("csv", "markdown")
+# profile模式统计的分位数
+PROFILE_QUANTILES = (0.25, 0.5, 0.75)
 
 @ToolRegistry.register
 class ExcelTool(BaseTool):
     """Excel解析工具，用于解析Excel文件内容"""
     name = "excel"
     description = "Parses an Excel file and returns its content including all sheets"
+    cacheable = True
     input_schema = {
         "type": "object",
         "required": ["file_path"],
@@ -16,6 +33,51 @@ class ExcelTool(BaseTool):
             "file_path": {
                 "type": "string",
                 "description": "Path to the Excel file to parse",
+            },
+            "mode": {
+                "type": "string",
+                "description": "'full' loads each sheet with pandas; 'stream' reads rows one by one with bounded memory (.xlsx/.xlsm only); 'profile' returns per-column statistics (dtype, nulls, distinct values, min/max/mean/quantiles, top values) and a small sample instead of the rows",
+                "enum": ["full", "stream", "profile"],
+                "default": "full"
+            },
+            "sheets": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Names of the sheets to read, defaults to all sheets",
+            },
+            "columns": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Names of the columns to return, defaults to all columns",
+            },
+            "offset": {
+                "type": "integer",
+                "description": "Number of data rows to skip in each sheet",
+                "minimum": 0,
+                "default": 0
+            },
+            "max_rows": {
+                "type": "integer",
+                "description": "Maximum number of data rows to return per sheet (stream mode defaults to MCP_EXCEL_STREAM_MAX_ROWS)",
+                "minimum": 1
+            },
+            "format": {
+                "type": "string",
+                "description": "Output format: 'json' (one object per row), 'columns' (columnar JSON), 'rows' (header once, then row arrays), 'csv' or 'markdown'",
+                "enum": ["json", "columns", "rows", "csv", "markdown"],
+                "default": "json"
+            },
+            "sample_rows": {
+                "type": "integer",
+                "description": "Number of sample rows included per sheet in profile mode",
+                "minimum": 0,
+                "default": 5
+            },
+            "top_values": {
+                "type": "integer",
+                "description": "Number of most frequent values reported per column in profile mode",
+                "minimum": 0,
+                "default": 5
             }
         },
     }
@@ -44,10 +106,47 @@ class ExcelTool(BaseTool):
                 text=f"Error: File is not an Excel file: {file_path}"
             )]
         
+        mode = arguments.get("mode", "full")
+        if mode == "stream" and file_path.lower().endswith('.xls'):
+            return [types.TextContent(
+                type="text",
+                text=f"Error: Stream mode only supports .xlsx and .xlsm files: {file_path}"
+            )]
+        
         try:
-            # 读取Excel文件中的所有sheet
-            excel_file = pd.ExcelFile(file_path)
-            sheet_names = excel_file.sheet_names
+            # 读取Excel是阻塞操作，按sheet逐个放到工作池中执行，每完成一个sheet上报一次进度
+            sheet_names = await self.run_blocking(ExcelTool._list_sheets, file_path)
+            
+            requested = arguments.get("sheets")
+            if requested:
+                missing = [name for name in requested if name not in sheet_names]
+                if missing:
+                    return [types.TextContent(
+                        type="text",
+                        text=f"Error: Sheets not found: {', '.join(missing)}. Available sheets: {', '.join(sheet_names)}"
+                    )]
+                sheet_names = [name for name in sheet_names if name in requested]
+            
+            if mode == "stream":
+                return [types.TextContent(
+                    type="text",
+                    text=await self._stream_sheets(file_path, sheet_names, arguments)
+                )]
+            
+            if mode == "profile":
+                return [types.TextContent(
+                    type="text",
+                    text=await self._profile_sheets(file_path, sheet_names, arguments)
+                )]
+            
+            output_format = arguments.get("format", "json")
+            if output_format != "json":
+                return [types.TextContent(
+                    type="text",
+                    text=await self._format_sheets(file_path, sheet_names, arguments, output_format)
+                )]
+            
+            await report_progress(0, len(sheet_names))
             
             result = {
                 "file_name": os.path.basename(file_path),
@@ -55,29 +154,22 @@ class ExcelTool(BaseTool):
                 "sheets": {}
             }
             
-            # 解析每个sheet
-            for sheet_name in sheet_names:
-                df = pd.read_excel(excel_file, sheet_name=sheet_name)
-                
-                # 将DataFrame转换为字典
-                sheet_data = df.to_dict(orient='records')
-                
-                # 获取列名
-                columns = df.columns.tolist()
-                
-                # 获取行数和列数
-                row_count = len(df)
-                column_count = len(columns)
-                
-                result["sheets"][sheet_name] = {
-                    "row_count": row_count,
-                    "column_count": column_count,
-                    "columns": columns,
-                    "data": sheet_data
-                }
+            for index, sheet_name in enumerate(sheet_names):
+                sheet = await self.run_blocking(
+                    ExcelTool._read_sheet,
+                    file_path,
+                    sheet_name,
+                    arguments.get("columns"),
+                    arguments.get("offset", 0),
+                    arguments.get("max_rows"),
+                )
+                result["sheets"][sheet_name] = sheet
+                await report_progress(index + 1, len(sheet_names))
+                await emit_partial(json.dumps({sheet_name: sheet}, ensure_ascii=False, default=str))
             
             # 将结果转换为JSON字符串，并格式化输出
-            result_json = json.dumps(result, ensure_ascii=False, indent=2, default=str)
+            with phase("serialize"):
+                result_json = json.dumps(result, ensure_ascii=False, indent=2, default=str)
             
             return [types.TextContent(
                 type="text",
@@ -88,4 +180,411 @@ class ExcelTool(BaseTool):
             return [types.TextContent(
                 type="text",
                 text=f"Error: Failed to parse Excel file: {str(e)}"
-            )] 
\ No newline at end of file
+            )]
+    
+    async def _format_sheets(self, file_path: str, sheet_names: list, arguments: dict, output_format: str) -> str:
+        """使用pandas逐个读取sheet，并按指定格式输出"""
+        await report_progress(0, len(sheet_names))
+        
+        out = io.StringIO()
+        ExcelTool._open_document(out, os.path.basename(file_path), len(sheet_names), output_format)
+        for index, sheet_name in enumerate(sheet_names):
+            fragment = await self.run_blocking(
+                ExcelTool._format_sheet,
+                file_path,
+                sheet_name,
+                arguments.get("columns"),
+                arguments.get("offset", 0),
+                arguments.get("max_rows"),
+                output_format,
+            )
+            ExcelTool._open_sheet(out, index, sheet_name, output_format)
+            out.write(fragment)
+            await report_progress(index + 1, len(sheet_names))
+            await emit_partial(fragment)
+        ExcelTool._close_document(out, output_format)
+        return out.getvalue()
+    
+    async def _profile_sheets(self, file_path: str, sheet_names: list, arguments: dict) -> str:
+        """逐个统计所选sheet的各列概况，并拼接JSON结果"""
+        await report_progress(0, len(sheet_names))
+        
+        result = {
+            "file_name": os.path.basename(file_path),
+            "sheet_count": len(sheet_names),
+            "mode": "profile",
+            "sheets": {}
+        }
+        for index, sheet_name in enumerate(sheet_names):
+            profile = await self.run_blocking(
+                ExcelTool._profile_sheet,
+                file_path,
+                sheet_name,
+                arguments.get("columns"),
+                arguments.get("offset", 0),
+                arguments.get("max_rows"),
+                arguments.get("sample_rows", 5),
+                arguments.get("top_values", 5),
+            )
+            result["sheets"][sheet_name] = profile
+            await report_progress(index + 1, len(sheet_names))
+            await emit_partial(json.dumps({sheet_name: profile}, ensure_ascii=False, default=str))
+        
+        with phase("serialize"):
+            return json.dumps(result, ensure_ascii=False, default=str)
+    
+    async def _stream_sheets(self, file_path: str, sheet_names: list, arguments: dict) -> str:
+        """
+        流式读取所选sheet并拼接JSON结果
+        
+        所有sheet在同一次工作池调用中读取，工作簿（包括共享字符串表）只加载一次；
+        在线程池中执行时，每读完一个sheet通过线程安全的回调上报进度。
+        """
+        max_rows = arguments.get("max_rows") or env_int("MCP_EXCEL_STREAM_MAX_ROWS", 1000)
+        await report_progress(0, len(sheet_names))
+        on_sheet = threadsafe_progress() if self.get_worker_pool() == THREAD_POOL else None
+        
+        text = await self.run_blocking(
+            ExcelTool._stream_workbook,
+            file_path,
+            sheet_names,
+            arguments.get("columns"),
+            arguments.get("offset", 0),
+            max_rows,
+            arguments.get("format", "json"),
+            on_sheet,
+        )
+        await report_progress(len(sheet_names), len(sheet_names))
+        return text
+    
+    @staticmethod
+    def _list_sheets(file_path: str) -> list:
+        """
+        获取Excel文件中的所有sheet名称（同步执行，运行在工作池中）
+        
+        xlsx/xlsm直接读取xl/workbook.xml，避免加载共享字符串表和工作表数据。
+        """
+        with phase("open"):
+            if zipfile.is_zipfile(file_path):
+                with zipfile.ZipFile(file_path) as archive:
+                    root = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+                return [sheet.get("name") for sheet in root.iter() if sheet.tag.endswith("}sheet")]
+            with pd.ExcelFile(file_path) as excel_file:
+                return excel_file.sheet_names
+    
+    @staticmethod
+    def _read_sheet(file_path: str, sheet_name: str, columns: list | None = None, offset: int = 0, max_rows: int | None = None) -> dict:
+        """读取单个sheet的数据和结构信息（同步执行，运行在工作池中）"""
+        with phase("extract"):
+            df = pd.read_excel(
+                file_path,
+                sheet_name=sheet_name,
+                usecols=columns or None,
+                skiprows=range(1, offset + 1) if offset else None,
+                nrows=max_rows,
+            )
+        
+        # 将DataFrame转换为字典
+        with phase("serialize"):
+            sheet_data = df.to_dict(orient='records')
+        
+        # 获取列名
+        columns = df.columns.tolist()
+        
+        # 获取行数和列数
+        row_count = len(df)
+        column_count = len(columns)
+        
+        return {
+            "row_count": row_count,
+            "column_count": column_count,
+            "columns": columns,
+            "data": sheet_data
+        }
+    
+    @staticmethod
+    def _format_sheet(file_path: str, sheet_name: str, columns: list | None, offset: int, max_rows: int | None, output_format: str) -> str:
+        """使用pandas读取单个sheet，并按指定格式序列化（同步执行，运行在工作池中）"""
+        with phase("extract"):
+            df = pd.read_excel(
+                file_path,
+                sheet_name=sheet_name,
+                usecols=columns or None,
+                skiprows=range(1, offset + 1) if offset else None,
+                nrows=max_rows,
+            )
+        
+        with phase("serialize"):
+            # 空值统一转换为None，与流式读取的结果保持一致
+            df = df.astype(object).where(df.notna(), None)
+            
+            out = io.StringIO()
+            names = [str(name) for name in df.columns]
+            returned = ExcelTool._write_sheet(out, output_format, names, df.itertuples(index=False, name=None))
+            ExcelTool._close_sheet(out, output_format, {"offset": offset, "returned_rows": returned})
+            return out.getvalue()
+    
+    @staticmethod
+    def _profile_sheet(file_path: str, sheet_name: str, columns: list | None, offset: int, max_rows: int | None,
+                       sample_rows: int = 5, top_values: int = 5) -> dict:
+        """
+        统计单个sheet每一列的概况（同步执行，运行在工作池中）
+        
+        空值数、数值列的最小/最大/平均值和分位数、日期列的范围都是对整个DataFrame的向量化运算，
+        每列只做一次value_counts得到不同值个数和最常见的值。结果大小只与列数有关，与行数无关。
+        """
+        with phase("extract"):
+            df = pd.read_excel(
+                file_path,
+                sheet_name=sheet_name,
+                usecols=columns or None,
+                skiprows=range(1, offset + 1) if offset else None,
+                nrows=max_rows,
+            )
+        
+        with phase("profile"):
+            row_count = len(df)
+            nulls = df.isna().sum()
+            numeric = df.select_dtypes(include="number")
+            numeric_stats = numeric.agg(["min", "max", "mean", "std"]) if len(numeric.columns) else None
+            quantiles = numeric.quantile(list(PROFILE_QUANTILES)) if len(numeric.columns) else None
+            dates = df.select_dtypes(include="datetime")
+            date_min, date_max = dates.min(), dates.max()
+            
+            profiles = []
+            for position, name in enumerate(df.columns):
+                series = df.iloc[:, position]
+                counts = series.value_counts(dropna=True, sort=True)
+                null_count = int(nulls.iloc[position])
+                profile = {
+                    "name": str(name),
+                    "dtype": str(series.dtype),
+                    "nulls": null_count,
+                    "null_ratio": round(null_count / row_count, 4) if row_count else 0.0,
+                    "distinct": len(counts),
+                }
+                if name in numeric.columns:
+                    for stat in ("min", "max", "mean", "std"):
+                        profile[stat] = ExcelTool._profile_value(numeric_stats.at[stat, name])
+                    # agg的结果按列统一为浮点数，整数列的最小/最大值还原为整数
+                    if pd.api.types.is_integer_dtype(series.dtype) and profile["min"] is not None:
+                        profile["min"], profile["max"] = int(profile["min"]), int(profile["max"])
+                    profile["quantiles"] = {
+                        f"{q:g}": ExcelTool._profile_value(quantiles.at[q, name]) for q in PROFILE_QUANTILES
+                    }
+                elif name in dates.columns:
+                    profile["min"] = ExcelTool._profile_value(date_min[name])
+                    profile["max"] = ExcelTool._profile_value(date_max[name])
+                elif (series.dtype == object or pd.api.types.is_string_dtype(series.dtype)) and len(counts):
+                    # 文本列统计长度范围，对不同值计算即可
+                    lengths = counts.index.astype(str).str.len()
+                    profile["min_length"] = int(lengths.min())
+                    profile["max_length"] = int(lengths.max())
+                # 每个值都只出现一次（如编号列）时最常见的值没有意义，不输出
+                if top_values and len(counts) < row_count - null_count:
+                    profile["top"] = [
+                        {"value": ExcelTool._profile_value(value), "count": int(count)}
+                        for value, count in counts.head(top_values).items()
+                    ]
+                profiles.append(profile)
+            
+            sample = df.head(sample_rows)
+            sample = sample.astype(object).where(sample.notna(), None).to_dict(orient="records")
+        
+        return {
+            "row_count": row_count,
+            "column_count": len(df.columns),
+            "columns": profiles,
+            "sample": sample,
+        }
+    
+    @staticmethod
+    def _profile_value(value):
+        """将统计结果中的numpy/pandas标量转换为可序列化为JSON的值，空值转换为None"""
+        if value is None or pd.isna(value):
+            return None
+        if hasattr(value, "isoformat"):
+            return value.isoformat()
+        if hasattr(value, "item"):
+            value = value.item()
+        if isinstance(value, float):
+            # 平均值、分位数等保留12位有效数字，去掉浮点运算的尾差
+            return str(value) if math.isinf(value) else float(f"{value:.12g}")
+        return value
+    
+    @staticmethod
+    def _open_document(out: io.StringIO, file_name: str, sheet_count: int, output_format: str) -> None:
+        """写入文件级别的开头部分"""
+        if output_format in TEXT_FORMATS:
+            out.write(f"# {file_name}\n\nsheet_count: {sheet_count}\n")
+        else:
+            out.write('{"file_name": ')
+            out.write(json.dumps(file_name, ensure_ascii=False))
+            out.write(f', "sheet_count": {sheet_count}, "format": "{output_format}", "sheets": {{')
+    
+    @staticmethod
+    def _open_sheet(out: io.StringIO, index: int, sheet_name: str, output_format: str) -> None:
+        """写入sheet的标题或JSON键"""
+        if output_format in TEXT_FORMATS:
+            out.write(f"\n## {sheet_name}\n\n")
+        else:
+            out.write("," if index else "")
+            out.write(f"\n{json.dumps(sheet_name, ensure_ascii=False)}: ")
+    
+    @staticmethod
+    def _close_document(out: io.StringIO, output_format: str) -> None:
+        """写入文件级别的结尾部分"""
+        if output_format not in TEXT_FORMATS:
+            out.write("\n}}")
+    
+    @staticmethod
+    def _write_sheet(out: io.StringIO, output_format: str, names: list, rows) -> int:
+        """
+        将一个sheet的表头和数据行按指定格式增量写入out
+        
+        Args:
+            names: 列名列表
+            rows: 每行值序列的可迭代对象，只遍历一次
+        
+        Returns:
+            写入的数据行数
+        """
+        returned = 0
+        if output_format == "csv":
+            writer = csv.writer(out, lineterminator="\n")
+            writer.writerow(names)
+            for row in rows:
+                writer.writerow(["" if value is None else value for value in row])
+                returned += 1
+        elif output_format == "markdown":
+            if not names:
+                # 没有表头的空工作表无法组成markdown表格
+                out.write("（空工作表）\n")
+                return 0
+            out.write("| " + " | ".join(ExcelTool._markdown_cell(name) for name in names) + " |\n")
+            out.write("| " + " | ".join(["---"] * len(names)) + " |\n")
+            for row in rows:
+                out.write("| " + " | ".join(ExcelTool._markdown_cell(value) for value in row) + " |\n")
+                returned += 1
+        elif output_format == "columns":
+            # 列式输出需要先按列收集，内存占用与返回的行数成正比
+            values_by_column = [[] for _ in names]
+            for row in rows:
+                for values, value in zip(values_by_column, row):
+                    values.append(value)
+                returned += 1
+            out.write('{"columns": ')
+            out.write(json.dumps(names, ensure_ascii=False))
+            out.write(', "data": ')
+            out.write(json.dumps(dict(zip(names, values_by_column)), ensure_ascii=False, default=str))
+        else:
+            out.write('{"columns": ')
+            out.write(json.dumps(names, ensure_ascii=False))
+            out.write(', "data": [')
+            for row in rows:
+                out.write(",\n" if returned else "\n")
+                # rows格式只输出值数组，json格式每行输出一个对象
+                item = list(row) if output_format == "rows" else dict(zip(names, row))
+                out.write(json.dumps(item, ensure_ascii=False, default=str))
+                returned += 1
+            out.write("\n]")
+        return returned
+    
+    @staticmethod
+    def _close_sheet(out: io.StringIO, output_format: str, summary: dict) -> None:
+        """写入sheet的行数、偏移等汇总信息"""
+        if output_format in TEXT_FORMATS:
+            out.write("\n" + ", ".join(f"{key}: {value}" for key, value in summary.items()) + "\n")
+        else:
+            for key, value in summary.items():
+                out.write(f', "{key}": {value}')
+            out.write("}")
+    
+    @staticmethod
+    def _skip_sheet(out: io.StringIO, output_format: str, missing_columns: list) -> None:
+        """写入跳过sheet的说明（缺少指定的列）"""
+        note = f"（已跳过：缺少列 {', '.join(missing_columns)}）"
+        if output_format in TEXT_FORMATS:
+            out.write(note + "\n")
+        else:
+            out.write(json.dumps({"skipped": note, "missing_columns": missing_columns}, ensure_ascii=False, default=str))
+    
+    @staticmethod
+    def _markdown_cell(value) -> str:
+        """转义markdown表格单元格中的特殊字符"""
+        if value is None:
+            return ""
+        return str(value).replace("|", "\\|").replace("\n", " ")
+    
+    @staticmethod
+    def _stream_workbook(file_path: str, sheet_names: list, columns: list | None, offset: int, max_rows: int, output_format: str = "json", on_sheet=None) -> str:
+        """
+        使用openpyxl只读模式流式读取所选sheet，按指定格式增量拼接结果（同步执行，运行在工作池中）
+        """
+        with phase("open"):
+            workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            out = io.StringIO()
+            ExcelTool._open_document(out, os.path.basename(file_path), len(sheet_names), output_format)
+            for index, sheet_name in enumerate(sheet_names):
+                ExcelTool._open_sheet(out, index, sheet_name, output_format)
+                # 流式模式下读取和序列化交替进行，合并记为extract阶段
+                with phase("extract"):
+                    ExcelTool._stream_sheet(workbook[sheet_name], out, columns, offset, max_rows, output_format)
+                if on_sheet is not None:
+                    on_sheet(index + 1, len(sheet_names))
+            ExcelTool._close_document(out, output_format)
+            return out.getvalue()
+        finally:
+            workbook.close()
+    
+    @staticmethod
+    def _stream_sheet(worksheet, out: io.StringIO, columns: list | None, offset: int, max_rows: int, output_format: str = "json") -> None:
+        """
+        逐行读取单个sheet，并将结果增量写入out
+        
+        内存占用只与返回的行数有关，与工作表大小无关。
+        第一行作为表头；offset按数据行计数，全部为空的行不输出但计入偏移。
+        指定的列在该sheet中不存在时跳过该sheet，只输出说明，不影响其他sheet。
+        """
+        header = next(worksheet.iter_rows(max_row=1, values_only=True), ())
+        names = [
+            str(value) if value is not None else f"Unnamed: {i}"
+            for i, value in enumerate(header)
+        ]
+        
+        # 列投影
+        if columns:
+            missing = [name for name in columns if name not in names]
+            if missing:
+                ExcelTool._skip_sheet(out, output_format, missing)
+                return
+            indices = [names.index(name) for name in columns]
+        else:
+            indices = list(range(len(names)))
+        selected_names = [names[i] for i in indices]
+        
+        consumed = 0
+        has_more = False
+        
+        def iter_values():
+            nonlocal consumed, has_more
+            for row in worksheet.iter_rows(min_row=offset + 2, values_only=True):
+                if consumed >= max_rows:
+                    has_more = True
+                    return
+                consumed += 1
+                values = [row[i] if i < len(row) else None for i in indices]
+                if all(value is None for value in values):
+                    continue
+                yield values
+        
+        returned = ExcelTool._write_sheet(out, output_format, selected_names, iter_values())
+        
+        summary = {"offset": offset, "returned_rows": returned}
+        # 只读模式下的max_row来自工作表的dimension记录，可能缺失
+        if worksheet.max_row:
+            summary["row_count"] = max(worksheet.max_row - 1, 0)
+        if has_more:
+            summary["next_offset"] = offset + consumed
+        ExcelTool._close_sheet(out, output_format, summary)
@@ -2,14 +2,25 @@
 综合文件处理工具，根据文件类型自动选择合适的处理方式
 """
 
+import asyncio
+import glob
 import os
+import time
 import traceback
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 import mcp.types as types
 from . import BaseTool, ToolRegistry
 from .pdf_tool import PdfTool
 from .word_tool import WordTool
 from .excel_tool import ExcelTool
+from .utils.executor import THREAD_POOL, env_int
+from .utils.progress import emit_partial, progress_context, report_progress
+
+# 批量模式下会被处理的文件扩展名
+SUPPORTED_EXTENSIONS = ('.pdf', '.doc', '.docx', '.xls', '.xlsx', '.xlsm')
+
+# 仅用于批量模式的参数，不传递给各解析工具
+_BATCH_ARGUMENTS = ("file_path", "recursive", "concurrency", "max_files")
 
 @ToolRegistry.register
 class FileTool(BaseTool):
@@ -19,35 +30,54 @@ class FileTool(BaseTool):
     - PDF文件 (.pdf)
     - Word文档 (.doc, .docx)
     - Excel文件 (.xls, .xlsx, .xlsm)
+
+    file_path为目录或通配符（如'/data/**/*.pdf'）时进入批量模式：匹配的文件在有限的并发数下
+    同时解析，每完成一个文件即推送一次进度和该文件的结果，单个文件失败不影响其他文件，
+    最终结果按路径顺序排列，最后附带耗时和文件大小的汇总。
     """
-    
+
     name = "file"
-    description = "解析文件内容，支持PDF、Word和Excel格式"
+    description = "解析文件内容，支持PDF、Word和Excel格式；传入目录或通配符时批量解析所有匹配的文件"
     input_schema = {
         "type": "object",
         "required": ["file_path"],
         "properties": {
             "file_path": {
                 "type": "string",
-                "description": "文件的本地路径，例如'/path/to/document.pdf'",
+                "description": "文件的本地路径，例如'/path/to/document.pdf'；也可以是目录或通配符，例如'/path/to/docs'或'/path/to/**/*.xlsx'",
+            },
+            "recursive": {
+                "type": "boolean",
+                "description": "批量模式下是否包含子目录中的文件（通配符中的'**'也受此参数控制）",
+                "default": True
+            },
+            "concurrency": {
+                "type": "integer",
+                "description": "批量模式下同时解析的文件数（默认MCP_FILE_BATCH_CONCURRENCY）",
+                "minimum": 1
+            },
+            "max_files": {
+                "type": "integer",
+                "description": "批量模式下最多处理的文件数（默认MCP_FILE_BATCH_MAX_FILES）",
+                "minimum": 1
             }
         },
     }
-    
+
     def __init__(self):
         """初始化各种文件处理工具"""
         super().__init__()
         self.pdf_tool = PdfTool()
         self.word_tool = WordTool()
         self.excel_tool = ExcelTool()
-    
+
     async def execute(self, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
         """
         解析文件内容
-        
+
         Args:
             arguments: 参数字典，必须包含'file_path'键
-        
+
         Returns:
             解析结果列表
         """
@@ -56,36 +86,164 @@ class FileTool(BaseTool):
                 type="text",
                 text="错误: 缺少必要参数 'file_path'"
             )]
-        
+
         file_path = arguments["file_path"]
         # 处理文件路径，支持挂载目录的转换
         file_path = self.process_file_path(file_path)
-        
+
+        # 已存在的文件名中也可能包含[、*等字符，只有路径不存在时才按通配符处理
+        if os.path.isdir(file_path) or (not os.path.exists(file_path) and self._is_pattern(file_path)):
+            return await self._execute_batch(file_path, arguments)
+
         if not os.path.exists(file_path):
             return [types.TextContent(
                 type="text",
                 text=f"错误: 文件不存在: {file_path}"
             )]
-        
+
         # 获取文件扩展名（转换为小写）
         file_ext = os.path.splitext(file_path)[1].lower()
-        
+
         try:
-            # 根据文件扩展名选择处理工具
-            if file_ext == '.pdf':
-                return await self.pdf_tool.execute(arguments)
-            elif file_ext in ['.doc', '.docx']:
-                return await self.word_tool.execute(arguments)
-            elif file_ext in ['.xls', '.xlsx', '.xlsm']:
-                return await self.excel_tool.execute(arguments)
-            else:
+            tool = self._tool_for(file_ext)
+            if tool is None:
                 return [types.TextContent(
                     type="text",
                     text=f"错误: 不支持的文件类型: {file_ext}"
                 )]
+            # 通过run调用以共享各工具的结果缓存
+            return await tool.run(arguments)
         except Exception as e:
             error_details = traceback.format_exc()
             return [types.TextContent(
                 type="text",
                 text=f"错误: 处理文件时发生错误: {str(e)}\n{error_details}"
-            )] 
\ No newline at end of file
+            )]
+
+    def _tool_for(self, file_ext: str) -> BaseTool | None:
+        """根据文件扩展名选择处理工具"""
+        if file_ext == '.pdf':
+            return self.pdf_tool
+        elif file_ext in ['.doc', '.docx']:
+            return self.word_tool
+        elif file_ext in ['.xls', '.xlsx', '.xlsm']:
+            return self.excel_tool
+        return None
+
+    @staticmethod
+    def _is_pattern(path: str) -> bool:
+        return any(char in path for char in "*?[")
+
+    @staticmethod
+    def _collect_files(path: str, recursive: bool, max_files: int) -> Tuple[List[str], int]:
+        """
+        列出目录或通配符匹配的受支持文件
+
+        Returns:
+            (按路径排序的文件列表, 匹配到的文件总数)
+        """
+        if os.path.isdir(path):
+            if recursive:
+                candidates = (
+                    os.path.join(root, name)
+                    for root, dirs, names in os.walk(path)
+                    for name in names
+                )
+            else:
+                candidates = (entry.path for entry in os.scandir(path))
+        else:
+            candidates = glob.iglob(path, recursive=recursive)
+
+        files = sorted(
+            candidate for candidate in candidates
+            if candidate.lower().endswith(SUPPORTED_EXTENSIONS)
+            and not os.path.basename(candidate).startswith(("~$", "."))
+            and os.path.isfile(candidate)
+        )
+        return files[:max_files], len(files)
+
+    async def _execute_batch(self, path: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+        """批量解析目录或通配符匹配的所有文件"""
+        recursive = bool(arguments.get("recursive", True))
+        max_files = arguments.get("max_files") or env_int("MCP_FILE_BATCH_MAX_FILES", 1000)
+        limit = asyncio.Semaphore(arguments.get("concurrency") or env_int("MCP_FILE_BATCH_CONCURRENCY", 4))
+        tool_arguments = {key: value for key, value in arguments.items() if key not in _BATCH_ARGUMENTS}
+
+        files, matched = await self.run_blocking(self._collect_files, path, recursive, max_files, pool=THREAD_POOL)
+        if not files:
+            return [types.TextContent(
+                type="text",
+                text=f"错误: 没有找到支持的文件: {path}"
+            )]
+
+        # 目录模式下显示相对路径，通配符模式下显示完整路径
+        base_dir = path if os.path.isdir(path) else None
+        results: List[List[types.TextContent | types.ImageContent | types.EmbeddedResource] | None] = [None] * len(files)
+        finished = 0
+        ok_count = 0
+        total_size = 0
+        output_chars = 0
+        start = time.monotonic()
+        await report_progress(0, len(files))
+
+        async def parse_one(index: int, file_path: str) -> None:
+            nonlocal finished, ok_count, total_size, output_chars
+            display_path = os.path.relpath(file_path, base_dir) if base_dir else file_path
+            header = f"## [{index + 1}] {display_path}\n\n"
+            meta: Dict[str, Any] = {"file_path": file_path, "index": index}
+            async with limit:
+                file_start = time.monotonic()
+                try:
+                    meta["size"] = os.path.getsize(file_path)
+                    tool = self._tool_for(os.path.splitext(file_path)[1].lower())
+                    # 各解析工具自身的进度和部分结果会与批量进度混在一起，这里屏蔽掉
+                    with progress_context(None):
+                        contents = await tool.run(dict(tool_arguments, file_path=file_path))
+                    if self.is_error_result(contents):
+                        raise RuntimeError("\n".join(
+                            item.text for item in contents if isinstance(item, types.TextContent)
+                        ))
+                except Exception as e:
+                    # 去掉"错误: "/"Error: "前缀，单个文件失败不应使整个结果被视为错误
+                    message = str(e).removeprefix("错误: ").removeprefix("Error: ").strip() or type(e).__name__
+                    meta["status"] = "error"
+                    contents = [types.TextContent(type="text", text=f"解析失败: {message}")]
+                else:
+                    meta["status"] = "ok"
+                    ok_count += 1
+                meta["seconds"] = round(time.monotonic() - file_start, 3)
+
+            total_size += meta.get("size", 0)
+            texts = [item.text for item in contents if isinstance(item, types.TextContent)]
+            output_chars += sum(len(text) for text in texts)
+            results[index] = [types.TextContent(type="text", text=header.rstrip(), _meta=meta)] + list(contents)
+            finished += 1
+            await report_progress(finished, len(files))
+            await emit_partial(header + "\n\n".join(texts))
+
+        await asyncio.gather(*(parse_one(index, file_path) for index, file_path in enumerate(files)))
+
+        elapsed = time.monotonic() - start
+        summary = (
+            f"# 批量解析汇总\n\n共{len(files)}个文件，成功{ok_count}个，失败{len(files) - ok_count}个，"
+            f"文件总大小{total_size / 1024 / 1024:.2f}MB，输出{output_chars}个字符，耗时{elapsed:.2f}秒"
+        )
+        if matched > len(files):
+            summary += f"\n\n共匹配到{matched}个文件，只处理了前{len(files)}个，可通过max_files参数调整"
+
+        contents: List[types.TextContent | types.ImageContent | types.EmbeddedResource] = []
+        for file_contents in results:
+            contents.extend(file_contents)
+        contents.append(types.TextContent(
+            type="text",
+            text=summary,
+            _meta={
+                "files": len(files),
+                "matched": matched,
+                "succeeded": ok_count,
+                "failed": len(files) - ok_count,
+                "total_bytes": total_size,
+                "seconds": round(elapsed, 3),
+            }
+        ))
+        return contents
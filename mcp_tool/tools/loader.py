@@ -21,8 +21,8 @@ def load_tools() -> List[Type[BaseTool]]:
     
     # 获取所有子模块
     for _, name, is_pkg in pkgutil.iter_modules([package_path]):
-        # 跳过__init__.py和loader.py
-        if name in ['__init__', 'loader']:
+        # 跳过__init__.py、loader.py和共享的utils包
+        if name in ['__init__', 'loader', 'utils']:
             continue
         
         # 导入模块
@@ -8,9 +8,11 @@ import os
 import traceback
 import mcp.types as types
 from . import BaseTool, ToolRegistry
+from .utils.http_client import get_http_client
+from .utils.progress import emit_partial, report_progress
 import logging
-import asyncio
 import socket
+import time
 
 # 设置日志
 logging.basicConfig(level=logging.DEBUG)
@@ -25,6 +27,8 @@ class MaxKbTool(BaseTool):
     """MaxKB API请求工具"""
     name = "maxkb"
     description = "请求MaxKB API并返回处理后的结果"
+    # 流式响应的部分结果至少间隔多少秒推送一次
+    PARTIAL_INTERVAL = 0.05
     input_schema = {
         "type": "object",
         "required": ["message"],
@@ -72,10 +76,6 @@ class MaxKbTool(BaseTool):
     async def execute(self, arguments: dict) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
         """执行API请求并处理返回结果"""
         try:
-            # 等待服务器初始化完成
-            logger.debug("等待服务器初始化...")
-            await asyncio.sleep(2)
-            
             logger.debug(f"收到请求参数: {arguments}")
             
             if "message" not in arguments:
@@ -101,13 +101,9 @@ class MaxKbTool(BaseTool):
             }
             
             logger.debug(f"准备发送请求到: {url}")
-            logger.debug(f"请求头: {headers}")
-            logger.debug(f"请求数据: {data}")
             
             try:
-                # 发送请求
-                logger.debug("开始创建HTTP客户端，超时设置为60秒...")
-                limits = httpx.Limits(max_keepalive_connections=5, max_connections=10, keepalive_expiry=60.0)
+                # MaxKB使用独立的共享客户端（关闭证书校验、连接失败重试一次），多次调用复用连接
                 timeout = httpx.Timeout(
                     timeout=60.0,
                     connect=60.0,
@@ -115,103 +111,60 @@ class MaxKbTool(BaseTool):
                     write=60.0,
                     pool=60.0
                 )
-                async with httpx.AsyncClient(
+                client = get_http_client(
+                    "maxkb",
+                    verify=False,
+                    retries=1,
                     timeout=timeout,
-                    limits=limits,
-                    transport=httpx.AsyncHTTPTransport(
-                        retries=1,
-                        verify=False,
-                        http1=True,
-                        http2=False,
-                        socket_options=[(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
-                    )
-                ) as client:
-                    logger.debug("开始发送POST请求...")
-                    try:
-                        response = await client.post(url, headers=headers, json=data)
+                    socket_options=[(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+                )
+                try:
+                    # 以流的方式读取响应，边接收边解析并转发给客户端
+                    async with client.stream("POST", url, headers=headers, json=data) as response:
                         logger.debug(f"收到响应状态码: {response.status_code}")
-                        logger.debug(f"响应头: {response.headers}")
-                        
-                        # 处理响应内容
-                        content_parts = []
-                        last_content = ""
-                        received_data = []
-                        
-                        async for line in response.aiter_lines():
-                            logger.debug(f"收到行: {line}")
-                            if line.startswith('data: '):
-                                try:
-                                    # 解析JSON数据
-                                    data = json.loads(line[6:])  # 去掉'data: '前缀
-                                    logger.debug(f"解析到的数据: {data}")
-                                    received_data.append(data)
-                                    
-                                    # 检查是否有非空的content
-                                    if isinstance(data, dict):
-                                        current_content = data.get("content", "")
-                                        if current_content and current_content != last_content:
-                                            last_content = current_content
-                                            content_parts.append(current_content)
-                                            logger.debug(f"添加新内容: {current_content}")
-                                        
-                                        # 检查reasoning_content
-                                        reasoning_content = data.get("reasoning_content", "")
-                                        if reasoning_content and reasoning_content != last_content:
-                                            last_content = reasoning_content
-                                            content_parts.append(reasoning_content)
-                                            logger.debug(f"添加推理内容: {reasoning_content}")
-                                            
-                                except json.JSONDecodeError as e:
-                                    logger.error(f"JSON解析错误: {e}, 行内容: {line}")
-                                    continue  # 忽略无法解析的行
-                        
-                        # 拼接所有内容
-                        result = ''.join(content_parts) if content_parts else ""
-                        logger.debug(f"最终结果: {result}")
-                        
-                        if not result:
-                            logger.warning("未获取到有效内容")
-                            error_details = f"收到 {len(received_data)} 条数据"
-                            if received_data:
-                                error_details += "\n最后一条数据:\n" + json.dumps(received_data[-1], ensure_ascii=False, indent=2)
-                            return [types.TextContent(
-                                type="text",
-                                text=f"请求错误: {error_details}"
-                            )]
-                        
-                        return [types.TextContent(
-                            type="text",
-                            text=result
-                        )]
-                        
-                    except httpx.TimeoutException as e:
-                        logger.error(f"请求超时: {str(e)}")
-                        logger.error(f"超时配置: {client.timeout}")
-                        return [types.TextContent(
-                            type="text",
-                            text=f"请求超时(60秒): {str(e)}"
-                        )]
-                    except httpx.ConnectError as e:
-                        logger.error(f"连接错误: {str(e)}")
-                        logger.error(f"目标URL: {url}")
-                        return [types.TextContent(
-                            type="text",
-                            text=f"连接错误({url}): {str(e)}"
-                        )]
-                    
-                    try:
-                        response.raise_for_status()
-                    except httpx.HTTPStatusError as e:
-                        logger.error(f"HTTP状态错误: {str(e)}")
-                        logger.error(f"响应状态码: {e.response.status_code}")
-                        logger.error(f"响应内容: {e.response.text}")
-                        return [types.TextContent(
-                            type="text",
-                            text=f"HTTP状态错误: {str(e)}"
-                        )]
+                        if response.is_error:
+                            await response.aread()
+                            response.raise_for_status()
+                        result, event_count, last_event = await self._read_events(response)
+                except httpx.TimeoutException as e:
+                    logger.error(f"请求超时: {str(e)}")
+                    return [types.TextContent(
+                        type="text",
+                        text=f"请求超时(60秒): {str(e)}"
+                    )]
+                except httpx.ConnectError as e:
+                    logger.error(f"连接错误: {str(e)}")
+                    logger.error(f"目标URL: {url}")
+                    return [types.TextContent(
+                        type="text",
+                        text=f"连接错误({url}): {str(e)}"
+                    )]
+                except httpx.HTTPStatusError as e:
+                    logger.error(f"HTTP状态错误: {str(e)}")
+                    logger.error(f"响应内容: {e.response.text}")
+                    return [types.TextContent(
+                        type="text",
+                        text=f"HTTP状态错误: {str(e)}"
+                    )]
+                
+                logger.debug(f"共收到 {event_count} 条数据，结果长度: {len(result)}")
+                if not result:
+                    logger.warning("未获取到有效内容")
+                    error_details = f"收到 {event_count} 条数据"
+                    if last_event is not None:
+                        error_details += "\n最后一条数据:\n" + json.dumps(last_event, ensure_ascii=False, indent=2)
+                    return [types.TextContent(
+                        type="text",
+                        text=f"请求错误: {error_details}"
+                    )]
+                
+                return [types.TextContent(
+                    type="text",
+                    text=result
+                )]
                         
             except httpx.HTTPError as e:
-                error_msg = f"HTTP请求错误: {str(e)}\n状态码: {getattr(e.response, 'status_code', 'N/A')}\n响应内容: {getattr(e.response, 'text', 'N/A')}"
+                error_msg = f"HTTP请求错误: {str(e)}"
                 logger.error(error_msg)
                 return [types.TextContent(
                     type="text",
@@ -231,4 +184,65 @@ class MaxKbTool(BaseTool):
             return [types.TextContent(
                 type="text",
                 text=error_msg
-            )] 
\ No newline at end of file
+            )]
+    
+    async def _read_events(self, response: httpx.Response) -> tuple[str, int, dict | None]:
+        """
+        增量解析MaxKB的响应
+        
+        流式响应为SSE格式，每个"data: "事件中的content/reasoning_content是新增的片段。
+        只保留拼接中的结果和最后一条事件（用于错误提示），每收到一段内容就上报进度并推送部分结果；
+        部分结果按PARTIAL_INTERVAL合并发送，避免逐字推送。非流式响应为普通JSON，直接取data.content。
+        
+        Returns:
+            (拼接后的结果, 收到的事件数, 最后一条事件)
+        """
+        content_type = response.headers.get("content-type", "")
+        if "text/event-stream" not in content_type and "application/json" in content_type:
+            body = json.loads(await response.aread())
+            payload = body.get("data") if isinstance(body, dict) else None
+            content = payload.get("content", "") if isinstance(payload, dict) else ""
+            await emit_partial(content)
+            return content or "", 1, body
+        
+        content_parts = []
+        content_length = 0
+        last_content = ""
+        event_count = 0
+        last_event = None
+        pending = []
+        # 第一段内容立即推送
+        last_flush = 0.0
+        
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            try:
+                event = json.loads(line[5:].strip())
+            except json.JSONDecodeError as e:
+                logger.error(f"JSON解析错误: {e}, 行内容: {line}")
+                continue  # 忽略无法解析的行
+            event_count += 1
+            last_event = event
+            if not isinstance(event, dict):
+                continue
+            
+            for key in ("content", "reasoning_content"):
+                chunk = event.get(key) or ""
+                if chunk and chunk != last_content:
+                    last_content = chunk
+                    content_parts.append(chunk)
+                    content_length += len(chunk)
+                    pending.append(chunk)
+            
+            if pending:
+                await report_progress(content_length)
+                now = time.monotonic()
+                if now - last_flush >= self.PARTIAL_INTERVAL:
+                    await emit_partial("".join(pending))
+                    pending.clear()
+                    last_flush = now
+        
+        if pending:
+            await emit_partial("".join(pending))
+        return "".join(content_parts), event_count, last_event
@@ -2,22 +2,30 @@
 PDF解析工具，用于解析PDF文件内容，支持快速预览和完整解析两种模式
 """
 
+import asyncio
 import os
 import tempfile
 import shutil
-import fitz  # PyMuPDF
-import PyPDF2
-import pymupdf4llm
 import traceback
-from typing import Dict, List, Any
+import json
+from typing import Dict, List, Any, Optional, Tuple
 import mcp.types as types
 from . import BaseTool, ToolRegistry
-from PIL import Image
-import io
-import pytesseract
+from .utils.cache import mark_uncacheable
+from .utils.executor import PROCESS_POOL, THREAD_POOL, env_float, env_int, pool_workers
+from .utils.lazy import lazy_import
+from .utils.metrics import phase
+from .utils.ocr import (
+    DEFAULT_OCR_LANG, SKIP_LOW_ENTROPY, SKIP_SMALL, image_skip_reason, ocr_image, ocr_images, validate_ocr_lang
+)
+from .utils.progress import emit_partial, report_progress
 import base64
+import binascii
 import imghdr
 
+fitz = lazy_import("fitz")  # PyMuPDF
+pymupdf4llm = lazy_import("pymupdf4llm")
+
 @ToolRegistry.register
 class PdfTool(BaseTool):
     """
@@ -28,6 +36,7 @@ class PdfTool(BaseTool):
     
     name = "pdf"
     description = "解析PDF文件内容，支持快速预览和完整解析两种模式"
+    cacheable = True
     input_schema = {
         "type": "object",
         "required": ["file_path"],
@@ -41,6 +50,45 @@ class PdfTool(BaseTool):
                 "description": "解析模式：'quick'（仅文本）或'full'（文本和图片），默认为'full'",
                 "enum": ["quick", "full"],
                 "default": "full"
+            },
+            "format": {
+                "type": "string",
+                "description": "快速预览模式的文本格式：'text'（纯文本）或'markdown'（通过pymupdf4llm保留标题、列表和表格结构，速度较慢）",
+                "enum": ["text", "markdown"],
+                "default": "text"
+            },
+            "ocr_concurrency": {
+                "type": "integer",
+                "description": "完整解析模式下同时进行OCR识别的图片数上限，默认由MCP_OCR_CONCURRENCY环境变量决定",
+                "minimum": 1
+            },
+            "ocr_lang": {
+                "type": "string",
+                "description": "完整解析模式下的OCR语言，tesseract语言代码，多个语言用'+'连接，例如'eng'、'chi_sim+eng'、'jpn'",
+                "default": DEFAULT_OCR_LANG
+            },
+            "ocr_planner": {
+                "type": "boolean",
+                "description": "完整解析模式下是否按需识别：跳过过小或内容单一的图片，扫描页整页渲染后识别一次；为false时识别所有图片",
+                "default": True
+            },
+            "pages": {
+                "type": "string",
+                "description": "要解析的页码范围（从1开始），例如'1-5,8,10-'，默认解析全部页面",
+            },
+            "max_pages": {
+                "type": "integer",
+                "description": "单次返回的最大页数，超出部分通过cursor继续获取",
+                "minimum": 1
+            },
+            "max_chars": {
+                "type": "integer",
+                "description": "单次返回的最大文本字符数（至少返回一页），超出部分通过cursor继续获取",
+                "minimum": 1
+            },
+            "cursor": {
+                "type": "string",
+                "description": "上一次调用返回的续取游标，传入后从上次结束的位置继续解析",
             }
         },
     }
@@ -78,40 +126,340 @@ class PdfTool(BaseTool):
             )]
         
         mode = arguments.get("mode", "full")
+        ocr_lang = arguments.get("ocr_lang") or DEFAULT_OCR_LANG
+        
+        # 解析页码范围和续取游标，游标优先于pages参数
+        try:
+            if arguments.get("cursor"):
+                page_spec, start = self._decode_cursor(arguments["cursor"], file_path)
+            else:
+                page_spec, start = arguments.get("pages"), 0
+            selection = {
+                "ranges": self._parse_page_ranges(page_spec),
+                "page_spec": page_spec,
+                "start": start,
+                "max_pages": arguments.get("max_pages"),
+                "max_chars": arguments.get("max_chars"),
+                "plan_ocr": arguments.get("ocr_planner", True),
+            }
+            validate_ocr_lang(ocr_lang)
+        except ValueError as e:
+            return [types.TextContent(
+                type="text",
+                text=f"错误: {str(e)}"
+            )]
+        
+        if page_spec:
+            try:
+                page_count, selected = await self.run_blocking(
+                    PdfTool._count_selected, file_path, selection["ranges"], pool=THREAD_POOL
+                )
+            except Exception as e:
+                return [types.TextContent(
+                    type="text",
+                    text=f"错误: 无法打开PDF文件: {str(e)}"
+                )]
+            if not selected:
+                return [types.TextContent(
+                    type="text",
+                    text=f"错误: 页码超出范围: {page_spec}，文档共{page_count}页"
+                )]
+            selection["selected"] = selected
         
         if mode == "quick":
-            return await self._quick_preview_pdf(file_path)
+            return await self._quick_preview_pdf(file_path, selection, arguments.get("format", "text"))
         else:
-            return await self._full_parse_pdf(file_path)
+            return await self._full_parse_pdf(file_path, arguments.get("ocr_concurrency"), selection, ocr_lang)
+    
+    @staticmethod
+    def _parse_page_ranges(page_spec: Optional[str]) -> List[Tuple[int, Optional[int]]]:
+        """
+        解析页码范围字符串，例如'1-5,8,10-'
+        
+        Returns:
+            从0开始的 (起始页, 结束页) 列表，结束页为None表示直到最后一页；未指定时返回全部页面
+        """
+        if not page_spec or not str(page_spec).strip():
+            return [(0, None)]
+        
+        ranges = []
+        for part in str(page_spec).replace(" ", "").split(","):
+            if not part:
+                continue
+            try:
+                if "-" in part:
+                    first, _, last = part.partition("-")
+                    first_page = int(first) if first else 1
+                    last_page = int(last) if last else None
+                else:
+                    first_page = last_page = int(part)
+            except ValueError:
+                raise ValueError(f"无效的页码范围: {page_spec}")
+            if first_page < 1 or (last_page is not None and last_page < first_page):
+                raise ValueError(f"无效的页码范围: {page_spec}")
+            ranges.append((first_page - 1, None if last_page is None else last_page - 1))
+        
+        if not ranges:
+            raise ValueError(f"无效的页码范围: {page_spec}")
+        return ranges
+    
+    @staticmethod
+    def _select_pages(ranges: List[Tuple[int, Optional[int]]], page_count: int) -> List[int]:
+        """根据页码范围和文档页数，计算需要解析的页码列表（去重并保持顺序）"""
+        selected = []
+        seen = set()
+        for first, last in ranges:
+            last = page_count - 1 if last is None else min(last, page_count - 1)
+            for page_num in range(first, last + 1):
+                if page_num not in seen:
+                    seen.add(page_num)
+                    selected.append(page_num)
+        return selected
+    
+    @staticmethod
+    def _iter_budgeted_pages(doc: Any, selection: Dict[str, Any], extract: Any) -> Dict[str, Any]:
+        """
+        按页码范围和输出预算遍历页面，只加载需要的页面
+        
+        Args:
+            doc: 已打开的fitz文档
+            selection: 页码范围、起始位置和预算
+            extract: 对单页提取内容的函数，返回包含'text'键的字典
+        
+        Returns:
+            {"page_count", "selected", "start", "pages", "next"}，next为下一次调用的起始位置，
+            所有页面都已返回时为None
+        """
+        selected = PdfTool._select_pages(selection["ranges"], doc.page_count)
+        start = selection.get("start", 0)
+        max_pages = selection.get("max_pages")
+        max_chars = selection.get("max_chars")
+        # 是否至少返回一页（分批提取时，只有第一批需要保证）
+        require_page = selection.get("require_page", True)
+        
+        pages = []
+        chars = 0
+        next_index = None
+        stop_reason = None
+        for index in range(start, len(selected)):
+            if max_pages is not None and len(pages) >= max_pages:
+                next_index = index
+                stop_reason = "pages"
+                break
+            page_num = selected[index]
+            content = extract(doc, page_num)
+            # 超出字符预算的页面留给下一次调用
+            if max_chars is not None and (pages or not require_page) and chars + len(content["text"]) > max_chars:
+                next_index = index
+                stop_reason = "chars"
+                break
+            chars += len(content["text"])
+            content["page_num"] = page_num
+            pages.append(content)
+        
+        return {
+            "page_count": doc.page_count,
+            "selected": len(selected),
+            "start": start,
+            "pages": pages,
+            "next": next_index,
+            "stop_reason": stop_reason,
+        }
     
-    async def _quick_preview_pdf(self, file_path: str) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+    async def _extract_in_batches(self, worker: Any, file_path: str, selection: Dict[str, Any], format_batch: Any) -> Dict[str, Any]:
+        """
+        分批调用worker提取页面，每批完成后上报进度并推送已提取的内容
+        
+        每批最多MCP_PDF_BATCH_PAGES页（默认16），大文档也能尽早得到反馈。
+        返回值与_iter_budgeted_pages相同，覆盖所有批次。
+        """
+        batch_pages = env_int("MCP_PDF_BATCH_PAGES", 16)
+        max_pages = selection.get("max_pages")
+        max_chars = selection.get("max_chars")
+        start = selection.get("start", 0)
+        
+        pages: List[Dict[str, Any]] = []
+        chars = 0
+        while True:
+            limit = batch_pages if max_pages is None else min(batch_pages, max_pages - len(pages))
+            batch = dict(
+                selection,
+                start=start,
+                max_pages=limit,
+                max_chars=None if max_chars is None else max_chars - chars,
+                require_page=not pages,
+            )
+            result = await self.run_blocking(worker, file_path, batch)
+            pages.extend(result["pages"])
+            chars += sum(len(page["text"]) for page in result["pages"])
+            
+            total = result["selected"] - selection.get("start", 0)
+            if max_pages is not None:
+                total = min(total, max_pages)
+            await report_progress(len(pages), total)
+            await emit_partial(format_batch(result["pages"]))
+            
+            start = result["next"]
+            if start is None or result["stop_reason"] == "chars":
+                break
+            if max_pages is not None and len(pages) >= max_pages:
+                break
+        
+        return dict(result, start=selection.get("start", 0), pages=pages, next=start)
+    
+    async def _extract_sharded(self, worker: Any, file_path: str, selection: Dict[str, Any], format_batch: Any) -> Dict[str, Any]:
+        """
+        将所选页面按MCP_PDF_SHARD_PAGES页（默认同MCP_PDF_BATCH_PAGES）切分为分片，
+        分发到进程池中并行提取，再按页码顺序合并
+
+        fitz文档对象不能在进程间共享，每个分片在各自的工作进程中单独打开文档。分片以
+        "窗口"为单位提交，每个窗口包含与工作进程数相同的分片，窗口完成后按顺序应用页数和
+        字符预算，并上报进度、推送内容；超出预算时停止提交后续窗口，最多多提取一个窗口的页面。
+        返回值与_iter_budgeted_pages相同。
+        """
+        shard_pages = env_int("MCP_PDF_SHARD_PAGES", env_int("MCP_PDF_BATCH_PAGES", 16))
+        window_shards = pool_workers(PROCESS_POOL)
+        max_pages = selection.get("max_pages")
+        max_chars = selection.get("max_chars")
+        start = selection.get("start", 0)
+        
+        page_count, selected = await self.run_blocking(
+            PdfTool._count_selected, file_path, selection["ranges"], pool=THREAD_POOL
+        )
+        end = selected if max_pages is None else min(selected, start + max_pages)
+        
+        pages: List[Dict[str, Any]] = []
+        chars = 0
+        index = start
+        next_index = None
+        stop_reason = None
+        while index < end:
+            window_end = min(end, index + shard_pages * window_shards)
+            with phase("extract"):
+                shards = await asyncio.gather(*(
+                    self.run_blocking(
+                        worker,
+                        file_path,
+                        dict(selection, start=shard_start, max_pages=min(shard_pages, window_end - shard_start), max_chars=None),
+                        pool=PROCESS_POOL,
+                    )
+                    for shard_start in range(index, window_end, shard_pages)
+                ))
+            
+            accepted = []
+            for page in (page for shard in shards for page in shard["pages"]):
+                # 超出字符预算的页面留给下一次调用（至少返回一页）
+                if max_chars is not None and pages and chars + len(page["text"]) > max_chars:
+                    next_index = index
+                    stop_reason = "chars"
+                    break
+                chars += len(page["text"])
+                pages.append(page)
+                accepted.append(page)
+                index += 1
+            
+            await report_progress(index - start, end - start)
+            await emit_partial(format_batch(accepted))
+            if next_index is not None:
+                break
+        
+        if next_index is None and end < selected:
+            next_index = end
+            stop_reason = "pages"
+        return {
+            "page_count": page_count,
+            "selected": selected,
+            "start": start,
+            "pages": pages,
+            "next": next_index,
+            "stop_reason": stop_reason,
+        }
+    
+    @staticmethod
+    def _count_selected(file_path: str, ranges: List[Tuple[int, Optional[int]]]) -> Tuple[int, int]:
+        """返回文档总页数和所选页面数"""
+        with phase("open"):
+            doc = fitz.open(file_path)
+        try:
+            return doc.page_count, len(PdfTool._select_pages(ranges, doc.page_count))
+        finally:
+            doc.close()
+    
+    @staticmethod
+    def _encode_cursor(page_spec: Optional[str], next_index: int, file_path: str) -> str:
+        """生成续取游标，记录页码范围、下一次的起始位置和文件指纹"""
+        stat = os.stat(file_path)
+        payload = {"p": page_spec, "i": next_index, "s": stat.st_size, "m": stat.st_mtime_ns}
+        raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+    
+    @staticmethod
+    def _decode_cursor(cursor: str, file_path: str) -> Tuple[Optional[str], int]:
+        """解析续取游标，文件在两次调用之间发生变化时报错"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            payload = json.loads(raw)
+            page_spec, next_index = payload["p"], int(payload["i"])
+            size, mtime = payload["s"], payload["m"]
+        except (binascii.Error, ValueError, KeyError, TypeError):
+            raise ValueError(f"无效的续取游标: {cursor}")
+        
+        stat = os.stat(file_path)
+        if stat.st_size != size or stat.st_mtime_ns != mtime:
+            raise ValueError("文件在两次调用之间已被修改，请不带cursor参数重新解析")
+        return page_spec, next_index
+    
+    def _describe_window(self, file_path: str, selection: Dict[str, Any], extracted: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        生成分页信息
+        
+        Returns:
+            (页码范围说明, 续取提示)，未分页时均为空字符串
+        """
+        pages = extracted["pages"]
+        windowed = selection.get("page_spec") or extracted["start"] or extracted["next"] is not None
+        header = ""
+        if windowed and pages:
+            header = f"\n本次返回: 第{pages[0]['page_num'] + 1}页 - 第{pages[-1]['page_num'] + 1}页（共{len(pages)}页）"
+        
+        footer = ""
+        if extracted["next"] is not None:
+            remaining = extracted["selected"] - extracted["next"]
+            cursor = self._encode_cursor(selection.get("page_spec"), extracted["next"], file_path)
+            footer = f"还有{remaining}页未返回，请使用参数 cursor=\"{cursor}\" 继续获取"
+        return header, footer
+    
+    async def _quick_preview_pdf(self, file_path: str, selection: Optional[Dict[str, Any]] = None, output_format: str = "text") -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
         """
         快速预览PDF文件，仅提取文本内容
+        
+        工具配置为使用进程池（MCP_PDF_POOL=process）、进程池有多个工作进程且本次要提取的页数
+        超过一个分片时，按页码分片并行提取；否则分批在工作池中依次提取，避免为小文档启动进程池。
         """
+        selection = selection or {"ranges": self._parse_page_ranges(None)}
+        worker = PdfTool._extract_markdown if output_format == "markdown" else PdfTool._extract_text
         try:
-            # 使用PyMuPDF提取文本
-            doc = fitz.open(file_path)
+            if self._should_shard(await self._pending_pages(file_path, selection)):
+                extracted = await self._extract_sharded(worker, file_path, selection, self._format_page_texts)
+            else:
+                # 文本提取是阻塞操作，分批放到工作池中执行
+                extracted = await self._extract_in_batches(worker, file_path, selection, self._format_page_texts)
+            header, footer = self._describe_window(file_path, selection, extracted)
+            
             text_content = []
             
             # 添加文件信息
             text_content.append(f"文件名: {os.path.basename(file_path)}")
-            text_content.append(f"页数: {doc.page_count}")
+            text_content.append(f"页数: {extracted['page_count']}{header}")
             text_content.append("---")
+            text_content.append(self._format_page_texts(extracted["pages"]))
             
-            # 提取每页文本
-            for page_num in range(doc.page_count):
-                page = doc[page_num]
-                text = page.get_text()
-                if text.strip():
-                    text_content.append(f"第{page_num + 1}页:")
-                    text_content.append(text)
-                    text_content.append("---")
-            
-            doc.close()
+            if footer:
+                text_content.append(footer)
             
             return [types.TextContent(
                 type="text",
-                text="\n".join(text_content)
+                text="\n".join(part for part in text_content if part)
             )]
             
         except Exception as e:
@@ -121,6 +469,80 @@ class PdfTool(BaseTool):
                 text=f"错误: 快速预览PDF时发生错误: {str(e)}\n{error_details}"
             )]
     
+    async def _pending_pages(self, file_path: str, selection: Dict[str, Any]) -> int:
+        """本次调用最多需要提取的页数（所选页数减去起始位置，不超过max_pages）"""
+        selected = selection.get("selected")
+        if selected is None:
+            _, selected = await self.run_blocking(
+                PdfTool._count_selected, file_path, selection["ranges"], pool=THREAD_POOL
+            )
+        pending = max(selected - selection.get("start", 0), 0)
+        max_pages = selection.get("max_pages")
+        return pending if max_pages is None else min(pending, max_pages)
+    
+    def _should_shard(self, pending: int) -> bool:
+        """是否按分片在进程池中并行提取"""
+        shard_pages = env_int("MCP_PDF_SHARD_PAGES", env_int("MCP_PDF_BATCH_PAGES", 16))
+        return (
+            self.get_worker_pool() == PROCESS_POOL
+            and pool_workers(PROCESS_POOL) > 1
+            and pending > shard_pages
+        )
+    
+    @staticmethod
+    def _format_page_texts(pages: List[Dict[str, Any]]) -> str:
+        """将页面文本格式化为"第N页:"分隔的文本，跳过空白页"""
+        text_content = []
+        for page in pages:
+            if page["text"].strip():
+                text_content.append(f"第{page['page_num'] + 1}页:")
+                text_content.append(page["text"])
+                text_content.append("---")
+        return "\n".join(text_content)
+    
+    @staticmethod
+    def _extract_text(file_path: str, selection: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        使用PyMuPDF提取所选页面的文本（同步执行，运行在工作池中）
+        """
+        with phase("open"):
+            doc = fitz.open(file_path)
+        try:
+            with phase("extract"):
+                return PdfTool._iter_budgeted_pages(
+                    doc,
+                    selection,
+                    lambda doc, page_num: {"text": doc[page_num].get_text()},
+                )
+        finally:
+            doc.close()
+    
+    @staticmethod
+    def _extract_markdown(file_path: str, selection: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        使用pymupdf4llm将所选页面转换为markdown（同步执行，运行在工作池中）
+        
+        一次转换本批次可能返回的全部页面，标题层级按这些页面的字号统计识别。
+        """
+        with phase("open"):
+            doc = fitz.open(file_path)
+        try:
+            with phase("extract"):
+                selected = PdfTool._select_pages(selection["ranges"], doc.page_count)
+                start = selection.get("start", 0)
+                max_pages = selection.get("max_pages")
+                batch = selected[start:] if max_pages is None else selected[start:start + max_pages]
+                chunks = pymupdf4llm.to_markdown(doc, pages=batch, page_chunks=True, show_progress=False) if batch else []
+                # metadata中的page从1开始
+                markdown = {chunk["metadata"]["page"] - 1: chunk["text"] for chunk in chunks}
+                return PdfTool._iter_budgeted_pages(
+                    doc,
+                    selection,
+                    lambda doc, page_num: {"text": markdown.get(page_num, "")},
+                )
+        finally:
+            doc.close()
+    
     def _get_image_mime_type(self, image_bytes: bytes) -> str:
         """
         获取图片的MIME类型
@@ -130,7 +552,7 @@ class PdfTool(BaseTool):
             return f"image/{image_type}"
         return "image/png"  # 默认返回PNG类型
 
-    async def _analyze_image(self, image_bytes: bytes, lang: str = 'chi_sim+eng') -> str:
+    async def _analyze_image(self, image_bytes: bytes, lang: str = DEFAULT_OCR_LANG) -> str:
         """
         分析图片内容，识别文字和场景
 
@@ -142,78 +564,142 @@ class PdfTool(BaseTool):
             str: 图片分析结果
         """
         try:
-            # 将二进制数据转换为PIL Image对象
-            image = Image.open(io.BytesIO(image_bytes))
-            
-            # 进行OCR文字识别
-            text = pytesseract.image_to_string(image, lang=lang)
-            
-            # 如果识别出文字，返回结果
-            if text.strip():
-                return f"图片中识别出的文字：\n{text.strip()}"
-            else:
-                return "未在图片中识别出文字"
-                
+            # tesseract识别是阻塞操作，放到工作池中执行
+            text = await self.run_blocking(ocr_image, image_bytes, lang)
+            return self._format_image_analysis(text)
         except Exception as e:
             return f"图片分析失败: {str(e)}"
+    
+    async def _analyze_images(self, images: List[bytes], concurrency: int | None = None, lang: str = DEFAULT_OCR_LANG, on_progress: Any = None, stats: Optional[Dict[str, float]] = None) -> List[str]:
+        """
+        将多张图片分发到OCR工作进程并行识别，结果顺序与输入顺序一致
+        """
+        with phase("ocr"):
+            results = await ocr_images(images, lang=lang, concurrency=concurrency, on_progress=on_progress, stats=stats)
+        return [
+            f"图片分析失败: {str(result)}" if isinstance(result, BaseException)
+            else self._format_image_analysis(result)
+            for result in results
+        ]
+    
+    @staticmethod
+    def _format_image_analysis(text: str) -> str:
+        """格式化OCR识别结果"""
+        # 如果识别出文字，返回结果
+        if text.strip():
+            return f"图片中识别出的文字：\n{text.strip()}"
+        else:
+            return "未在图片中识别出文字"
 
-    async def _full_parse_pdf(self, file_path: str) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+    async def _full_parse_pdf(self, file_path: str, ocr_concurrency: int | None = None, selection: Optional[Dict[str, Any]] = None, ocr_lang: str = DEFAULT_OCR_LANG) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
         """
         完整解析PDF文件，提取文本和图片内容
+        
+        默认按需识别（见_is_scanned_page）：已有文本层的页面只识别其中有意义的图片，
+        扫描页整页渲染后识别一次，过小或内容单一的图片不做识别；结果末尾附带OCR统计。
         """
         results = []
+        selection = selection or {"ranges": self._parse_page_ranges(None)}
         
         try:
-            # 使用PyMuPDF提取文本和图片
-            doc = fitz.open(file_path)
+            # 打开文档、提取文本和图片数据是阻塞操作，分批放到工作池中执行
+            extracted = await self._extract_in_batches(
+                PdfTool._extract_pages, file_path, selection, self._format_page_texts
+            )
+            pages = extracted["pages"]
+            header, footer = self._describe_window(file_path, selection, extracted)
+            
+            # 所有图片（以及扫描页的整页渲染图）统一提交到OCR工作进程并行识别，再按页码和图片顺序放回；
+            # 重复出现的图片按内容哈希去重，只识别一次
+            images = []
+            for page in pages:
+                if "scan" in page:
+                    images.append(page["scan"])
+                images.extend(image["image"] for image in page["images"] if "image" in image)
+            
+            async def on_ocr_progress(done: int, total: int) -> None:
+                # 进度单位为页面数 + 图片数，页面提取完成后继续累加OCR进度
+                await report_progress(len(pages) + done, len(pages) + total)
+            
+            ocr_stats: Dict[str, float] = {}
+            analyses = iter(await self._analyze_images(
+                images,
+                concurrency=ocr_concurrency,
+                lang=ocr_lang,
+                on_progress=on_ocr_progress,
+                stats=ocr_stats,
+            ))
             
             # 添加文件信息
             results.append(types.TextContent(
                 type="text",
-                text=f"文件名: {os.path.basename(file_path)}\n页数: {doc.page_count}\n---"
+                text=f"文件名: {os.path.basename(file_path)}\n页数: {extracted['page_count']}{header}\n---"
             ))
             
             # 处理每一页
-            for page_num in range(doc.page_count):
-                page = doc[page_num]
+            for page in pages:
+                page_num = page["page_num"]
                 
-                # 提取文本
-                text = page.get_text()
-                if text.strip():
+                if page["text"].strip():
+                    results.append(types.TextContent(
+                        type="text",
+                        text=f"第{page_num + 1}页:\n{page['text']}\n---"
+                    ))
+                
+                # 扫描页只有一个整页识别结果
+                if "scan" in page:
                     results.append(types.TextContent(
                         type="text",
-                        text=f"第{page_num + 1}页:\n{text}\n---"
+                        text=f"第{page_num + 1}页为扫描页（包含{page['fragments']}张图片），整页识别结果：\n{next(analyses)}\n---"
                     ))
+                    continue
                 
-                # 提取图片并进行OCR识别
-                image_list = page.get_images()
-                if image_list:
+                # 添加图片的OCR识别结果
+                images = page["images"]
+                if images:
                     results.append(types.TextContent(
                         type="text",
-                        text=f"第{page_num + 1}页包含{len(image_list)}张图片"
+                        text=f"第{page_num + 1}页包含{len(images)}张图片"
                     ))
                     
-                    for img_idx, img_info in enumerate(image_list):
-                        try:
-                            xref = img_info[0]
-                            base_image = doc.extract_image(xref)
-                            image_bytes = base_image["image"]
-                            
-                            # 分析图片内容
-                            image_analysis = await self._analyze_image(image_bytes)
-                            
-                            # 只添加OCR识别结果
-                            results.append(types.TextContent(
-                                type="text",
-                                text=f"第{page_num + 1}页 图片{img_idx + 1}分析结果：\n{image_analysis}\n---"
-                            ))
-                        except Exception as img_error:
+                    skipped = 0
+                    for img_idx, image in enumerate(images):
+                        if "error" in image:
                             results.append(types.TextContent(
                                 type="text",
-                                text=f"警告: 处理第{page_num + 1}页图片{img_idx + 1}时出错: {str(img_error)}"
+                                text=f"警告: 处理第{page_num + 1}页图片{img_idx + 1}时出错: {image['error']}"
                             ))
+                            continue
+                        if "skip" in image:
+                            skipped += 1
+                            continue
+                        
+                        # 只添加OCR识别结果
+                        results.append(types.TextContent(
+                            type="text",
+                            text=f"第{page_num + 1}页 图片{img_idx + 1}分析结果：\n{next(analyses)}\n---"
+                        ))
+                    
+                    if skipped:
+                        results.append(types.TextContent(
+                            type="text",
+                            text=f"第{page_num + 1}页有{skipped}张图片尺寸过小或内容单一，未做识别"
+                        ))
+            
+            # OCR失败多为临时性问题（如tesseract未安装），结果不写入缓存，修复后重新调用即可得到完整结果
+            if ocr_stats.get("failed"):
+                mark_uncacheable()
+            
+            summary = self._summarize_ocr(pages, ocr_stats)
+            if summary:
+                results.append(summary)
+            
+            if footer:
+                results.append(types.TextContent(
+                    type="text",
+                    text=footer
+                ))
             
-            doc.close()
             return results
             
         except Exception as e:
@@ -221,4 +707,132 @@ class PdfTool(BaseTool):
             return [types.TextContent(
                 type="text",
                 text=f"错误: 完整解析PDF时发生错误: {str(e)}\n{error_details}"
-            )] 
\ No newline at end of file
+            )]
+    
+    @staticmethod
+    def _summarize_ocr(pages: List[Dict[str, Any]], ocr_stats: Dict[str, float]) -> Optional[types.TextContent]:
+        """
+        生成OCR统计：识别了多少图片和扫描页、跳过了多少图片，以及估计节省的时间
+        
+        节省的时间按本次调用中平均每次识别的耗时，乘以少做的识别次数（跳过的图片数，
+        加上扫描页被整页识别代替的图片片段数减去整页识别次数）估算。
+        """
+        images = [image for page in pages for image in page["images"]]
+        scans = [page for page in pages if "scan" in page]
+        if not images and not scans:
+            return None
+        
+        small = sum(1 for image in images if image.get("skip") == SKIP_SMALL)
+        low_entropy = sum(1 for image in images if image.get("skip") == SKIP_LOW_ENTROPY)
+        fragments = sum(page["fragments"] for page in scans)
+        planned = sum(1 for image in images if "image" in image) + len(scans)
+        avoided = small + low_entropy + max(fragments - len(scans), 0)
+        
+        recognized = int(ocr_stats.get("recognized", 0))
+        failed = int(ocr_stats.get("failed", 0))
+        ocr_seconds = ocr_stats.get("seconds", 0.0)
+        parts = [f"OCR统计: 共{planned}次识别（图片{planned - len(scans)}张，扫描页{len(scans)}页），tesseract成功识别{recognized}次"]
+        if failed:
+            parts.append(f"{failed}次识别失败")
+        if small or low_entropy:
+            parts.append(f"跳过{small + low_entropy}张图片（尺寸过小{small}张，内容单一{low_entropy}张）")
+        if scans:
+            parts.append(f"{len(scans)}个扫描页整页识别，代替了{fragments}张图片片段")
+        
+        saved = None
+        if recognized and avoided:
+            saved = ocr_seconds / recognized * avoided
+            parts.append(f"识别耗时{ocr_seconds:.2f}秒，估计节省约{saved:.2f}秒")
+        elif recognized:
+            parts.append(f"识别耗时{ocr_seconds:.2f}秒")
+        
+        return types.TextContent(
+            type="text",
+            text="，".join(parts),
+            _meta={"ocr": {
+                "images": planned - len(scans),
+                "scanned_pages": len(scans),
+                "replaced_fragments": fragments,
+                "skipped_small": small,
+                "skipped_low_entropy": low_entropy,
+                "recognized": recognized,
+                "failed": failed,
+                "seconds": round(ocr_seconds, 3),
+                "estimated_seconds_saved": None if saved is None else round(saved, 3),
+            }}
+        )
+    
+    @staticmethod
+    def _is_scanned_page(page: Any, text: str) -> bool:
+        """
+        判断页面是否为扫描页：几乎没有文本层（少于MCP_OCR_TEXT_LAYER_CHARS个字符，默认32），
+        且图片覆盖了页面的大部分面积（不少于MCP_OCR_SCAN_COVERAGE，默认0.6）
+        
+        扫描页整页渲染后识别一次，比逐个识别拼接而成的图片片段更快，也不会切断跨片段的文字。
+        """
+        if len("".join(text.split())) >= env_int("MCP_OCR_TEXT_LAYER_CHARS", 32):
+            return False
+        page_rect = page.rect
+        page_area = abs(page_rect) or 1.0
+        covered = 0.0
+        for info in page.get_image_info():
+            covered += abs(fitz.Rect(info["bbox"]) & page_rect)
+        return covered / page_area >= env_float("MCP_OCR_SCAN_COVERAGE", 0.6)
+    
+    @staticmethod
+    def _extract_pages(file_path: str, selection: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        提取所选页面的文本和图片数据（同步执行，运行在工作池中）
+        
+        selection中的plan_ocr为True（默认）时按需准备OCR输入：扫描页渲染为一张灰度图，
+        不再提取其中的图片；其他页面中过小或内容单一的图片标记为跳过。
+        
+        Returns:
+            _iter_budgeted_pages的结果，pages中每页为 {"page_num", "text", "images"}，
+            images中每项为 {"xref", "image"}、{"xref", "error"} 或 {"xref", "skip"}；
+            扫描页另有"scan"（整页渲染的PNG数据）和"fragments"（页面中的图片数），images为空
+        """
+        plan_ocr = selection.get("plan_ocr", True)
+        with phase("open"):
+            doc = fitz.open(file_path)
+        try:
+            # 同一图片（如信头、logo、印章）在各页中共享同一个xref，只提取一次
+            extracted: Dict[int, Dict[str, Any]] = {}
+            
+            def extract(doc: Any, page_num: int) -> Dict[str, Any]:
+                page = doc[page_num]
+                text = page.get_text()
+                img_infos = page.get_images()
+                
+                if plan_ocr and img_infos and PdfTool._is_scanned_page(page, text):
+                    try:
+                        dpi = env_int("MCP_OCR_RENDER_DPI", 200)
+                        pixmap = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+                        return {"text": text, "images": [], "scan": pixmap.tobytes("png"), "fragments": len(img_infos)}
+                    except Exception:
+                        # 渲染失败时退回逐个识别图片
+                        pass
+                
+                images = []
+                for img_info in img_infos:
+                    xref = img_info[0]
+                    if xref not in extracted:
+                        try:
+                            base_image = doc.extract_image(xref)
+                            reason = image_skip_reason(
+                                base_image["image"], base_image.get("width"), base_image.get("height")
+                            ) if plan_ocr else None
+                            if reason:
+                                extracted[xref] = {"xref": xref, "skip": reason}
+                            else:
+                                extracted[xref] = {"xref": xref, "image": base_image["image"]}
+                        except Exception as img_error:
+                            extracted[xref] = {"xref": xref, "error": str(img_error)}
+                    images.append(extracted[xref])
+                
+                return {"text": text, "images": images}
+            
+            with phase("extract"):
+                return PdfTool._iter_budgeted_pages(doc, selection, extract)
+        finally:
+            doc.close()
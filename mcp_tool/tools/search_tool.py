@@ -0,0 +1,289 @@
+"""
+全文检索工具，在挂载目录下的PDF、Word和Excel文件中检索关键词
+"""
+
+import asyncio
+import csv
+import io
+import os
+import time
+import traceback
+import zipfile
+from typing import Any, Dict, List, Tuple
+import mcp.types as types
+from . import BaseTool, ToolRegistry
+from .excel_tool import ExcelTool
+from .file_tool import FileTool
+from .pdf_tool import PdfTool
+from .word_tool import WordTool
+from .utils.executor import THREAD_POOL, env_int, pool_workers, run_in_pool
+from .utils.lazy import lazy_import
+from .utils.progress import report_progress
+from .utils.search_index import get_search_index, tokenize
+
+openpyxl = lazy_import("openpyxl")
+
+@ToolRegistry.register
+class SearchTool(BaseTool):
+    """
+    全文检索工具
+
+    索引保存在磁盘上（见utils.search_index），每次检索前按文件大小和修改时间增量更新：
+    只有新增或变化的文件会用各解析工具重新提取文本，已删除的文件从索引中移除。
+    PDF按页、Word按片段、Excel按工作表的行范围返回命中位置和摘要。
+    """
+    name = "search"
+    description = "在挂载目录下的PDF、Word和Excel文件中全文检索（支持中文），返回按相关度排序的文件、页码/工作表位置和摘要"
+    # 文本提取是CPU密集型操作，默认在进程池中并行执行
+    worker_pool = "process"
+    input_schema = {
+        "type": "object",
+        "required": ["query"],
+        "properties": {
+            "query": {
+                "type": "string",
+                "description": "检索内容，多个关键词用空格分隔，例如'违约责任 付款期限'",
+            },
+            "path": {
+                "type": "string",
+                "description": "检索的目录，默认为挂载目录HOST_MOUNT_TARGET",
+            },
+            "limit": {
+                "type": "integer",
+                "description": "最多返回的结果数",
+                "default": 10,
+                "minimum": 1
+            },
+            "refresh": {
+                "type": "boolean",
+                "description": "检索前是否增量更新索引；为false时直接检索现有索引",
+                "default": True
+            }
+        },
+    }
+
+    def __init__(self):
+        super().__init__()
+        self._refresh_lock = asyncio.Lock()
+
+    async def execute(self, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+        """更新索引并检索"""
+        query = (arguments.get("query") or "").strip()
+        if not query:
+            return [types.TextContent(
+                type="text",
+                text="错误: 缺少必要参数 'query'"
+            )]
+
+        root = arguments.get("path") or os.environ.get("HOST_MOUNT_TARGET", "/host_files")
+        root = os.path.abspath(self.process_file_path(root))
+        if not os.path.isdir(root):
+            return [types.TextContent(
+                type="text",
+                text=f"错误: 目录不存在: {root}"
+            )]
+
+        try:
+            index = get_search_index()
+            refreshed = None
+            if arguments.get("refresh", True):
+                # 同一时间只进行一次更新，并发的检索等待更新完成后再查询
+                async with self._refresh_lock:
+                    refreshed = await self._refresh(index, root)
+
+            start = time.perf_counter()
+            result = await run_in_pool(THREAD_POOL, index.search, query, root, int(arguments.get("limit", 10)))
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        except Exception as e:
+            error_details = traceback.format_exc()
+            return [types.TextContent(
+                type="text",
+                text=f"错误: 检索时发生错误: {str(e)}\n{error_details}"
+            )]
+
+        return [self._format_result(query, root, result, elapsed_ms, refreshed)]
+
+    async def _refresh(self, index: Any, root: str) -> Dict[str, int]:
+        """
+        按文件大小和修改时间增量更新root目录的索引
+
+        Returns:
+            {"files": 目录中的文件数, "updated": 重新提取的文件数, "removed": 移除的文件数, "failed": 提取失败的文件数}
+        """
+        max_files = env_int("MCP_SEARCH_MAX_FILES", 100000)
+        files, _ = await run_in_pool(THREAD_POOL, FileTool._collect_files, root, True, max_files)
+        current = await run_in_pool(THREAD_POOL, SearchTool._stat_files, files)
+        indexed = await run_in_pool(THREAD_POOL, index.file_states, root)
+
+        changed = [path for path, state in current.items() if indexed.get(path) != state]
+        removed = [path for path in indexed if path not in current]
+        if removed:
+            await run_in_pool(THREAD_POOL, index.remove_files, removed)
+
+        # 限制同时提交的文件数，避免大量提取结果同时驻留内存
+        limit = asyncio.Semaphore(pool_workers(self.get_worker_pool()) * 2)
+        finished = 0
+        failed = 0
+
+        async def index_one(path: str) -> None:
+            nonlocal finished, failed
+            size, mtime_ns = current[path]
+            async with limit:
+                try:
+                    chunks = await self.run_blocking(SearchTool._extract_chunks, path)
+                    error = None
+                except Exception as e:
+                    chunks = []
+                    error = str(e) or type(e).__name__
+                    failed += 1
+            await run_in_pool(THREAD_POOL, index.replace_file, path, size, mtime_ns, chunks, error)
+            finished += 1
+            await report_progress(finished, len(changed))
+
+        await asyncio.gather(*(index_one(path) for path in changed))
+        return {"files": len(current), "updated": len(changed), "removed": len(removed), "failed": failed}
+
+    @staticmethod
+    def _stat_files(files: List[str]) -> Dict[str, Tuple[int, int]]:
+        """返回 路径 -> (大小, 修改时间)，跳过期间被删除的文件"""
+        states = {}
+        for path in files:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            states[path] = (stat.st_size, stat.st_mtime_ns)
+        return states
+
+    @staticmethod
+    def _extract_chunks(file_path: str) -> List[Tuple[str, Dict[str, Any], str, str]]:
+        """
+        使用各解析工具提取文件文本，拆分为记录并切分检索词（同步执行，运行在工作池中）
+
+        Returns:
+            (位置说明, 定位信息, 原文, 检索词) 列表，跳过没有文字的页面和片段
+        """
+        file_ext = os.path.splitext(file_path)[1].lower()
+        if file_ext == ".pdf":
+            pages = PdfTool._extract_text(file_path, {"ranges": PdfTool._parse_page_ranges(None)})["pages"]
+            chunks = [
+                (f"第{page['page_num'] + 1}页", {"page": page["page_num"] + 1}, page["text"])
+                for page in pages
+            ]
+        elif file_ext in (".doc", ".docx"):
+            text = SearchTool._word_text(WordTool._read_word_document(file_path))
+            chunks = [
+                (f"片段{index + 1}", {"part": index + 1}, block)
+                for index, block in enumerate(SearchTool._split_blocks(text, env_int("MCP_SEARCH_CHUNK_CHARS", 2000)))
+            ]
+        else:
+            chunks = SearchTool._extract_sheets(file_path)
+        return [(label, locator, text, tokenize(text)) for label, locator, text in chunks if text.strip()]
+
+    @staticmethod
+    def _word_text(contents: List[Any]) -> str:
+        """
+        从WordTool的输出中取出文档属性的值和正文
+
+        不包括标题、段落数和表格数等每个文档都有的说明文字，以及文件大小、图片数量等信息，
+        避免所有Word文件都命中这些词。
+        """
+        parts = []
+        for item in contents:
+            if not isinstance(item, types.TextContent):
+                continue
+            if item.text.startswith("## 文档属性"):
+                parts.append("\n".join(
+                    line.partition(": ")[2] for line in item.text.splitlines() if line.startswith("- ")
+                ))
+            elif item.text.startswith("## 文档内容"):
+                # 去掉标题和"共N个段落，M个表格"两行
+                parts.append(item.text.split("\n\n", 2)[2] if item.text.count("\n\n") >= 2 else "")
+        return "\n\n".join(parts)
+
+    @staticmethod
+    def _split_blocks(text: str, max_chars: int) -> List[str]:
+        """按空行将文本拆分为不超过max_chars的片段（单个段落超长时单独成为一个片段）"""
+        blocks: List[str] = []
+        current: List[str] = []
+        size = 0
+        for paragraph in text.split("\n\n"):
+            if current and size + len(paragraph) > max_chars:
+                blocks.append("\n\n".join(current))
+                current, size = [], 0
+            current.append(paragraph)
+            size += len(paragraph) + 2
+        if current:
+            blocks.append("\n\n".join(current))
+        return blocks
+
+    @staticmethod
+    def _extract_sheets(file_path: str) -> List[Tuple[str, Dict[str, Any], str]]:
+        """
+        以CSV格式读取每个工作表，每MCP_SEARCH_SHEET_ROWS行（默认200）为一条记录，每条记录都带表头
+
+        每个工作表最多读取MCP_SEARCH_MAX_SHEET_ROWS行（默认100000）。
+        """
+        max_rows = env_int("MCP_SEARCH_MAX_SHEET_ROWS", 100000)
+        sheets = []
+        if zipfile.is_zipfile(file_path):
+            workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+            try:
+                for sheet_name in workbook.sheetnames:
+                    out = io.StringIO()
+                    ExcelTool._stream_sheet(workbook[sheet_name], out, None, 0, max_rows, "csv")
+                    sheets.append((sheet_name, out.getvalue()))
+            finally:
+                workbook.close()
+        else:
+            # xls等旧格式由pandas读取
+            for sheet_name in ExcelTool._list_sheets(file_path):
+                sheets.append((sheet_name, ExcelTool._format_sheet(file_path, sheet_name, None, 0, max_rows, "csv")))
+
+        rows_per_chunk = env_int("MCP_SEARCH_SHEET_ROWS", 200)
+        chunks = []
+        for sheet_name, text in sheets:
+            # 去掉_close_sheet写在末尾的汇总行
+            body = text.rpartition("\n\noffset: ")[0]
+            rows = list(csv.reader(io.StringIO(body)))
+            header, data = (rows[0], rows[1:]) if rows else ([], [])
+            for start in range(0, len(data), rows_per_chunk):
+                block = data[start:start + rows_per_chunk]
+                first, last = start + 1, start + len(block)
+                chunks.append((
+                    f"工作表 {sheet_name} 第{first}-{last}行",
+                    {"sheet": sheet_name, "rows": [first, last]},
+                    "\n".join(" | ".join(row) for row in [header] + block),
+                ))
+        return chunks
+
+    @staticmethod
+    def _format_result(query: str, root: str, result: Dict[str, Any], elapsed_ms: float, refreshed: Dict[str, int] | None) -> types.TextContent:
+        """将检索结果格式化为文本，结构化的命中信息放在_meta中"""
+        hits = result["hits"]
+        lines = [f"# 检索结果: {query}", ""]
+        summary = f"目录: {root}，共{len(hits)}条结果，检索耗时{elapsed_ms:.1f}毫秒"
+        if refreshed is not None:
+            summary += f"；索引中共{refreshed['files']}个文件，本次更新{refreshed['updated']}个，移除{refreshed['removed']}个"
+            if refreshed["failed"]:
+                summary += f"，{refreshed['failed']}个文件无法解析"
+        lines.append(summary)
+        if hits and result["match"] == "any":
+            lines.append("没有同时包含所有关键词的结果，以下结果至少包含其中一个关键词")
+        if not hits:
+            lines.append("没有找到匹配的内容")
+
+        for rank, hit in enumerate(hits, 1):
+            lines.append("")
+            lines.append(f"{rank}. {os.path.relpath(hit['path'], root)} — {hit['label']}")
+            lines.append(f"   {hit['snippet']}")
+
+        return types.TextContent(
+            type="text",
+            text="\n".join(lines),
+            _meta={
+                "hits": [{key: hit[key] for key in ("path", "label", "locator", "score")} for hit in hits],
+                "elapsed_ms": round(elapsed_ms, 2),
+                "index": refreshed,
+            }
+        )
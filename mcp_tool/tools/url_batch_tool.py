@@ -0,0 +1,149 @@
+"""
+批量URL获取工具，并发获取多个网页并按输入顺序返回结果
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List
+from urllib.parse import urlsplit
+import httpx
+import mcp.types as types
+from . import BaseTool, ToolRegistry
+from .url_tool import UrlTool
+from .utils.executor import env_int
+from .utils.progress import emit_partial, report_progress
+
+@ToolRegistry.register
+class UrlBatchTool(BaseTool):
+    """
+    批量URL获取工具
+
+    所有URL在同一个事件循环中并发获取，受全局并发数和单主机并发数限制；
+    每个URL单独计时，某个URL失败不会影响其他URL。每完成一个URL即推送一次进度和部分结果，
+    最终结果按输入顺序排列。
+    """
+    name = "url_batch"
+    description = "Fetches multiple websites concurrently and returns their contents in input order"
+    input_schema = {
+        "type": "object",
+        "required": ["urls"],
+        "properties": {
+            "urls": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "URLs to fetch",
+                "minItems": 1
+            },
+            "format": {
+                "type": "string",
+                "description": "Output format for each page: 'raw', 'text' or 'markdown'",
+                "enum": ["raw", "text", "markdown"],
+                "default": "text"
+            },
+            "max_chars": {
+                "type": "integer",
+                "description": "Maximum number of characters returned per URL (default MCP_URL_BATCH_MAX_CHARS)",
+                "minimum": 1
+            },
+            "max_bytes": {
+                "type": "integer",
+                "description": "Stop downloading a page after this many bytes (default MCP_URL_MAX_BYTES)",
+                "minimum": 1
+            },
+            "timeout": {
+                "type": "number",
+                "description": "Timeout in seconds for each URL, counted from when its request starts (time spent queued for a free slot is not included)",
+                "default": 15
+            },
+            "concurrency": {
+                "type": "integer",
+                "description": "Maximum number of URLs fetched at the same time (default MCP_URL_BATCH_CONCURRENCY)",
+                "minimum": 1
+            },
+            "per_host_concurrency": {
+                "type": "integer",
+                "description": "Maximum number of concurrent requests to the same host (default MCP_URL_BATCH_PER_HOST)",
+                "minimum": 1
+            }
+        },
+    }
+
+    def __init__(self):
+        super().__init__()
+        self.url_tool = UrlTool()
+
+    async def execute(self, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+        """并发获取所有URL"""
+        urls = arguments.get("urls")
+        if not urls or not isinstance(urls, list):
+            return [types.TextContent(
+                type="text",
+                text="Error: Missing required argument 'urls'"
+            )]
+
+        output_format = arguments.get("format", "text")
+        max_chars = arguments.get("max_chars") or env_int("MCP_URL_BATCH_MAX_CHARS", 20000)
+        max_bytes = arguments.get("max_bytes")
+        timeout = float(arguments.get("timeout", 15))
+        global_limit = asyncio.Semaphore(arguments.get("concurrency") or env_int("MCP_URL_BATCH_CONCURRENCY", 16))
+        per_host = arguments.get("per_host_concurrency") or env_int("MCP_URL_BATCH_PER_HOST", 4)
+        host_limits: Dict[str, asyncio.Semaphore] = {}
+
+        results: List[types.TextContent | None] = [None] * len(urls)
+        finished = 0
+        ok_count = 0
+        start = time.monotonic()
+        await report_progress(0, len(urls))
+
+        async def fetch_one(index: int, url: str) -> None:
+            nonlocal finished, ok_count
+            host = urlsplit(url).netloc.lower()
+            host_limit = host_limits.setdefault(host, asyncio.Semaphore(per_host))
+            header = f"## [{index + 1}] {url}\n\n"
+            meta: Dict[str, Any] = {"url": url, "index": index}
+            try:
+                page = await self._fetch_limited(url, global_limit, host_limit, max_bytes, timeout)
+                content = await self.run_blocking(UrlTool.render, page, output_format, 0, max_chars)
+                meta.update(content.model_extra.get("_meta", {}))
+                meta["status"] = "ok"
+                text = header + content.text
+                ok_count += 1
+            except asyncio.TimeoutError:
+                meta["status"] = "error"
+                text = header + f"Request timed out after {timeout:g} seconds."
+            except Exception as e:
+                meta["status"] = "error"
+                # 去掉"Error: "前缀，单个URL失败不应使整个结果被视为错误
+                text = header + UrlTool._format_error(e).removeprefix("Error: ")
+
+            results[index] = types.TextContent(type="text", text=text, _meta=meta)
+            finished += 1
+            await report_progress(finished, len(urls))
+            await emit_partial(text)
+
+        await asyncio.gather(*(fetch_one(index, url) for index, url in enumerate(urls)))
+
+        summary = (
+            f"# 批量获取结果\n\n共{len(urls)}个URL，成功{ok_count}个，失败{len(urls) - ok_count}个，"
+            f"耗时{time.monotonic() - start:.2f}秒"
+        )
+        return [types.TextContent(type="text", text=summary)] + results
+
+    async def _fetch_limited(self, url: str, global_limit: asyncio.Semaphore, host_limit: asyncio.Semaphore,
+                             max_bytes: int | None, timeout: float) -> Dict[str, Any]:
+        """
+        在全局和单主机并发限制内获取一个URL
+
+        超时只计算获取到名额之后的请求时间，排队等待不计入，同一主机的URL较多时不会因排队而超时。
+        httpx.Timeout只限制单次读写，整个请求（包括逐块下载）的总时长由wait_for限制。
+        """
+        # 先获取单主机名额，避免排队等待同一主机的请求占用全局名额
+        async with host_limit, global_limit:
+            return await asyncio.wait_for(
+                self.url_tool.fetch(
+                    url,
+                    max_bytes=max_bytes,
+                    timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0))
+                ),
+                timeout
+            )
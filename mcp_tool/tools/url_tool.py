@@ -1,6 +1,14 @@
+from typing import Any, Dict, Optional
 import httpx
 import mcp.types as types
 from . import BaseTool, ToolRegistry
+from .utils.executor import env_int
+from .utils.http_cache import (
+    CACHE_BYPASS, CACHE_EXPIRED, CACHE_HIT, CACHE_MISS, CACHE_REVALIDATED, get_http_cache
+)
+from .utils.html_text import html_to_text, is_html
+from .utils.http_client import get_http_client
+from .utils.metrics import phase
 
 @ToolRegistry.register
 class UrlTool(BaseTool):
@@ -14,6 +22,28 @@ class UrlTool(BaseTool):
             "url": {
                 "type": "string",
                 "description": "URL to fetch",
+            },
+            "format": {
+                "type": "string",
+                "description": "Output format: 'raw' returns the response body as is, 'text' strips HTML markup, 'markdown' converts HTML to markdown",
+                "enum": ["raw", "text", "markdown"],
+                "default": "raw"
+            },
+            "offset": {
+                "type": "integer",
+                "description": "Character offset in the formatted output to start from, used to page through long content",
+                "default": 0,
+                "minimum": 0
+            },
+            "max_chars": {
+                "type": "integer",
+                "description": "Maximum number of characters to return (default MCP_URL_MAX_CHARS)",
+                "minimum": 1
+            },
+            "max_bytes": {
+                "type": "integer",
+                "description": "Stop downloading after this many bytes of the body (default MCP_URL_MAX_BYTES)",
+                "minimum": 1
             }
         },
     }
@@ -25,34 +55,141 @@ class UrlTool(BaseTool):
                 type="text",
                 text="Error: Missing required argument 'url'"
             )]
-            
-        url = arguments["url"]
+        
+        try:
+            with phase("fetch"):
+                page = await self.fetch(arguments["url"], max_bytes=arguments.get("max_bytes"))
+        except Exception as e:
+            return [types.TextContent(type="text", text=self._format_error(e))]
+        # HTML转换是CPU密集型操作，大页面放到工作池中执行
+        with phase("render"):
+            return [await self.run_blocking(
+                UrlTool.render,
+                page,
+                arguments.get("format", "raw"),
+                arguments.get("offset", 0),
+                arguments.get("max_chars"),
+            )]
+    
+    async def fetch(self, url: str, max_bytes: Optional[int] = None, timeout: Optional[httpx.Timeout] = None) -> Dict[str, Any]:
+        """
+        获取网页内容，优先使用缓存
+        
+        响应体以流的方式读取，超过max_bytes后立即中断下载，截断的响应不写入缓存。
+        
+        Returns:
+            包含content（响应体字节）、encoding、content_type、cache_status、age和truncated的字典
+        
+        Raises:
+            httpx.HTTPError: 请求失败或服务端返回错误状态码
+        """
+        max_bytes = max_bytes or env_int("MCP_URL_MAX_BYTES", 5 * 1024 * 1024)
         headers = {
             "User-Agent": "MCP Test Server (github.com/modelcontextprotocol/python-sdk)"
         }
-        try:
-            timeout = httpx.Timeout(10.0, connect=5.0)
-            async with httpx.AsyncClient(
-                follow_redirects=True, 
-                headers=headers,
-                timeout=timeout
-            ) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                return [types.TextContent(type="text", text=response.text)]
-        except httpx.TimeoutException:
-            return [types.TextContent(
-                type="text",
-                text="Error: Request timed out while trying to fetch the website."
-            )]
-        except httpx.HTTPStatusError as e:
-            return [types.TextContent(
-                type="text",
-                text=(f"Error: HTTP {e.response.status_code} "
-                      "error while fetching the website.")
-            )]
-        except Exception as e:
-            return [types.TextContent(
-                type="text",
-                text=f"Error: Failed to fetch website: {str(e)}"
-            )] 
\ No newline at end of file
+        cache = get_http_cache()
+        cached = cache.get(url) if cache else None
+        if cached is not None and cached.is_fresh():
+            return self._cached_page(cached, CACHE_HIT, max_bytes)
+        if cached is not None:
+            # 缓存已过期，通过条件请求确认内容是否变化
+            headers.update(cached.validators())
+        
+        # 使用共享客户端，多次请求复用已建立的连接
+        client = get_http_client()
+        async with client.stream(
+            "GET",
+            url,
+            headers=headers,
+            timeout=timeout or httpx.Timeout(10.0, connect=5.0),
+            follow_redirects=True
+        ) as response:
+            if cached is not None and response.status_code == 304:
+                cached = cache.revalidated(cached, response.headers)
+                return self._cached_page(cached, CACHE_REVALIDATED, max_bytes)
+            response.raise_for_status()
+            
+            chunks = []
+            received = 0
+            truncated = False
+            async for chunk in response.aiter_bytes():
+                chunks.append(chunk)
+                received += len(chunk)
+                if received >= max_bytes:
+                    # 达到上限后立即中断，剩余的响应体不再下载
+                    truncated = received > max_bytes or response.headers.get("content-length") != str(received)
+                    break
+            content = b"".join(chunks)[:max_bytes]
+            encoding = response.encoding
+            content_type = response.headers.get("content-type")
+            
+            status = CACHE_BYPASS
+            if cache is not None and response.status_code == 200 and not truncated:
+                if cache.put(url, content, encoding, response.headers) is not None:
+                    status = CACHE_MISS
+                if cached is not None:
+                    cache.record_expired()
+                    status = CACHE_EXPIRED
+        
+        return {
+            "content": content,
+            "encoding": encoding,
+            "content_type": content_type,
+            "cache_status": status,
+            "age": 0,
+            "truncated": truncated,
+        }
+    
+    @staticmethod
+    def _cached_page(cached, cache_status: str, max_bytes: int) -> Dict[str, Any]:
+        return {
+            "content": cached.content[:max_bytes],
+            "encoding": cached.encoding,
+            "content_type": cached.headers.get("content-type"),
+            "cache_status": cache_status,
+            "age": cached.age if cache_status == CACHE_HIT else 0,
+            "truncated": len(cached.content) > max_bytes,
+        }
+    
+    @staticmethod
+    def render(page: Dict[str, Any], output_format: str = "raw", offset: int = 0, max_chars: Optional[int] = None) -> types.TextContent:
+        """
+        按输出格式转换网页内容，并按字符偏移分页
+        
+        缓存状态和分页信息写入内容的_meta中；还有剩余内容时在正文末尾提示下一页的offset。
+        """
+        max_chars = max_chars or env_int("MCP_URL_MAX_CHARS", 100000)
+        text = page["content"].decode(page["encoding"] or "utf-8", errors="replace")
+        if output_format in ("text", "markdown") and is_html(page["content_type"], text):
+            text = html_to_text(text, markdown=output_format == "markdown")
+        
+        total = len(text)
+        end = min(offset + max_chars, total)
+        body = text[offset:end]
+        notes = []
+        if page["truncated"]:
+            notes.append(f"响应体超过下载上限，仅获取了前{len(page['content'])}字节")
+        if end < total:
+            notes.append(f"还有{total - end}个字符未返回，请使用参数 offset={end} 继续获取")
+        if notes:
+            body = body.rstrip("\n") + "\n\n---\n" + "\n".join(notes)
+        
+        meta = {
+            "cache": {"status": page["cache_status"], "age": int(page["age"])},
+            "page": {"offset": offset, "returned_chars": end - offset if end > offset else 0, "total_chars": total},
+        }
+        if end < total:
+            meta["page"]["next_offset"] = end
+        if page["truncated"]:
+            meta["page"]["truncated"] = True
+        return types.TextContent(type="text", text=body, _meta=meta)
+    
+    @staticmethod
+    def _format_error(error: Exception) -> str:
+        """将请求异常转换为返回给客户端的错误信息"""
+        if isinstance(error, httpx.TimeoutException):
+            return "Error: Request timed out while trying to fetch the website."
+        if isinstance(error, httpx.HTTPStatusError):
+            return (f"Error: HTTP {error.response.status_code} "
+                    "error while fetching the website.")
+        return f"Error: Failed to fetch website: {str(error)}"
@@ -0,0 +1,3 @@
+"""
+工具共享的工具函数和辅助类
+"""
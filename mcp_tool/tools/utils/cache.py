@@ -0,0 +1,269 @@
+"""
+解析结果缓存，以文件内容和调用参数为键
+
+缓存分为两层：
+- 内存层：按字节大小淘汰的LRU缓存
+- 磁盘层（可选）：设置MCP_CACHE_DIR后启用，服务重启后依然有效
+
+配置项：
+- MCP_CACHE_ENABLED: 是否启用缓存，默认 true
+- MCP_CACHE_MAX_BYTES: 内存层容量上限，默认 256MB
+- MCP_CACHE_DIR: 磁盘层目录，未设置时不启用磁盘层
+- MCP_CACHE_DISK_MAX_BYTES: 磁盘层容量上限，默认 2GB
+"""
+
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .executor import env_int
+
+# 计算内容哈希时每次读取的字节数
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+# 当前工具调用的结果是否可以写入缓存，由BaseTool.run在调用execute时绑定
+_cacheable_state: contextvars.ContextVar[Optional[Dict[str, bool]]] = contextvars.ContextVar(
+    "mcp_cacheable_state", default=None
+)
+
+
+@contextlib.contextmanager
+def track_cacheable() -> Iterator[Dict[str, bool]]:
+    """
+    在此上下文中执行工具，返回的字典在退出后表示结果是否可以缓存（"cacheable"）
+
+    嵌套调用的工具被标记为不可缓存时，外层调用同样不可缓存。
+    """
+    state = {"cacheable": True}
+    token = _cacheable_state.set(state)
+    try:
+        yield state
+    finally:
+        _cacheable_state.reset(token)
+        if not state["cacheable"]:
+            mark_uncacheable()
+
+
+def mark_uncacheable() -> None:
+    """
+    将当前工具调用的结果标记为不可缓存
+
+    用于结果虽然不是错误、但因临时性故障而不完整的情况（如图片OCR失败），
+    避免不完整的结果在文件变化前一直被复用。
+    """
+    state = _cacheable_state.get()
+    if state is not None:
+        state["cacheable"] = False
+
+
+class ResultCache:
+    """内存LRU + 可选磁盘层的两级结果缓存"""
+
+    def __init__(self, max_bytes: int, cache_dir: Optional[str] = None, disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # 以文件的stat信息为键，记录已计算过的内容哈希，避免重复读取未变化的文件
+        self._hash_memo: Dict[Tuple[Any, ...], str] = {}
+        self._disk_bytes: Optional[int] = None
+        self._stats = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "evictions": 0}
+
+    def file_fingerprint(self, file_path: str) -> Optional[str]:
+        """
+        计算文件指纹：解析后的真实路径、大小、修改时间和内容哈希
+
+        文件不存在或无法读取时返回None。
+        """
+        try:
+            real_path = os.path.realpath(file_path)
+            stat = os.stat(real_path)
+        except OSError:
+            return None
+
+        signature = (real_path, stat.st_size, stat.st_mtime_ns, stat.st_ino, stat.st_ctime_ns)
+        with self._lock:
+            content_hash = self._hash_memo.get(signature)
+        if content_hash is None:
+            digest = hashlib.sha256()
+            try:
+                with open(real_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+                        digest.update(chunk)
+            except OSError:
+                return None
+            content_hash = digest.hexdigest()
+            with self._lock:
+                if len(self._hash_memo) > 10000:
+                    self._hash_memo.clear()
+                self._hash_memo[signature] = content_hash
+
+        return f"{real_path}:{stat.st_size}:{stat.st_mtime_ns}:{content_hash}"
+
+    def make_key(self, tool_name: str, file_path: str, arguments: Dict[str, Any]) -> Optional[str]:
+        """根据工具名、文件指纹和其余参数生成缓存键"""
+        fingerprint = self.file_fingerprint(file_path)
+        if fingerprint is None:
+            return None
+        params = {k: v for k, v in arguments.items() if k != "file_path"}
+        raw = json.dumps([tool_name, fingerprint, params], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Any:
+        """查询缓存，未命中时返回None"""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                self._stats["memory_hits"] += 1
+        if data is None and self.cache_dir:
+            data = self._disk_get(key)
+            if data is not None:
+                with self._lock:
+                    self._stats["hits"] += 1
+                    self._stats["disk_hits"] += 1
+                self._memory_put(key, data)
+        if data is None:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        return pickle.loads(data)
+
+    def put(self, key: str, value: Any) -> None:
+        """写入缓存"""
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._memory_put(key, data)
+        if self.cache_dir:
+            self._disk_put(key, data)
+
+    def stats(self) -> Dict[str, Any]:
+        """返回命中/未命中计数和容量信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            stats["max_bytes"] = self.max_bytes
+        if self.cache_dir:
+            stats["disk_max_bytes"] = self.disk_max_bytes
+            # 磁盘层占用在首次写入时才会统计
+            if self._disk_bytes is not None:
+                stats["disk_bytes"] = self._disk_bytes
+        return stats
+
+    def clear(self) -> None:
+        """清空内存层"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _memory_put(self, key: str, data: bytes) -> None:
+        # 单个结果超过容量上限时不放入内存层
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._stats["evictions"] += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pkl")
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # 更新访问时间，作为磁盘层LRU淘汰的依据
+            os.utime(path)
+            return data
+        except OSError:
+            return None
+
+    def _disk_put(self, key: str, data: bytes) -> None:
+        if len(data) > self.disk_max_bytes:
+            return
+        path = self._disk_path(key)
+        try:
+            # 覆盖已有条目时，容量统计中减去旧文件的大小
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += len(data) - replaced
+        self._disk_evict()
+
+    def _disk_evict(self) -> None:
+        """磁盘层超过容量上限时，按最近访问时间淘汰最旧的条目"""
+        with self._lock:
+            if self._disk_bytes is not None and self._disk_bytes <= self.disk_max_bytes:
+                return
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if not name.endswith(".pkl"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        # 淘汰到容量的90%，避免每次写入都触发全量扫描
+        target = int(self.disk_max_bytes * 0.9) if total > self.disk_max_bytes else total
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self._stats["evictions"] += 1
+        with self._lock:
+            self._disk_bytes = total
+
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """获取全局共享的结果缓存，缓存被禁用时返回None"""
+    global _result_cache
+    if os.environ.get("MCP_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache(
+                max_bytes=env_int("MCP_CACHE_MAX_BYTES", 256 * 1024 * 1024),
+                cache_dir=os.environ.get("MCP_CACHE_DIR") or None,
+                disk_max_bytes=env_int("MCP_CACHE_DISK_MAX_BYTES", 2 * 1024 * 1024 * 1024),
+            )
+        return _result_cache
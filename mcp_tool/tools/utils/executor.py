@@ -0,0 +1,133 @@
+"""
+共享工作池，用于将阻塞的解析任务移出事件循环
+
+提供两种工作池：
+- thread: 线程池，适用于会释放GIL的任务（文件I/O、调用tesseract子进程等）
+- process: 进程池，适用于纯Python的CPU密集型解析任务
+
+工作池大小可通过环境变量配置：
+- MCP_THREAD_WORKERS: 线程池大小，默认 min(32, CPU核数 + 4)
+- MCP_PROCESS_WORKERS: 进程池大小，默认为CPU核数
+- MCP_PROCESS_START_METHOD: 进程启动方式，默认 spawn（避免在多线程的服务进程中fork）
+
+进程池的工作进程启动时设置OMP_THREAD_LIMIT=1（未设置时），使其中并行运行的多个tesseract
+各只使用一个OpenMP线程，避免CPU超额订阅；该设置不影响服务进程本身。
+"""
+
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+THREAD_POOL = "thread"
+PROCESS_POOL = "process"
+
+_executors: Dict[str, Executor] = {}
+_lock = threading.Lock()
+
+
+def env_int(name: str, default: int) -> int:
+    """读取正整数类型的环境变量，无效值时返回默认值"""
+    try:
+        value = int(os.environ.get(name, ""))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+def env_float(name: str, default: float) -> float:
+    """读取非负浮点数类型的环境变量，无效值时返回默认值"""
+    try:
+        value = float(os.environ.get(name, ""))
+    except ValueError:
+        return default
+    return value if value >= 0 else default
+
+
+def pool_workers(kind: str) -> int:
+    """返回指定类型工作池的工作线程（进程）数"""
+    cpu_count = os.cpu_count() or 1
+    if kind == THREAD_POOL:
+        return env_int("MCP_THREAD_WORKERS", min(32, cpu_count + 4))
+    if kind == PROCESS_POOL:
+        return env_int("MCP_PROCESS_WORKERS", cpu_count)
+    raise ValueError(f"Unknown worker pool: {kind}")
+
+
+def _init_process_worker() -> None:
+    """进程池工作进程的初始化函数"""
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def _create_executor(kind: str) -> Executor:
+    if kind == THREAD_POOL:
+        return ThreadPoolExecutor(
+            max_workers=pool_workers(kind),
+            thread_name_prefix="mcp-tool",
+        )
+    if kind == PROCESS_POOL:
+        start_method = os.environ.get("MCP_PROCESS_START_METHOD", "spawn")
+        return ProcessPoolExecutor(
+            max_workers=pool_workers(kind),
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_process_worker,
+        )
+    raise ValueError(f"Unknown worker pool: {kind}")
+
+
+def get_executor(kind: str = THREAD_POOL) -> Executor:
+    """获取（必要时创建）指定类型的共享工作池"""
+    with _lock:
+        executor = _executors.get(kind)
+        if executor is None:
+            executor = _create_executor(kind)
+            _executors[kind] = executor
+        return executor
+
+
+def _call_in_process(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    在子进程中执行函数
+
+    部分第三方异常（如pytesseract.TesseractNotFoundError）无法在父进程中反序列化，
+    会导致整个进程池损坏，这里将其转换为RuntimeError后再抛出。
+    """
+    try:
+        return func(*args, **kwargs)
+    except Exception as e:
+        try:
+            pickle.loads(pickle.dumps(e))
+        except Exception:
+            raise RuntimeError(f"{type(e).__name__}: {e}") from None
+        raise
+
+
+async def run_in_pool(kind: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    在共享工作池中执行阻塞函数
+
+    使用进程池时，func及其参数和返回值必须可以被pickle序列化，
+    因此应当传入模块级函数或类的静态方法。
+    使用线程池时，func在调用方的上下文（contextvars）副本中执行，
+    可以读取当前调用绑定的进度上报器和指标信息。
+    """
+    loop = asyncio.get_running_loop()
+    if kind == PROCESS_POOL:
+        call = functools.partial(_call_in_process, func, *args, **kwargs)
+    else:
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(kind), call)
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """关闭所有共享工作池，在服务退出时调用"""
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,193 @@
+"""
+从HTML中提取可读文本
+
+基于标准库html.parser，去掉脚本、样式等不可见内容，保留标题、段落、列表、链接、
+代码块和表格的基本结构，输出纯文本或markdown。
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import List, Optional
+
+# 内容不可见、需要整体跳过的标签
+_SKIPPED_TAGS = {"script", "style", "noscript", "template", "svg", "canvas", "iframe", "head", "object"}
+
+# 块级标签，前后需要换行
+_BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "header", "footer", "nav", "aside",
+    "ul", "ol", "dl", "dt", "dd", "table", "thead", "tbody", "tfoot", "form",
+    "blockquote", "figure", "figcaption", "address", "details", "summary", "hr",
+}
+
+_HEADING_TAGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+
+# 没有结束标签的元素
+_VOID_TAGS = {"br", "hr", "img", "input", "meta", "link", "area", "base", "col", "embed", "source", "track", "wbr"}
+
+_WHITESPACE = re.compile(r"[ \t\r\n\f\v]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self, markdown: bool):
+        super().__init__(convert_charrefs=True)
+        self.markdown = markdown
+        self.parts: List[str] = []
+        self.title: Optional[str] = None
+        self._skip_depth = 0
+        self._pre_depth = 0
+        self._in_title = False
+        self._links: List[Optional[str]] = []
+        self._list_stack: List[List[int]] = []
+        self._row_cells = 0
+
+    def _newline(self, count: int = 1) -> None:
+        """保证输出以至少count个换行结尾"""
+        trailing = 0
+        for part in reversed(self.parts):
+            stripped = part.rstrip("\n")
+            trailing += len(part) - len(stripped)
+            if stripped:
+                break
+        if self.parts and trailing < count:
+            self.parts.append("\n" * (count - trailing))
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+        if tag in _SKIPPED_TAGS:
+            if tag not in _VOID_TAGS:
+                self._skip_depth += 1
+            return
+        if self._skip_depth:
+            return
+
+        if tag in _HEADING_TAGS:
+            self._newline(2)
+            if self.markdown:
+                self.parts.append("#" * _HEADING_TAGS[tag] + " ")
+        elif tag == "br":
+            self._newline()
+        elif tag == "hr":
+            self._newline(2)
+            if self.markdown:
+                self.parts.append("---")
+            self._newline(2)
+        elif tag in ("ul", "ol"):
+            self._list_stack.append([0 if tag == "ol" else -1])
+            self._newline()
+        elif tag == "li":
+            self._newline()
+            indent = "  " * max(len(self._list_stack) - 1, 0)
+            counter = self._list_stack[-1] if self._list_stack else [-1]
+            if counter[0] >= 0:
+                counter[0] += 1
+                self.parts.append(f"{indent}{counter[0]}. ")
+            else:
+                self.parts.append(f"{indent}- ")
+        elif tag == "pre":
+            self._pre_depth += 1
+            self._newline(2)
+            if self.markdown:
+                self.parts.append("```\n")
+        elif tag == "code" and not self._pre_depth and self.markdown:
+            self.parts.append("`")
+        elif tag in ("b", "strong") and self.markdown:
+            self.parts.append("**")
+        elif tag in ("i", "em") and self.markdown:
+            self.parts.append("*")
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            self._links.append(href)
+            if self.markdown and href and not href.startswith(("#", "javascript:")):
+                self.parts.append("[")
+        elif tag == "img" and self.markdown:
+            alt = dict(attrs).get("alt")
+            if alt:
+                self.parts.append(f"![{alt}]")
+        elif tag == "tr":
+            self._row_cells = 0
+            self._newline()
+        elif tag in ("td", "th"):
+            if self._row_cells:
+                self.parts.append(" | ")
+            self._row_cells += 1
+        elif tag in _BLOCK_TAGS:
+            self._newline(2)
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+            return
+        if self._skip_depth:
+            return
+
+        if tag in _HEADING_TAGS:
+            self._newline(2)
+        elif tag in ("ul", "ol"):
+            if self._list_stack:
+                self._list_stack.pop()
+            self._newline()
+        elif tag == "pre":
+            self._pre_depth = max(self._pre_depth - 1, 0)
+            if self.markdown:
+                self.parts.append("\n```")
+            self._newline(2)
+        elif tag == "code" and not self._pre_depth and self.markdown:
+            self.parts.append("`")
+        elif tag in ("b", "strong") and self.markdown:
+            self.parts.append("**")
+        elif tag in ("i", "em") and self.markdown:
+            self.parts.append("*")
+        elif tag == "a":
+            href = self._links.pop() if self._links else None
+            if self.markdown and href and not href.startswith(("#", "javascript:")):
+                self.parts.append(f"]({href})")
+        elif tag in _BLOCK_TAGS:
+            self._newline(2)
+
+    def handle_data(self, data):
+        if self._in_title and self.title is None:
+            self.title = _WHITESPACE.sub(" ", data).strip() or None
+        if self._skip_depth:
+            return
+        if self._pre_depth:
+            self.parts.append(data)
+            return
+        text = _WHITESPACE.sub(" ", data)
+        # 行首或已有空格之后的空白来自源码缩进，直接去掉
+        if not self.parts or self.parts[-1].endswith(("\n", " ")):
+            text = text.lstrip(" ")
+        if text:
+            self.parts.append(text)
+
+    def get_text(self) -> str:
+        lines = [line.rstrip() for line in "".join(self.parts).split("\n")]
+        text = _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+        if self.markdown and self.title and not text.startswith("# "):
+            text = f"# {self.title}\n\n{text}"
+        return text
+
+
+def is_html(content_type: Optional[str], text: str) -> bool:
+    """根据Content-Type或内容开头判断是否为HTML"""
+    if content_type:
+        return "html" in content_type.lower()
+    head = text[:1024].lstrip().lower()
+    return head.startswith(("<!doctype html", "<html"))
+
+
+def html_to_text(html: str, markdown: bool = False) -> str:
+    """
+    将HTML转换为可读文本
+
+    Args:
+        html: HTML源码
+        markdown: 为True时输出markdown（标题、列表、链接、代码块等），否则输出纯文本
+    """
+    extractor = _TextExtractor(markdown)
+    extractor.feed(html)
+    extractor.close()
+    return extractor.get_text()
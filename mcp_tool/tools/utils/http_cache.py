@@ -0,0 +1,225 @@
+"""
+网页响应缓存，以请求URL为键
+
+按响应体字节数淘汰的内存LRU缓存，遵循响应的Cache-Control：
+- no-store 或 Vary: * 的响应不缓存
+- max-age / s-maxage / Expires 决定新鲜期，缺失时使用 MCP_URL_CACHE_TTL，
+  新鲜期不超过 MCP_URL_CACHE_MAX_TTL
+- no-cache 的响应会被缓存，但每次使用前都需要重新验证
+- 过期的条目如果带有ETag或Last-Modified，会保留下来用于条件请求
+  （If-None-Match / If-Modified-Since），服务端返回304时直接复用缓存的响应体
+
+配置项：
+- MCP_URL_CACHE_ENABLED: 是否启用缓存，默认 true
+- MCP_URL_CACHE_MAX_BYTES: 容量上限，默认 64MB
+- MCP_URL_CACHE_TTL: 响应未声明新鲜期时的默认新鲜期（秒），默认 300
+- MCP_URL_CACHE_MAX_TTL: 新鲜期上限（秒），默认 86400
+"""
+
+import email.utils
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional
+
+from .executor import env_int
+
+# 缓存状态，写入工具结果的元数据
+CACHE_HIT = "hit"
+CACHE_MISS = "miss"
+CACHE_REVALIDATED = "revalidated"
+CACHE_EXPIRED = "expired"
+CACHE_BYPASS = "bypass"
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """解析Cache-Control头，返回 指令 -> 参数 的字典（指令名为小写）"""
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip().strip('"') or None
+    return directives
+
+
+def _parse_seconds(value: Optional[str]) -> Optional[int]:
+    try:
+        return max(int(value), 0) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class CachedResponse:
+    """缓存的响应：响应体、编码、校验器和新鲜期"""
+
+    __slots__ = ("url", "content", "encoding", "headers", "stored_at", "expires_at", "no_cache")
+
+    def __init__(self, url: str, content: bytes, encoding: Optional[str], headers: Dict[str, str],
+                 stored_at: float, expires_at: float, no_cache: bool):
+        self.url = url
+        self.content = content
+        self.encoding = encoding
+        self.headers = headers
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+        self.no_cache = no_cache
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    @property
+    def age(self) -> float:
+        return max(time.time() - self.stored_at, 0.0)
+
+    def is_fresh(self) -> bool:
+        return not self.no_cache and time.time() < self.expires_at
+
+    def has_validators(self) -> bool:
+        return "etag" in self.headers or "last-modified" in self.headers
+
+    def validators(self) -> Dict[str, str]:
+        """条件请求需要附加的请求头"""
+        headers = {}
+        if "etag" in self.headers:
+            headers["If-None-Match"] = self.headers["etag"]
+        if "last-modified" in self.headers:
+            headers["If-Modified-Since"] = self.headers["last-modified"]
+        return headers
+
+
+class HttpResponseCache:
+    """按响应体大小淘汰的LRU网页响应缓存"""
+
+    # 需要保存的响应头：校验器和内容类型
+    _KEPT_HEADERS = ("etag", "last-modified", "content-type", "cache-control")
+
+    def __init__(self, max_bytes: int, default_ttl: int, max_ttl: int):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "revalidated": 0, "expired": 0, "evictions": 0}
+
+    def freshness_lifetime(self, headers: Mapping[str, str]) -> Optional[float]:
+        """
+        根据响应头计算新鲜期（秒），不可缓存时返回None
+        """
+        directives = parse_cache_control(headers.get("cache-control"))
+        if "no-store" in directives or headers.get("vary", "").strip() == "*":
+            return None
+
+        lifetime = _parse_seconds(directives.get("s-maxage"))
+        if lifetime is None:
+            lifetime = _parse_seconds(directives.get("max-age"))
+        if lifetime is None and "expires" in headers:
+            expires = _parse_http_date(headers.get("expires"))
+            date = _parse_http_date(headers.get("date")) or time.time()
+            lifetime = max(expires - date, 0) if expires is not None else 0
+        if lifetime is None:
+            lifetime = self.default_ttl
+        # 响应在上游缓存中已经存在的时间
+        lifetime -= _parse_seconds(headers.get("age")) or 0
+        return max(min(lifetime, self.max_ttl), 0)
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """
+        查找缓存的响应；过期且无法重新验证的条目会被删除
+
+        返回的条目可能已经过期，调用方需要用is_fresh判断是否需要条件请求。
+        """
+        entry = self._entries.get(url)
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+        if not entry.is_fresh() and not entry.has_validators():
+            self._remove(url)
+            self._stats["misses"] += 1
+            return None
+        self._entries.move_to_end(url)
+        if entry.is_fresh():
+            self._stats["hits"] += 1
+        return entry
+
+    def put(self, url: str, content: bytes, encoding: Optional[str], headers: Mapping[str, str]) -> Optional[CachedResponse]:
+        """缓存一个200响应，不可缓存或超过容量时返回None"""
+        lifetime = self.freshness_lifetime(headers)
+        if lifetime is None or len(content) > self.max_bytes:
+            self._remove(url)
+            return None
+        directives = parse_cache_control(headers.get("cache-control"))
+        kept = {name: headers[name] for name in self._KEPT_HEADERS if name in headers}
+        now = time.time()
+        entry = CachedResponse(url, content, encoding, kept, now, now + lifetime, "no-cache" in directives)
+        if not entry.is_fresh() and not entry.has_validators():
+            # 无法复用的响应不占用缓存空间
+            self._remove(url)
+            return None
+
+        self._remove(url)
+        self._entries[url] = entry
+        self._bytes += len(content)
+        while self._bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+        return entry
+
+    def revalidated(self, entry: CachedResponse, headers: Mapping[str, str]) -> CachedResponse:
+        """服务端返回304时，用新的响应头刷新条目的新鲜期"""
+        merged = {**entry.headers, **{name: headers[name] for name in self._KEPT_HEADERS if name in headers}}
+        lifetime = self.freshness_lifetime({**merged, **headers}) or 0
+        entry.headers = merged
+        entry.stored_at = time.time()
+        entry.expires_at = entry.stored_at + lifetime
+        entry.no_cache = "no-cache" in parse_cache_control(merged.get("cache-control"))
+        self._stats["revalidated"] += 1
+        return entry
+
+    def record_expired(self) -> None:
+        """过期条目重新验证后内容已变化"""
+        self._stats["expired"] += 1
+
+    def _remove(self, url: str) -> None:
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            self._bytes -= len(entry.content)
+
+    def stats(self) -> Dict[str, Any]:
+        """返回命中/未命中计数和容量信息"""
+        stats = dict(self._stats)
+        stats["entries"] = len(self._entries)
+        stats["bytes"] = self._bytes
+        stats["max_bytes"] = self.max_bytes
+        return stats
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+
+_http_cache: Optional[HttpResponseCache] = None
+
+
+def get_http_cache() -> Optional[HttpResponseCache]:
+    """获取全局共享的网页响应缓存，缓存被禁用时返回None"""
+    global _http_cache
+    if os.environ.get("MCP_URL_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    if _http_cache is None:
+        _http_cache = HttpResponseCache(
+            max_bytes=env_int("MCP_URL_CACHE_MAX_BYTES", 64 * 1024 * 1024),
+            default_ttl=env_int("MCP_URL_CACHE_TTL", 300),
+            max_ttl=env_int("MCP_URL_CACHE_MAX_TTL", 86400),
+        )
+    return _http_cache
@@ -0,0 +1,149 @@
+"""
+共享的HTTP客户端连接池
+
+各工具通过get_http_client获取服务进程内共享的httpx.AsyncClient，多次调用复用已建立的
+TCP/TLS连接，避免每次请求都重新进行DNS解析和握手。客户端按名称区分，同一名称第一次
+获取时按传入的参数创建（如MaxKB需要关闭证书校验），之后直接复用；服务退出时由
+server.py调用close_http_clients统一关闭。
+
+连接池可通过环境变量配置：
+- MCP_HTTP_MAX_CONNECTIONS: 每个客户端的最大连接数，默认100
+- MCP_HTTP_MAX_KEEPALIVE: 最大保持连接数，默认20
+- MCP_HTTP_KEEPALIVE_EXPIRY: 空闲连接的保持时间（秒），默认60
+- MCP_HTTP_PER_HOST_CONNECTIONS: 同一主机的最大并发请求数，默认6，0表示不限制
+- MCP_HTTP2: 设置为true时启用HTTP/2（需要安装h2，未安装时回退到HTTP/1.1）
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from .executor import env_int
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CLIENT = "default"
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """响应体读取完毕或关闭时释放主机并发名额"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            release, self._release = self._release, None
+            if release is not None:
+                release()
+
+
+class HostLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    限制同一主机并发请求数的传输层
+
+    httpx的连接池只能限制总连接数，这里按 (scheme, host, port) 为每个主机维护一个信号量，
+    请求在发送前获取名额，响应关闭后释放，避免批量请求时集中压垮同一个站点。
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, per_host: int):
+        self._transport = transport
+        self._per_host = per_host
+        self._semaphores: Dict[Tuple[str, str, Optional[int]], asyncio.Semaphore] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host_key = (request.url.scheme, request.url.host, request.url.port)
+        semaphore = self._semaphores.get(host_key)
+        if semaphore is None:
+            semaphore = self._semaphores[host_key] = asyncio.Semaphore(self._per_host)
+        await semaphore.acquire()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            semaphore.release()
+            raise
+        response.stream = _ReleasingStream(response.stream, semaphore.release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def http2_available() -> bool:
+    """是否安装了HTTP/2所需的h2库"""
+    return importlib.util.find_spec("h2") is not None
+
+
+def _create_client(
+    verify: bool = True,
+    retries: int = 0,
+    timeout: Optional[httpx.Timeout] = None,
+    socket_options: Optional[list] = None,
+    **client_options: Any,
+) -> httpx.AsyncClient:
+    http2 = os.environ.get("MCP_HTTP2", "false").lower() == "true"
+    if http2 and not http2_available():
+        logger.warning("MCP_HTTP2=true 但未安装h2，回退到HTTP/1.1")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_connections=env_int("MCP_HTTP_MAX_CONNECTIONS", 100),
+        max_keepalive_connections=env_int("MCP_HTTP_MAX_KEEPALIVE", 20),
+        keepalive_expiry=float(env_int("MCP_HTTP_KEEPALIVE_EXPIRY", 60)),
+    )
+    transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(
+        verify=verify,
+        http1=True,
+        http2=http2,
+        limits=limits,
+        retries=retries,
+        socket_options=socket_options,
+    )
+    per_host = env_int("MCP_HTTP_PER_HOST_CONNECTIONS", 6)
+    if per_host > 0:
+        transport = HostLimitedTransport(transport, per_host)
+
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=timeout or httpx.Timeout(10.0, connect=5.0),
+        **client_options,
+    )
+
+
+def get_http_client(name: str = DEFAULT_CLIENT, **options: Any) -> httpx.AsyncClient:
+    """
+    获取指定名称的共享HTTP客户端，第一次获取时创建
+
+    Args:
+        name: 客户端名称，不同的连接配置使用不同的名称
+        options: 仅在创建时生效，支持verify、retries、timeout、socket_options，
+            以及httpx.AsyncClient的其他参数（如headers、follow_redirects）
+    """
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _clients[name] = _create_client(**options)
+    return client
+
+
+async def close_http_clients() -> None:
+    """关闭所有共享HTTP客户端，在服务退出时调用"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"关闭HTTP客户端失败: {e}")
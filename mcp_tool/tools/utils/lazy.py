@@ -0,0 +1,65 @@
+"""
+第三方重型依赖的延迟导入
+
+pandas、PyMuPDF、PIL、pytesseract等库导入耗时较长。工具模块在加载时只需要提供
+名称、描述和input_schema，真正用到这些库是在第一次调用工具时。lazy_import返回一个
+模块代理对象，第一次访问其属性时才导入真实模块，之后的访问直接转发给真实模块：
+
+    fitz = lazy_import("fitz")   # 此时不会导入PyMuPDF
+    doc = fitz.open(file_path)   # 第一次使用时导入
+
+代理对象可以被pickle（按模块名还原），因此在进程池中调用的函数也可以直接使用。
+"""
+
+import importlib
+import sys
+import threading
+import types
+from typing import Any
+
+_import_lock = threading.Lock()
+
+
+class LazyModule(types.ModuleType):
+    """在第一次访问属性时导入的模块代理"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with _import_lock:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __reduce__(self):
+        return lazy_import, (self.__name__,)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    返回模块的延迟导入代理；模块已经导入时直接返回真实模块
+
+    Args:
+        name: 完整模块名，如 "fitz"、"PIL.Image"
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
@@ -0,0 +1,253 @@
+"""
+工具调用的运行指标
+
+服务端在每次调用工具时通过track_call记录调用次数、耗时分布、返回字节数、错误数和
+正在执行的调用数；工具内部通过phase记录各阶段（打开文件、提取文本、OCR、序列化等）
+的耗时。指标以Prometheus文本格式输出：
+- SSE模式：GET /metrics
+- stdio模式：设置MCP_METRICS_FILE后定期写入该文件（间隔MCP_METRICS_INTERVAL秒，默认15），
+  服务退出时再写入一次；文件以原子替换的方式更新，可直接供node_exporter的textfile收集器读取
+
+设置MCP_METRICS_ENABLED=false可关闭指标记录。
+"""
+
+import bisect
+import contextlib
+import os
+import tempfile
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import mcp.types as types
+
+# 耗时分布的桶上界（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_current_tool: ContextVar[Optional[str]] = ContextVar("mcp_tool_metrics_tool", default=None)
+
+
+class Histogram:
+    """固定桶的累积分布，与Prometheus histogram的语义一致"""
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """返回 (桶上界, 累计数量) 列表，最后一项为 +Inf"""
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((f"{bound:g}", total))
+        result.append(("+Inf", self.count))
+        return result
+
+
+class ToolCall:
+    """一次工具调用的记录，由track_call创建"""
+
+    def __init__(self):
+        self.error = False
+        self.bytes = 0
+
+    def set_result(self, results: list) -> None:
+        """记录返回内容的字节数，以及结果是否为错误信息"""
+        from .. import BaseTool
+
+        self.error = BaseTool.is_error_result(results)
+        self.bytes = sum(_content_size(item) for item in results)
+
+
+def _content_size(item: Any) -> int:
+    if isinstance(item, types.TextContent):
+        return len(item.text.encode("utf-8"))
+    if isinstance(item, types.ImageContent):
+        return len(item.data)
+    return 0
+
+
+class MetricsRegistry:
+    """进程内的指标存储，工作线程中记录阶段耗时时也是安全的"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._bytes: Dict[str, int] = {}
+        self._latency: Dict[str, Histogram] = {}
+        self._phases: Dict[Tuple[str, str], Histogram] = {}
+        self._collectors: Dict[str, Callable[[], Optional[Dict[str, Any]]]] = {}
+        self.started_at = time.time()
+
+    def call_started(self, tool: str) -> None:
+        with self._lock:
+            self._in_flight[tool] = self._in_flight.get(tool, 0) + 1
+
+    def call_finished(self, tool: str, duration: float, call: ToolCall) -> None:
+        with self._lock:
+            self._in_flight[tool] = self._in_flight.get(tool, 1) - 1
+            self._calls[tool] = self._calls.get(tool, 0) + 1
+            if call.error:
+                self._errors[tool] = self._errors.get(tool, 0) + 1
+            self._bytes[tool] = self._bytes.get(tool, 0) + call.bytes
+            self._latency.setdefault(tool, Histogram()).observe(duration)
+
+    def observe_phase(self, tool: str, phase_name: str, duration: float) -> None:
+        with self._lock:
+            self._phases.setdefault((tool, phase_name), Histogram()).observe(duration)
+
+    def register_collector(self, name: str, collect: Callable[[], Optional[Dict[str, Any]]]) -> None:
+        """
+        注册一个在输出时调用的统计来源（如缓存的stats），返回None表示当前不可用
+
+        统计中的数值项输出为 mcp_cache_<键>{cache="<name>"}。
+        """
+        self._collectors[name] = collect
+
+    def snapshot(self) -> Dict[str, Any]:
+        """返回当前指标的副本，供测试和基准脚本使用"""
+        with self._lock:
+            return {
+                "calls": dict(self._calls),
+                "errors": dict(self._errors),
+                "in_flight": dict(self._in_flight),
+                "bytes": dict(self._bytes),
+                "latency": {tool: (h.count, h.sum) for tool, h in self._latency.items()},
+                "phases": {key: (h.count, h.sum) for key, h in self._phases.items()},
+            }
+
+    def render_prometheus(self) -> str:
+        """以Prometheus文本格式输出全部指标"""
+        lines: List[str] = []
+
+        def header(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name: str, labels: str, hist: Histogram) -> None:
+            for bound, count in hist.cumulative():
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{name}_sum{{{labels}}} {hist.sum:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {hist.count}")
+
+        with self._lock:
+            header("mcp_tool_calls_total", "counter", "Tool calls completed")
+            for tool, value in sorted(self._calls.items()):
+                lines.append(f'mcp_tool_calls_total{{tool="{tool}"}} {value}')
+            header("mcp_tool_errors_total", "counter", "Tool calls that returned an error")
+            for tool in sorted(self._calls):
+                lines.append(f'mcp_tool_errors_total{{tool="{tool}"}} {self._errors.get(tool, 0)}')
+            header("mcp_tool_in_flight", "gauge", "Tool calls currently running")
+            for tool, value in sorted(self._in_flight.items()):
+                lines.append(f'mcp_tool_in_flight{{tool="{tool}"}} {value}')
+            header("mcp_tool_response_bytes_total", "counter", "Bytes of content returned by tool calls")
+            for tool, value in sorted(self._bytes.items()):
+                lines.append(f'mcp_tool_response_bytes_total{{tool="{tool}"}} {value}')
+            header("mcp_tool_duration_seconds", "histogram", "Tool call latency")
+            for tool, hist in sorted(self._latency.items()):
+                histogram("mcp_tool_duration_seconds", f'tool="{tool}"', hist)
+            header("mcp_tool_phase_duration_seconds", "histogram", "Time spent in each phase of a tool call")
+            for (tool, phase_name), hist in sorted(self._phases.items()):
+                histogram("mcp_tool_phase_duration_seconds", f'tool="{tool}",phase="{phase_name}"', hist)
+            collectors = list(self._collectors.items())
+
+        cache_lines: Dict[str, List[str]] = {}
+        for name, collect in collectors:
+            try:
+                stats = collect()
+            except Exception:
+                continue
+            for key, value in (stats or {}).items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    cache_lines.setdefault(key, []).append(f'mcp_cache_{key}{{cache="{name}"}} {value}')
+        for key, values in sorted(cache_lines.items()):
+            header(f"mcp_cache_{key}", "gauge", f"Cache statistic '{key}'")
+            lines.extend(values)
+
+        lines.append("# HELP mcp_process_start_time_seconds Start time of the server process")
+        lines.append("# TYPE mcp_process_start_time_seconds gauge")
+        lines.append(f"mcp_process_start_time_seconds {self.started_at:.3f}")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path: str) -> None:
+        """以原子替换的方式将指标写入文件"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.render_prometheus())
+            os.replace(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            raise
+
+
+def metrics_enabled() -> bool:
+    return os.environ.get("MCP_METRICS_ENABLED", "true").lower() not in ("0", "false", "no")
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """获取全局共享的指标存储"""
+    return _registry
+
+
+@contextlib.contextmanager
+def track_call(tool: str) -> Iterator[ToolCall]:
+    """
+    记录一次工具调用，并在当前上下文中绑定工具名供phase使用
+
+    调用方在拿到结果后调用call.set_result(results)；抛出异常的调用计为错误。
+    """
+    call = ToolCall()
+    if not metrics_enabled():
+        yield call
+        return
+    _registry.call_started(tool)
+    token = _current_tool.set(tool)
+    start = time.perf_counter()
+    try:
+        yield call
+    except BaseException:
+        call.error = True
+        raise
+    finally:
+        _current_tool.reset(token)
+        _registry.call_finished(tool, time.perf_counter() - start, call)
+
+
+@contextlib.contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    记录当前工具调用中某个阶段的耗时
+
+    不在track_call范围内（或在进程池的子进程中）调用时不做任何事。
+    """
+    tool = _current_tool.get()
+    if tool is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _registry.observe_phase(tool, name, time.perf_counter() - start)
@@ -0,0 +1,313 @@
+"""
+OCR辅助函数，将图片识别任务并行分发到OCR工作进程
+
+识别结果以"图片内容哈希 + OCR语言"为键进行缓存：同一文档中重复出现的图片
+（信头、logo、印章等）只识别一次；设置持久化存储后，跨文档、跨重启同样有效。
+
+配置项：
+- MCP_OCR_POOL: OCR使用的工作池，默认 process
+- MCP_OCR_CONCURRENCY: 单次调用同时进行的OCR任务数上限，默认等于进程池大小
+- MCP_OCR_CACHE_ENABLED: 是否启用OCR结果缓存，默认 true
+- MCP_OCR_CACHE_MAX_ENTRIES: 内存层最多缓存的条目数，默认 10000
+- MCP_OCR_CACHE_PATH: 持久化存储（SQLite）路径，默认为 MCP_CACHE_DIR/ocr.sqlite3，均未设置时不启用
+- MCP_OCR_CACHE_DISK_MAX_ENTRIES: 持久化存储最多保留的条目数，默认 200000
+- MCP_OCR_MAX_SIDE: 识别前将图片的长边缩小到不超过该像素数，默认 2500
+- MCP_OCR_MIN_SIDE / MCP_OCR_MIN_PIXELS: 短边或像素数低于该值的图片不做识别，默认 16 / 4096
+- MCP_OCR_MIN_ENTROPY: 灰度熵（比特）低于该值的图片（纯色块、线条、空白）不做识别，默认 0.05
+"""
+
+import asyncio
+import hashlib
+import io
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .executor import PROCESS_POOL, THREAD_POOL, env_float, env_int, run_in_pool
+from .lazy import lazy_import
+
+pytesseract = lazy_import("pytesseract")
+Image = lazy_import("PIL.Image")
+
+DEFAULT_OCR_LANG = "chi_sim+eng"
+
+# 跳过识别的原因
+SKIP_SMALL = "small"
+SKIP_LOW_ENTROPY = "low_entropy"
+
+_LANG_PATTERN = re.compile(r"^[A-Za-z0-9_]+(\+[A-Za-z0-9_]+)*$")
+
+
+def validate_ocr_lang(lang: str) -> str:
+    """检查OCR语言参数（如'eng'、'chi_sim+eng'）的格式，无效时抛出ValueError"""
+    if not isinstance(lang, str) or not _LANG_PATTERN.match(lang):
+        raise ValueError(f"无效的OCR语言: {lang}，应为tesseract语言代码，多个语言用'+'连接，例如'chi_sim+eng'")
+    return lang
+
+
+def prepare_image(image: "Image.Image") -> "Image.Image":
+    """识别前转换为灰度图，并将长边缩小到MCP_OCR_MAX_SIDE以内"""
+    max_side = env_int("MCP_OCR_MAX_SIDE", 2500)
+    if image.mode != "L":
+        image = image.convert("L")
+    if max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    return image
+
+
+def image_skip_reason(image_bytes: bytes, width: Optional[int] = None, height: Optional[int] = None) -> Optional[str]:
+    """
+    判断图片是否值得识别（同步执行，运行在工作池中）
+
+    图标、分隔线等尺寸过小的图片，以及纯色块、空白等灰度熵过低的图片不含可识别的文字。
+    已知图片尺寸时（如PDF中的图片信息）先按尺寸判断，不必解码图片。
+
+    Returns:
+        跳过原因（SKIP_SMALL或SKIP_LOW_ENTROPY），需要识别时返回None
+    """
+    min_side = env_int("MCP_OCR_MIN_SIDE", 16)
+    min_pixels = env_int("MCP_OCR_MIN_PIXELS", 4096)
+    if width and height and (min(width, height) < min_side or width * height < min_pixels):
+        return SKIP_SMALL
+
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+        width, height = image.size
+        if min(width, height) < min_side or width * height < min_pixels:
+            return SKIP_SMALL
+        # 在缩略图上计算灰度直方图的熵，JPEG可直接以低分辨率解码
+        image.draft("L", (256, 256))
+        image = image.convert("L")
+        image.thumbnail((256, 256))
+        entropy = image.entropy()
+    except Exception:
+        # 无法解码的图片交给OCR处理，由其报告错误
+        return None
+    if entropy < env_float("MCP_OCR_MIN_ENTROPY", 0.05):
+        return SKIP_LOW_ENTROPY
+    return None
+
+
+def ocr_image(image_bytes: bytes, lang: str = DEFAULT_OCR_LANG) -> str:
+    """
+    对图片进行OCR文字识别（同步执行，运行在工作池中）
+
+    在进程池中执行时，工作进程已将OMP_THREAD_LIMIT设为1（见executor），避免并行的tesseract超额订阅CPU。
+    """
+    # 将二进制数据转换为PIL Image对象，灰度化并缩小后再识别
+    image = prepare_image(Image.open(io.BytesIO(image_bytes)))
+    return pytesseract.image_to_string(image, lang=lang)
+
+
+def _timed_ocr_image(image_bytes: bytes, lang: str) -> Tuple[str, float]:
+    """识别图片并返回在工作进程中实际花费的时间，不含排队和进程启动时间"""
+    start = time.perf_counter()
+    text = ocr_image(image_bytes, lang)
+    return text, time.perf_counter() - start
+
+
+def get_ocr_concurrency(concurrency: Optional[int] = None) -> int:
+    """获取OCR并发数，参数优先，其次为环境变量"""
+    if concurrency and concurrency > 0:
+        return concurrency
+    default = env_int("MCP_PROCESS_WORKERS", os.cpu_count() or 1)
+    return env_int("MCP_OCR_CONCURRENCY", default)
+
+
+class OcrCache:
+    """OCR结果缓存：内存LRU + 可选的SQLite持久化存储"""
+
+    def __init__(self, max_entries: int, db_path: Optional[str] = None, db_max_entries: int = 0):
+        self.max_entries = max_entries
+        self.db_max_entries = db_max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_writes = 0
+        self._stats = {"hits": 0, "misses": 0}
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_results ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_ocr_accessed ON ocr_results(accessed)")
+            self._db.commit()
+
+    @staticmethod
+    def make_key(image_bytes: bytes, lang: str) -> str:
+        """根据图片内容哈希和OCR语言生成缓存键"""
+        return f"{hashlib.sha256(image_bytes).hexdigest()}:{lang}"
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """批量查询缓存，返回命中的条目"""
+        found: Dict[str, str] = {}
+        missing = []
+        total = 0
+        with self._lock:
+            for key in keys:
+                total += 1
+                text = self._entries.get(key)
+                if text is None:
+                    missing.append(key)
+                else:
+                    self._entries.move_to_end(key)
+                    found[key] = text
+            if missing and self._db is not None:
+                now = time.time()
+                for key in missing:
+                    row = self._db.execute(
+                        "SELECT text FROM ocr_results WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        found[key] = row[0]
+                        self._memory_put(key, row[0])
+                        self._db.execute(
+                            "UPDATE ocr_results SET accessed = ? WHERE key = ?", (now, key)
+                        )
+                self._db.commit()
+            self._stats["hits"] += len(found)
+            self._stats["misses"] += total - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, str]) -> None:
+        """批量写入缓存"""
+        with self._lock:
+            for key, text in items.items():
+                self._memory_put(key, text)
+            if self._db is not None and items:
+                now = time.time()
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO ocr_results (key, text, accessed) VALUES (?, ?, ?)",
+                    [(key, text, now) for key, text in items.items()],
+                )
+                self._db_writes += len(items)
+                # 每写入一定数量后检查一次容量，淘汰最久未访问的条目
+                if self._db_writes >= 1000:
+                    self._db_writes = 0
+                    self._db.execute(
+                        "DELETE FROM ocr_results WHERE key IN ("
+                        "SELECT key FROM ocr_results ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                        (self.db_max_entries,),
+                    )
+                self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """返回命中/未命中计数和容量信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["max_entries"] = self.max_entries
+        return stats
+
+    def _memory_put(self, key: str, text: str) -> None:
+        self._entries[key] = text
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+_ocr_cache: Optional[OcrCache] = None
+_ocr_cache_lock = threading.Lock()
+
+
+def get_ocr_cache() -> Optional[OcrCache]:
+    """获取全局共享的OCR结果缓存，缓存被禁用时返回None"""
+    global _ocr_cache
+    if os.environ.get("MCP_OCR_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    with _ocr_cache_lock:
+        if _ocr_cache is None:
+            db_path = os.environ.get("MCP_OCR_CACHE_PATH")
+            if not db_path and os.environ.get("MCP_CACHE_DIR"):
+                db_path = os.path.join(os.environ["MCP_CACHE_DIR"], "ocr.sqlite3")
+            _ocr_cache = OcrCache(
+                max_entries=env_int("MCP_OCR_CACHE_MAX_ENTRIES", 10000),
+                db_path=db_path,
+                db_max_entries=env_int("MCP_OCR_CACHE_DISK_MAX_ENTRIES", 200000),
+            )
+        return _ocr_cache
+
+
+def _make_keys(images: Sequence[bytes], lang: str) -> List[str]:
+    # 同一xref提取出的图片是同一个bytes对象，按对象去重以避免重复计算哈希
+    keys_by_id: Dict[int, str] = {}
+    keys = []
+    for image_bytes in images:
+        key = keys_by_id.get(id(image_bytes))
+        if key is None:
+            key = keys_by_id[id(image_bytes)] = OcrCache.make_key(image_bytes, lang)
+        keys.append(key)
+    return keys
+
+
+async def ocr_images(
+    images: Sequence[bytes],
+    lang: str = DEFAULT_OCR_LANG,
+    concurrency: Optional[int] = None,
+    on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+    stats: Optional[Dict[str, float]] = None,
+) -> List[str | BaseException]:
+    """
+    并行识别多张图片，结果顺序与输入顺序一致
+
+    内容相同的图片只识别一次，已缓存的结果直接复用。
+    单张图片识别失败时，对应位置返回异常对象，不影响其他图片。
+    on_progress在每张图片识别完成后以 (已完成数, 需识别总数) 调用。
+    传入stats时写入识别成功的图片数"recognized"、识别失败的图片数"failed"、
+    工作进程中成功识别的耗时之和"seconds"（秒），以及复用缓存或重复内容的图片数"reused"。
+    """
+    pool = os.environ.get("MCP_OCR_POOL", PROCESS_POOL)
+    semaphore = asyncio.Semaphore(get_ocr_concurrency(concurrency))
+    cache = get_ocr_cache()
+
+    # 计算哈希和查询持久化缓存都是阻塞操作
+    keys = await run_in_pool(THREAD_POOL, _make_keys, images, lang)
+    results: Dict[str, str | BaseException] = {}
+    if cache is not None:
+        results.update(await run_in_pool(THREAD_POOL, cache.get_many, set(keys)))
+
+    # 按内容去重后，只识别未命中缓存的图片
+    pending: Dict[str, bytes] = {}
+    for key, image_bytes in zip(keys, images):
+        if key not in results:
+            pending.setdefault(key, image_bytes)
+
+    finished = 0
+    seconds = 0.0
+
+    async def recognize(image_bytes: bytes) -> str:
+        nonlocal finished, seconds
+        async with semaphore:
+            try:
+                text, elapsed = await run_in_pool(pool, _timed_ocr_image, image_bytes, lang)
+                seconds += elapsed
+                return text
+            finally:
+                finished += 1
+                if on_progress is not None:
+                    await on_progress(finished, len(pending))
+
+    recognized = await asyncio.gather(
+        *(recognize(image_bytes) for image_bytes in pending.values()),
+        return_exceptions=True,
+    )
+    results.update(zip(pending.keys(), recognized))
+    if stats is not None:
+        failed = sum(1 for result in recognized if isinstance(result, BaseException))
+        stats.update(recognized=len(pending) - failed, failed=failed, seconds=seconds, reused=len(keys) - len(pending))
+
+    if cache is not None:
+        succeeded = {
+            key: text for key, text in zip(pending.keys(), recognized)
+            if isinstance(text, str)
+        }
+        if succeeded:
+            await run_in_pool(THREAD_POOL, cache.put_many, succeeded)
+
+    return [results[key] for key in keys]
@@ -0,0 +1,123 @@
+"""
+工具调用的进度通知和增量结果推送
+
+服务端在每次调用工具前绑定一个ProgressReporter，工具内部通过report_progress和
+emit_partial上报进度与部分结果，无需关心当前调用是否请求了进度通知。
+
+- 进度：客户端在请求的_meta中携带progressToken时，通过MCP progress通知发送
+- 部分结果：客户端在_meta中设置partialResults为true（或设置环境变量
+  MCP_PARTIAL_RESULTS=true）时，通过日志通知（notifications/message）逐段推送
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressReporter:
+    """绑定到单次工具调用的进度上报器"""
+
+    def __init__(
+        self,
+        session: Any,
+        progress_token: Optional[str | int] = None,
+        tool_name: str = "",
+        partial_results: bool = False,
+        min_interval: float = 0.1,
+    ):
+        self.session = session
+        self.progress_token = progress_token
+        self.tool_name = tool_name
+        self.partial_results = partial_results
+        self.min_interval = min_interval
+        self._last_sent = 0.0
+        self._last_progress = -1.0
+
+    async def progress(self, done: float, total: Optional[float] = None) -> None:
+        """
+        发送进度通知
+
+        进度必须单调递增；除最后一次外，发送频率不超过每min_interval秒一次。
+        """
+        if self.progress_token is None or done <= self._last_progress:
+            return
+        now = time.monotonic()
+        finished = total is not None and done >= total
+        if not finished and now - self._last_sent < self.min_interval:
+            return
+        self._last_sent = now
+        self._last_progress = done
+        try:
+            await self.session.send_progress_notification(self.progress_token, done, total)
+        except Exception as e:
+            # 通知发送失败不应影响工具执行
+            logger.warning(f"发送进度通知失败: {e}")
+
+    async def partial(self, text: str) -> None:
+        """推送一段已经生成的结果内容"""
+        if not self.partial_results or not text:
+            return
+        try:
+            await self.session.send_log_message(
+                level="info",
+                data={"tool": self.tool_name, "progressToken": self.progress_token, "text": text},
+                logger=f"mcp_tool.{self.tool_name}",
+            )
+        except Exception as e:
+            logger.warning(f"推送部分结果失败: {e}")
+
+
+_current_reporter: ContextVar[Optional[ProgressReporter]] = ContextVar(
+    "mcp_tool_progress_reporter", default=None
+)
+
+
+@contextlib.contextmanager
+def progress_context(reporter: Optional[ProgressReporter]) -> Iterator[None]:
+    """在当前上下文中绑定进度上报器"""
+    token = _current_reporter.set(reporter)
+    try:
+        yield
+    finally:
+        _current_reporter.reset(token)
+
+
+def get_reporter() -> Optional[ProgressReporter]:
+    """获取当前调用绑定的进度上报器，未绑定时返回None"""
+    return _current_reporter.get()
+
+
+async def report_progress(done: float, total: Optional[float] = None) -> None:
+    """上报当前调用的进度，未请求进度通知时不做任何事"""
+    reporter = _current_reporter.get()
+    if reporter is not None:
+        await reporter.progress(done, total)
+
+
+async def emit_partial(text: str) -> None:
+    """推送当前调用的部分结果，未开启部分结果推送时不做任何事"""
+    reporter = _current_reporter.get()
+    if reporter is not None:
+        await reporter.partial(text)
+
+
+def threadsafe_progress() -> Optional[Callable[[float, Optional[float]], None]]:
+    """
+    返回一个可以在工作线程中调用的同步进度回调 callback(done, total)
+
+    只能用于线程池中执行的函数（进程池无法传递回调）；当前调用未请求进度通知时返回None。
+    """
+    reporter = _current_reporter.get()
+    if reporter is None or reporter.progress_token is None:
+        return None
+    loop = asyncio.get_running_loop()
+
+    def callback(done: float, total: Optional[float] = None) -> None:
+        loop.call_soon_threadsafe(lambda: loop.create_task(reporter.progress(done, total)))
+
+    return callback
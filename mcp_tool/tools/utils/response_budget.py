@@ -0,0 +1,230 @@
+"""
+工具结果的响应预算：单次返回的内容超过预算时拆分，其余部分暂存在服务端
+
+服务端在返回每个工具的结果前按近似token数拆分：预算以内的内容直接返回，末尾附带一个
+续取句柄；其余内容保存在有容量上限、会过期的内存存储中，客户端通过continue工具传入
+句柄获取下一部分，无需重新解析原始文件。
+
+token数按UTF-8字节数估算（约3字节一个token：中文每字约1个token，英文每个token约3-4个字符），
+拆分时优先在换行处断开，单条图片等无法拆分的内容超过预算时单独返回。
+
+配置项：
+- MCP_RESPONSE_MAX_TOKENS: 每次返回的近似token数上限，默认 25000，0 表示不拆分
+- MCP_CONTINUATION_TTL: 暂存内容的有效期（秒），每次续取后重新计时，默认 600
+- MCP_CONTINUATION_MAX_BYTES: 暂存内容的总容量上限，超过时淘汰最久未访问的条目，默认 128MB
+"""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import mcp.types as types
+
+from .executor import env_int
+
+Contents = List[types.TextContent | types.ImageContent | types.EmbeddedResource]
+
+# 平均每个token对应的UTF-8字节数
+_BYTES_PER_TOKEN = 3
+# 为末尾的续取说明预留的token数
+_NOTICE_TOKENS = 100
+
+
+def estimate_tokens(item: Any) -> int:
+    """估算一条内容的token数"""
+    if isinstance(item, types.TextContent):
+        size = len(item.text.encode("utf-8"))
+    elif isinstance(item, types.ImageContent):
+        size = len(item.data)
+    else:
+        size = len(item.model_dump_json().encode("utf-8"))
+    return -(-size // _BYTES_PER_TOKEN)
+
+
+def _cut_text(text: str, max_tokens: int) -> int:
+    """返回不超过max_tokens的前缀长度（字符数），尽量在换行处断开"""
+    prefix = text.encode("utf-8")[:max_tokens * _BYTES_PER_TOKEN].decode("utf-8", "ignore")
+    cut = len(prefix)
+    # 前缀后半段有换行时在换行之后断开，避免切断一行内容
+    newline = prefix.rfind("\n", cut // 2)
+    return newline + 1 if newline >= 0 else cut
+
+
+def split_contents(contents: Contents, max_tokens: int) -> Tuple[Contents, Contents]:
+    """
+    按token预算拆分结果
+
+    Returns:
+        (本次返回的内容, 剩余的内容)；本次返回的内容至少包含一条（或一条文本的一部分）
+    """
+    head: Contents = []
+    used = 0
+    for index, item in enumerate(contents):
+        cost = estimate_tokens(item)
+        if used + cost <= max_tokens:
+            head.append(item)
+            used += cost
+            continue
+
+        rest = list(contents[index + 1:])
+        if isinstance(item, types.TextContent):
+            cut = _cut_text(item.text, max_tokens - used)
+            if cut > 0:
+                # _meta留在前一部分，后续部分只有文本
+                head.append(item.model_copy(update={"text": item.text[:cut]}))
+                return head, [types.TextContent(type="text", text=item.text[cut:])] + rest
+        if not head:
+            # 无法拆分的内容本身超过预算时单独返回
+            return [item], rest
+        return head, [item] + rest
+    return head, []
+
+
+class ContinuationStore:
+    """暂存超出预算的结果，按总字节数和有效期淘汰，可在多个线程中并发调用"""
+
+    def __init__(self, max_bytes: int, ttl: int):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # 句柄 -> {"tool", "contents", "bytes", "part", "expires"}
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"stored": 0, "hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    def put(self, tool_name: str, contents: Contents) -> Optional[str]:
+        """保存剩余内容并返回句柄，内容超过总容量时不保存并返回None"""
+        size = sum(estimate_tokens(item) for item in contents) * _BYTES_PER_TOKEN
+        if size > self.max_bytes:
+            return None
+        handle = secrets.token_urlsafe(16)
+        with self._lock:
+            self._purge_expired()
+            self._entries[handle] = {
+                "tool": tool_name,
+                "contents": contents,
+                "bytes": size,
+                "part": 1,
+                "expires": time.monotonic() + self.ttl,
+            }
+            self._bytes += size
+            self._stats["stored"] += 1
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted["bytes"]
+                self._stats["evictions"] += 1
+        return handle
+
+    def take(self, handle: str, max_tokens: int) -> Optional[Tuple[Contents, Dict[str, Any]]]:
+        """
+        取出下一部分内容，句柄不存在或已过期时返回None
+
+        Returns:
+            (本部分的内容, {"tool", "part", "remaining_tokens"})，remaining_tokens为0时句柄已失效
+        """
+        with self._lock:
+            self._purge_expired()
+            entry = self._entries.get(handle)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+
+            head, rest = split_contents(entry["contents"], max_tokens) if max_tokens > 0 else (entry["contents"], [])
+            entry["part"] += 1
+            info = {"tool": entry["tool"], "part": entry["part"]}
+            self._bytes -= entry["bytes"]
+            if rest:
+                remaining = sum(estimate_tokens(item) for item in rest)
+                entry.update(contents=rest, bytes=remaining * _BYTES_PER_TOKEN, expires=time.monotonic() + self.ttl)
+                self._bytes += entry["bytes"]
+                self._entries.move_to_end(handle)
+            else:
+                remaining = 0
+                del self._entries[handle]
+            info["remaining_tokens"] = remaining
+        return head, info
+
+    def stats(self) -> Dict[str, Any]:
+        """返回暂存条目数、占用字节数和存取计数"""
+        with self._lock:
+            self._purge_expired()
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            stats["max_bytes"] = self.max_bytes
+        return stats
+
+    def _purge_expired(self) -> None:
+        # 调用方需持有锁；条目按访问顺序排列，但有效期都相同，因此过期的条目都在前面
+        now = time.monotonic()
+        while self._entries:
+            handle, entry = next(iter(self._entries.items()))
+            if entry["expires"] > now:
+                break
+            del self._entries[handle]
+            self._bytes -= entry["bytes"]
+            self._stats["expired"] += 1
+
+
+_continuation_store: Optional[ContinuationStore] = None
+_continuation_store_lock = threading.Lock()
+
+
+def get_continuation_store() -> ContinuationStore:
+    """获取全局共享的续取存储"""
+    global _continuation_store
+    with _continuation_store_lock:
+        if _continuation_store is None:
+            _continuation_store = ContinuationStore(
+                max_bytes=env_int("MCP_CONTINUATION_MAX_BYTES", 128 * 1024 * 1024),
+                ttl=env_int("MCP_CONTINUATION_TTL", 600),
+            )
+        return _continuation_store
+
+
+def response_budget(override: Any = None) -> int:
+    """返回本次调用的token预算，override为请求_meta中的maxResponseTokens"""
+    if override is not None:
+        try:
+            return max(int(override), 0)
+        except (TypeError, ValueError):
+            pass
+    return env_int("MCP_RESPONSE_MAX_TOKENS", 25000)
+
+
+def continuation_notice(handle: Optional[str], tool_name: str, part: int, remaining_tokens: int) -> types.TextContent:
+    """生成结果末尾的续取说明，结构化信息放在_meta.continuation中"""
+    if handle is None:
+        text = f"[输出已截断：剩余约{remaining_tokens}个token超过了服务端暂存容量，请缩小请求范围（如指定页码或工作表）后重试]"
+    else:
+        text = (
+            f"[第{part}部分，剩余约{remaining_tokens}个token未返回。调用continue工具并传入"
+            f"handle=\"{handle}\"获取下一部分]"
+        )
+    return types.TextContent(
+        type="text",
+        text=text,
+        _meta={
+            "continuation": {
+                "handle": handle,
+                "tool": tool_name,
+                "part": part,
+                "remaining_tokens": remaining_tokens,
+            }
+        },
+    )
+
+
+def apply_budget(tool_name: str, contents: Contents, max_tokens: int) -> Contents:
+    """结果超过预算时只返回预算以内的部分，其余内容暂存并在末尾附带续取说明"""
+    if max_tokens <= 0 or sum(estimate_tokens(item) for item in contents) <= max_tokens:
+        return contents
+    head, rest = split_contents(contents, max(max_tokens - _NOTICE_TOKENS, 1))
+    if not rest:
+        return head
+    handle = get_continuation_store().put(tool_name, rest)
+    remaining = sum(estimate_tokens(item) for item in rest)
+    return head + [continuation_notice(handle, tool_name, 1, remaining)]
@@ -0,0 +1,247 @@
+"""
+全文检索索引，保存在SQLite中的倒排索引（FTS5）
+
+文本在写入索引前先切分为检索词：连续的中日韩文字切分为相邻两字的二元组（bigram），
+并在末尾追加最后一个字的单字词（使单字查询能命中位于词尾的字，如"所得税"中的"税"），
+其余文字按单词（字母、数字和下划线）切分并转换为小写。查询时使用同样的切分方式，中文片段
+要求二元组相邻出现（短语匹配），因此不需要中文分词词典，也不会漏掉未登录词。
+
+每个文件按页（PDF）、片段（Word）或工作表行范围（Excel）拆分为若干条记录，
+连同文件大小和修改时间一起保存，文件变化后只重建该文件的记录。
+
+配置项：
+- MCP_SEARCH_INDEX_PATH: 索引文件路径，默认为 MCP_CACHE_DIR/search.sqlite3，
+  均未设置时为系统临时目录下的 mcp-search-index.sqlite3
+"""
+
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 中日韩文字（汉字、扩展A、兼容汉字、假名、韩文音节）
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_WORD = re.compile(r"\w+")
+_CJK_OR_OTHER = re.compile(f"([{_CJK}]+)|([^{_CJK}]+)")
+
+def _split_terms(text: str) -> List[Tuple[bool, str]]:
+    """将文本切分为 (是否为中日韩文字, 片段) 列表，片段为连续的中日韩文字或一个单词"""
+    terms = []
+    for word in _WORD.findall(text):
+        for cjk, other in _CJK_OR_OTHER.findall(word):
+            terms.append((True, cjk) if cjk else (False, other.lower()))
+    return terms
+
+
+def _bigrams(run: str) -> List[str]:
+    return [run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def tokenize(text: str) -> str:
+    """将文本切分为以空格分隔的检索词，写入FTS5索引"""
+    tokens = []
+    for is_cjk, term in _split_terms(text):
+        if is_cjk:
+            tokens.extend(_bigrams(term))
+            if len(term) > 1:
+                # 最后一个字不是任何二元组的开头，单独索引；追加在末尾，不影响二元组短语的相邻关系
+                tokens.append(term[-1])
+        else:
+            tokens.append(term)
+    return " ".join(tokens)
+
+
+def build_query(query: str, match_all: bool = True) -> Tuple[Optional[str], List[str]]:
+    """
+    将用户输入转换为FTS5查询表达式
+
+    中文片段转换为二元组短语（单个汉字按前缀匹配），单词按前缀匹配；match_all为False时各片段之间为或关系。
+
+    Returns:
+        (FTS5查询表达式, 用于生成摘要的原文片段列表)，没有可检索的内容时表达式为None
+    """
+    clauses = []
+    terms = []
+    for is_cjk, term in _split_terms(query):
+        if term in terms:
+            continue
+        terms.append(term)
+        if is_cjk and len(term) > 1:
+            clauses.append('"' + " ".join(_bigrams(term)) + '"')
+        elif is_cjk:
+            # 单个汉字按前缀匹配：以其开头的二元组覆盖词首和词中的字，词尾的字由单字词命中
+            clauses.append(f'"{term}"*')
+        else:
+            clauses.append(f'"{term}"*')
+    if not clauses:
+        return None, []
+    return (" AND " if match_all else " OR ").join(clauses), terms
+
+
+def make_snippet(text: str, terms: Sequence[str], width: int = 160) -> str:
+    """截取原文中第一个命中片段附近的内容，命中的片段以**加粗**标记"""
+    lowered = text.lower()
+    positions = [pos for pos in (lowered.find(term) for term in terms) if pos >= 0]
+    start = max(min(positions) - width // 3, 0) if positions else 0
+    end = min(start + width, len(text))
+    snippet = " ".join(text[start:end].split())
+    if terms:
+        pattern = "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+        snippet = re.sub(f"({pattern})", r"**\1**", snippet, flags=re.IGNORECASE)
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+
+# 索引格式或文本提取方式变化时递增，已有的索引会被清空并在下次检索时重建
+INDEX_VERSION = 3
+
+
+class SearchIndex:
+    """文件内容的全文检索索引，写操作在内部加锁，可在线程池中并发调用"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL, indexed_at REAL NOT NULL, error TEXT);"
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " id INTEGER PRIMARY KEY, file_id INTEGER NOT NULL, label TEXT NOT NULL,"
+            " locator TEXT NOT NULL, text TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_chunks_file ON chunks(file_id);"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS chunk_terms USING fts5(terms, tokenize='unicode61 remove_diacritics 0');"
+        )
+        if self._db.execute("PRAGMA user_version").fetchone()[0] < INDEX_VERSION:
+            self._db.executescript("DELETE FROM chunk_terms; DELETE FROM chunks; DELETE FROM files;")
+            self._db.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        self._db.commit()
+
+    def file_states(self, root: str) -> Dict[str, Tuple[int, int]]:
+        """返回root目录下已索引文件的 路径 -> (大小, 修改时间)"""
+        low, high = self._path_range(root)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT path, size, mtime_ns FROM files WHERE path >= ? AND path < ?", (low, high)
+            ).fetchall()
+        return {path: (size, mtime_ns) for path, size, mtime_ns in rows}
+
+    def replace_file(self, path: str, size: int, mtime_ns: int, chunks: Iterable[Tuple[str, Dict[str, Any], str, str]],
+                     error: Optional[str] = None) -> None:
+        """
+        替换一个文件的全部记录
+
+        Args:
+            chunks: (位置说明, 定位信息, 原文, 检索词) 列表
+            error: 解析失败时的错误信息，文件未变化前不会再次尝试解析
+        """
+        with self._lock:
+            self._delete(path)
+            cursor = self._db.execute(
+                "INSERT INTO files (path, size, mtime_ns, indexed_at, error) VALUES (?, ?, ?, ?, ?)",
+                (path, size, mtime_ns, time.time(), error),
+            )
+            file_id = cursor.lastrowid
+            for label, locator, text, terms in chunks:
+                chunk_id = self._db.execute(
+                    "INSERT INTO chunks (file_id, label, locator, text) VALUES (?, ?, ?, ?)",
+                    (file_id, label, json.dumps(locator, ensure_ascii=False), text),
+                ).lastrowid
+                self._db.execute("INSERT INTO chunk_terms (rowid, terms) VALUES (?, ?)", (chunk_id, terms))
+            self._db.commit()
+
+    def remove_files(self, paths: Iterable[str]) -> None:
+        """删除已不存在的文件的记录"""
+        with self._lock:
+            for path in paths:
+                self._delete(path)
+            self._db.commit()
+
+    def search(self, query: str, root: str, limit: int = 10) -> Dict[str, Any]:
+        """
+        检索root目录下的文件，按BM25相关度排序
+
+        所有片段都出现的结果优先；没有这样的结果时，退回为任一片段出现即可。
+
+        Returns:
+            {"hits": [{"path", "label", "locator", "score", "snippet"}], "match": "all"|"any"}
+        """
+        low, high = self._path_range(root)
+        match = "all"
+        for match_all in (True, False):
+            expression, terms = build_query(query, match_all)
+            if expression is None:
+                return {"hits": [], "match": match}
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT f.path, c.label, c.locator, c.text, bm25(chunk_terms) AS score"
+                    " FROM chunk_terms JOIN chunks c ON c.id = chunk_terms.rowid JOIN files f ON f.id = c.file_id"
+                    " WHERE chunk_terms MATCH ? AND f.path >= ? AND f.path < ?"
+                    " ORDER BY score LIMIT ?",
+                    (expression, low, high, limit),
+                ).fetchall()
+            if rows or len(terms) < 2:
+                break
+            match = "any"
+        return {
+            "match": match,
+            "hits": [
+                {
+                    "path": path,
+                    "label": label,
+                    "locator": json.loads(locator),
+                    # bm25越小越相关，取反后越大越相关
+                    "score": round(-score, 4),
+                    "snippet": make_snippet(text, terms),
+                }
+                for path, label, locator, text, score in rows
+            ],
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """返回索引中的文件数、记录数和解析失败的文件数"""
+        with self._lock:
+            files, failed = self._db.execute("SELECT COUNT(*), COUNT(error) FROM files").fetchone()
+            chunks = self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        return {"files": files, "chunks": chunks, "failed_files": failed}
+
+    def _delete(self, path: str) -> None:
+        row = self._db.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return
+        file_id = row[0]
+        self._db.execute(
+            "DELETE FROM chunk_terms WHERE rowid IN (SELECT id FROM chunks WHERE file_id = ?)", (file_id,)
+        )
+        self._db.execute("DELETE FROM chunks WHERE file_id = ?", (file_id,))
+        self._db.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    @staticmethod
+    def _path_range(root: str) -> Tuple[str, str]:
+        """root目录下所有路径的取值范围，用于按前缀过滤"""
+        prefix = os.path.join(os.path.abspath(root), "")
+        return prefix, prefix + "\U0010ffff"
+
+
+_search_index: Optional[SearchIndex] = None
+_search_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """获取全局共享的检索索引"""
+    global _search_index
+    with _search_index_lock:
+        if _search_index is None:
+            db_path = os.environ.get("MCP_SEARCH_INDEX_PATH")
+            if not db_path and os.environ.get("MCP_CACHE_DIR"):
+                db_path = os.path.join(os.environ["MCP_CACHE_DIR"], "search.sqlite3")
+            if not db_path:
+                db_path = os.path.join(tempfile.gettempdir(), "mcp-search-index.sqlite3")
+            _search_index = SearchIndex(db_path)
+        return _search_index
@@ -0,0 +1,184 @@
+"""
+后台预解析：监视目录中新增或修改的文件，提前解析并写入结果缓存
+
+服务启动后定期扫描监视目录，对新增或大小、修改时间发生变化的PDF、Word和Excel文件
+以默认参数调用对应的解析工具（与交互调用相同的逻辑），结果写入解析结果缓存，
+之后交互调用同一文件时直接读取缓存。
+
+预解析以低优先级运行：同一时间只解析MCP_WARMUP_CONCURRENCY个文件（默认1），
+有交互调用正在执行时暂停提交新的文件，每个文件之间间隔MCP_WARMUP_PAUSE秒；
+最近MCP_WARMUP_SETTLE秒内修改过的文件（可能仍在复制中）留到下一轮扫描。
+
+配置项：
+- MCP_WARMUP_ENABLED: 是否启用后台预解析，默认 false
+- MCP_WARMUP_DIRS: 监视的目录，多个目录用os.pathsep（Linux下为':'）分隔，默认为HOST_MOUNT_TARGET
+- MCP_WARMUP_INTERVAL: 扫描间隔（秒），默认 60
+- MCP_WARMUP_CONCURRENCY: 同时预解析的文件数，默认 1
+- MCP_WARMUP_PAUSE: 每个文件解析完成后的间隔（秒），默认 1
+- MCP_WARMUP_SETTLE: 修改时间距今不足该秒数的文件暂不解析，默认 5
+- MCP_WARMUP_MAX_FILES: 每个目录最多监视的文件数，默认 10000
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .cache import get_result_cache
+from .executor import THREAD_POOL, env_float, env_int, run_in_pool
+from .progress import progress_context
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupWorker:
+    """监视目录并在后台预解析文件的工作协程"""
+
+    def __init__(self, file_tool: Any, directories: List[str], interval: float = 60, concurrency: int = 1,
+                 pause: float = 1, settle: float = 5, max_files: int = 10000):
+        """
+        Args:
+            file_tool: FileTool实例，按文件类型分派到各解析工具（经由BaseTool.run写入缓存）
+            directories: 监视的目录列表
+        """
+        self.file_tool = file_tool
+        self.directories = directories
+        self.interval = interval
+        self.concurrency = concurrency
+        self.pause = pause
+        self.settle = settle
+        self.max_files = max_files
+        # 已处理过的文件：路径 -> (大小, 修改时间)，文件变化后重新解析
+        self._seen: Dict[str, Tuple[int, int]] = {}
+        self._active_calls = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._stats = {"scans": 0, "warmed": 0, "failed": 0, "pending": 0, "seconds": 0.0}
+
+    @classmethod
+    def from_env(cls, tool_instances: Dict[str, Any]) -> Optional["WarmupWorker"]:
+        """根据环境变量创建工作协程，未启用、结果缓存被禁用或没有可监视的目录时返回None"""
+        if os.environ.get("MCP_WARMUP_ENABLED", "false").lower() not in ("1", "true", "yes"):
+            return None
+        if get_result_cache() is None:
+            logger.warning("后台预解析需要启用解析结果缓存（MCP_CACHE_ENABLED），已跳过")
+            return None
+        file_tool = tool_instances.get("file")
+        if file_tool is None:
+            return None
+
+        raw_dirs = os.environ.get("MCP_WARMUP_DIRS") or os.environ.get("HOST_MOUNT_TARGET", "/host_files")
+        directories = [
+            os.path.abspath(file_tool.process_file_path(path))
+            for path in raw_dirs.split(os.pathsep) if path.strip()
+        ]
+        directories = [path for path in directories if os.path.isdir(path)]
+        if not directories:
+            logger.warning(f"后台预解析的监视目录不存在: {raw_dirs}")
+            return None
+
+        return cls(
+            file_tool,
+            directories,
+            interval=env_float("MCP_WARMUP_INTERVAL", 60),
+            concurrency=env_int("MCP_WARMUP_CONCURRENCY", 1),
+            pause=env_float("MCP_WARMUP_PAUSE", 1),
+            settle=env_float("MCP_WARMUP_SETTLE", 5),
+            max_files=env_int("MCP_WARMUP_MAX_FILES", 10000),
+        )
+
+    @contextlib.contextmanager
+    def interactive_call(self) -> Iterator[None]:
+        """服务端在执行交互调用时进入此上下文，期间不提交新的预解析任务"""
+        self._active_calls += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._active_calls -= 1
+            if not self._active_calls:
+                self._idle.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """返回扫描次数、已预解析和失败的文件数、待处理的文件数和累计解析耗时"""
+        return dict(self._stats, watched=len(self._seen))
+
+    async def run(self) -> None:
+        """持续扫描监视目录并预解析变化的文件，直到被取消"""
+        logger.info(f"后台预解析已启动，监视目录: {', '.join(self.directories)}")
+        while True:
+            try:
+                pending = await run_in_pool(THREAD_POOL, self._scan)
+            except Exception as e:
+                logger.warning(f"扫描预解析目录失败: {e}")
+                pending = []
+            self._stats["scans"] += 1
+            self._stats["pending"] = len(pending)
+
+            limit = asyncio.Semaphore(self.concurrency)
+
+            async def warm_limited(path: str, state: Tuple[int, int]) -> None:
+                async with limit:
+                    await self._idle.wait()
+                    await self._warm(path, state)
+                    await asyncio.sleep(self.pause)
+
+            await asyncio.gather(*(warm_limited(path, state) for path, state in pending))
+            await asyncio.sleep(self.interval)
+
+    def _scan(self) -> List[Tuple[str, Tuple[int, int]]]:
+        """
+        列出需要预解析的文件（同步执行，运行在线程池中）
+
+        Returns:
+            [(路径, (大小, 修改时间))]，新文件在前按路径排序
+        """
+        # 延迟导入，避免utils包依赖具体的工具模块
+        from ..file_tool import FileTool
+
+        now = time.time()
+        pending = []
+        present = set()
+        for directory in self.directories:
+            files, _ = FileTool._collect_files(directory, True, self.max_files)
+            for path in files:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                present.add(path)
+                state = (stat.st_size, stat.st_mtime_ns)
+                if self._seen.get(path) == state or now - stat.st_mtime < self.settle:
+                    continue
+                pending.append((path, state))
+
+        # 已删除的文件不再跟踪
+        for path in list(self._seen):
+            if path not in present:
+                del self._seen[path]
+        return pending
+
+    async def _warm(self, path: str, state: Tuple[int, int]) -> None:
+        """以默认参数解析一个文件，结果由各解析工具的BaseTool.run写入缓存"""
+        start = time.perf_counter()
+        try:
+            # 预解析不向任何客户端发送进度通知
+            with progress_context(None):
+                results = await self.file_tool.execute({"file_path": path})
+            failed = self.file_tool.is_error_result(results)
+        except Exception as e:
+            logger.warning(f"预解析失败: {path}: {e}")
+            failed = True
+        elapsed = time.perf_counter() - start
+
+        # 失败的文件同样记录状态，文件变化前不再重试
+        self._seen[path] = state
+        self._stats["pending"] = max(self._stats["pending"] - 1, 0)
+        self._stats["seconds"] += elapsed
+        if failed:
+            self._stats["failed"] += 1
+        else:
+            self._stats["warmed"] += 1
+            logger.info(f"已预解析: {path} ({elapsed:.2f}秒)")
@@ -2,21 +2,61 @@
 Word文档解析工具，用于解析Word文档内容
 """
 
+import datetime
+import hashlib
 import os
+import posixpath
+import re
 import traceback
-from typing import Dict, List, Any
-import docx
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Any, Optional, Tuple
 import mcp.types as types
 from . import BaseTool, ToolRegistry
+from .utils.cache import mark_uncacheable
+from .utils.metrics import phase
+from .utils.ocr import DEFAULT_OCR_LANG, SKIP_LOW_ENTROPY, SKIP_SMALL, image_skip_reason, ocr_images, validate_ocr_lang
+from .utils.progress import report_progress
+
+# OOXML命名空间
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_DC = "{http://purl.org/dc/elements/1.1/}"
+_DCTERMS = "{http://purl.org/dc/terms/}"
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+# 图片锚点：DrawingML图片（a:blip）和旧版VML图片（v:imagedata）
+_A_BLIP = "{http://schemas.openxmlformats.org/drawingml/2006/main}blip"
+_V_IMAGEDATA = "{urn:schemas-microsoft-com:vml}imagedata"
+
+# 输出的核心属性：(显示名, 元素)
+_CORE_PROPERTIES = (
+    ("标题", f"{_DC}title"),
+    ("作者", f"{_DC}creator"),
+    ("创建时间", f"{_DCTERMS}created"),
+    ("修改时间", f"{_DCTERMS}modified"),
+    ("备注", f"{_DC}description"),
+)
+
+# tesseract无法识别的矢量图格式
+_VECTOR_IMAGE_EXTENSIONS = (".emf", ".wmf", ".svg")
+SKIP_VECTOR = "vector"
+
+# 正文中图片识别结果的占位符，XML文本中不会出现\x00
+_IMAGE_PLACEHOLDER = re.compile(r"\x00(\d+)\x00")
 
 @ToolRegistry.register
 class WordTool(BaseTool):
     """
     用于解析Word文档的工具，提取文本内容、表格和图片信息
+
+    嵌入的图片直接从docx压缩包中按关系读取，按内容哈希去重后在OCR工作池中并行识别，
+    识别结果放在图片所在段落（表格中的图片放在表格）之后。
     """
     
     name = "word"
-    description = "解析Word文档内容，提取文本、表格和图片信息"
+    description = "解析Word文档内容，提取文本、表格，并识别嵌入图片中的文字"
+    cacheable = True
     input_schema = {
         "type": "object",
         "required": ["file_path"],
@@ -24,6 +64,21 @@ class WordTool(BaseTool):
             "file_path": {
                 "type": "string",
                 "description": "Word文档的本地路径，例如'/path/to/document.docx'",
+            },
+            "ocr": {
+                "type": "boolean",
+                "description": "是否识别文档中嵌入图片的文字（如粘贴的扫描件）；为false时只标注图片位置",
+                "default": True
+            },
+            "ocr_concurrency": {
+                "type": "integer",
+                "description": "同时进行OCR识别的图片数上限，默认由MCP_OCR_CONCURRENCY环境变量决定",
+                "minimum": 1
+            },
+            "ocr_lang": {
+                "type": "string",
+                "description": "OCR语言，tesseract语言代码，多个语言用'+'连接，例如'eng'、'chi_sim+eng'、'jpn'",
+                "default": DEFAULT_OCR_LANG
             }
         },
     }
@@ -46,21 +101,33 @@ class WordTool(BaseTool):
         
         # 处理文件路径，支持挂载目录的转换
         file_path = self.process_file_path(arguments["file_path"])
+        ocr_lang = arguments.get("ocr_lang") or DEFAULT_OCR_LANG
+        try:
+            validate_ocr_lang(ocr_lang)
+        except ValueError as e:
+            return [types.TextContent(
+                type="text",
+                text=f"错误: {str(e)}"
+            )]
         
-        return await self._parse_word_document(file_path)
+        return await self._parse_word_document(
+            file_path,
+            ocr=arguments.get("ocr", True),
+            ocr_concurrency=arguments.get("ocr_concurrency"),
+            ocr_lang=ocr_lang,
+        )
     
-    async def _parse_word_document(self, file_path: str) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+    async def _parse_word_document(self, file_path: str, ocr: bool = True, ocr_concurrency: int | None = None, ocr_lang: str = DEFAULT_OCR_LANG) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
         """
         解析Word文档内容
         
         Args:
             file_path: Word文档路径
+            ocr: 是否识别嵌入的图片
             
         Returns:
             Word文档内容列表
         """
-        results = []
-        
         # 检查文件是否存在
         if not os.path.exists(file_path):
             return [types.TextContent(
@@ -76,110 +143,36 @@ class WordTool(BaseTool):
             )]
         
         try:
-            # 添加文件信息
-            file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
-            results.append(types.TextContent(
-                type="text",
-                text=f"# Word文档解析\n\n文件大小: {file_size_mb:.2f} MB"
-            ))
+            # 解析是阻塞操作，放到工作池中执行
+            await report_progress(0, 1)
+            # extract阶段包含打开文档（open阶段）的时间
+            with phase("extract"):
+                extracted = await self.run_blocking(WordTool._extract_document, file_path, ocr)
+            await report_progress(1, 1)
             
-            # 打开Word文档
-            doc = docx.Document(file_path)
-            
-            # 提取文档属性
-            properties = {}
-            if hasattr(doc.core_properties, 'title') and doc.core_properties.title:
-                properties['标题'] = doc.core_properties.title
-            if hasattr(doc.core_properties, 'author') and doc.core_properties.author:
-                properties['作者'] = doc.core_properties.author
-            if hasattr(doc.core_properties, 'created') and doc.core_properties.created:
-                properties['创建时间'] = str(doc.core_properties.created)
-            if hasattr(doc.core_properties, 'modified') and doc.core_properties.modified:
-                properties['修改时间'] = str(doc.core_properties.modified)
-            if hasattr(doc.core_properties, 'comments') and doc.core_properties.comments:
-                properties['备注'] = doc.core_properties.comments
-            
-            # 添加文档属性信息
-            if properties:
-                properties_text = "## 文档属性\n\n"
-                for key, value in properties.items():
-                    properties_text += f"- {key}: {value}\n"
-                results.append(types.TextContent(
-                    type="text",
-                    text=properties_text
-                ))
-            
-            # 提取文档内容
-            content_text = "## 文档内容\n\n"
-            
-            # 处理段落
-            paragraphs_count = len(doc.paragraphs)
-            content_text += f"### 段落 (共{paragraphs_count}个)\n\n"
-            
-            for i, para in enumerate(doc.paragraphs):
-                if para.text.strip():  # 只处理非空段落
-                    content_text += f"{para.text}\n\n"
-            
-            # 处理表格
-            tables_count = len(doc.tables)
-            if tables_count > 0:
-                content_text += f"### 表格 (共{tables_count}个)\n\n"
+            analyses = None
+            ocr_stats: Dict[str, float] = {}
+            if ocr:
+                images = [image["image"] for image in extracted["images"] if "image" in image]
                 
-                for i, table in enumerate(doc.tables):
-                    content_text += f"#### 表格 {i+1}\n\n"
-                    
-                    # 创建Markdown表格
-                    rows = []
-                    for row in table.rows:
-                        cells = [cell.text.replace('\n', ' ').strip() for cell in row.cells]
-                        rows.append(cells)
-                    
-                    if rows:
-                        # 表头
-                        content_text += "| " + " | ".join(rows[0]) + " |\n"
-                        # 分隔线
-                        content_text += "| " + " | ".join(["---"] * len(rows[0])) + " |\n"
-                        # 表格内容
-                        for row in rows[1:]:
-                            content_text += "| " + " | ".join(row) + " |\n"
-                        
-                        content_text += "\n"
-            
-            # 添加文档内容
-            results.append(types.TextContent(
-                type="text",
-                text=content_text
-            ))
-            
-            # 提取图片信息
-            try:
-                # 计算文档中的图片数量
-                image_count = 0
-                for rel in doc.part.rels.values():
-                    if "image" in rel.target_ref:
-                        image_count += 1
+                async def on_ocr_progress(done: int, total: int) -> None:
+                    # 进度单位为1（正文）+ 图片数
+                    await report_progress(1 + done, 1 + total)
                 
-                if image_count > 0:
-                    image_info = f"## 图片信息\n\n文档中包含 {image_count} 张图片。\n\n"
-                    image_info += "注意：当前仅提供图片数量信息，不提取图片内容。如需查看图片，请直接打开原始文档。\n"
-                    
-                    results.append(types.TextContent(
-                        type="text",
-                        text=image_info
-                    ))
-            except Exception as img_error:
-                results.append(types.TextContent(
-                    type="text",
-                    text=f"警告: 提取图片信息时出错: {str(img_error)}"
-                ))
+                with phase("ocr"):
+                    results = await ocr_images(
+                        images, lang=ocr_lang, concurrency=ocr_concurrency, on_progress=on_ocr_progress, stats=ocr_stats
+                    )
+                analyses = [
+                    f"图片分析失败: {str(result)}" if isinstance(result, BaseException)
+                    else WordTool._format_image_analysis(result)
+                    for result in results
+                ]
+                # 与PDF相同，OCR失败的结果不写入缓存
+                if ocr_stats.get("failed"):
+                    mark_uncacheable()
             
-            # 添加处理完成的提示
-            results.append(types.TextContent(
-                type="text",
-                text="Word文档处理完成！"
-            ))
-            
-            return results
+            return WordTool._format_document(extracted, analyses, ocr_stats)
         except Exception as e:
             error_details = traceback.format_exc()
             return [types.TextContent(
@@ -190,4 +183,535 @@ class WordTool(BaseTool):
                      f"2. 文件受密码保护\n"
                      f"3. 文件包含不支持的内容\n\n"
                      f"详细错误信息: {error_details}"
-            )] 
\ No newline at end of file
+            )]
+    
+    @staticmethod
+    def _read_word_document(file_path: str) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+        """读取Word文档的属性、正文和图片数量，不识别图片（同步执行，运行在工作池中）"""
+        return WordTool._format_document(WordTool._extract_document(file_path))
+    
+    @staticmethod
+    def _extract_document(file_path: str, extract_images: bool = False) -> Dict[str, Any]:
+        """
+        读取Word文档的属性、正文（段落和表格按文档顺序）和嵌入的图片（同步执行，运行在工作池中）
+
+        直接从docx压缩包中流式读取XML，不构建完整的文档对象，内存中只保留当前元素的路径和已生成的文本。
+        
+        Returns:
+            {"size": 文件字节数, "properties": 文档属性, "content": 正文（图片识别结果的位置为占位符）,
+             "paragraphs": 段落数, "tables": 表格数, "images": 按出现顺序的图片列表}
+            每张图片为 {"part": 压缩包内路径}，并可能包含：需要识别的图片数据"image"，
+            与之前某张图片内容相同时为其序号"same_as"，不做识别的原因"skip"，无法读取的原因"error"。
+            extract_images为False时不读取图片数据。
+        """
+        extracted: Dict[str, Any] = {"size": os.path.getsize(file_path)}
+        
+        # 打开Word文档
+        with phase("open"):
+            archive = zipfile.ZipFile(file_path)
+        
+        with archive:
+            parts = WordTool._package_parts(archive)
+            extracted["properties"] = WordTool._read_core_properties(archive, parts.get("core-properties"))
+            
+            # 按文档顺序提取段落和表格
+            document_path = parts.get("officeDocument", "word/document.xml")
+            document_rels = WordTool._part_relationships(archive, document_path)
+            styles_path = next((path for rel_type, path in document_rels.values() if rel_type == "styles"), None)
+            reader = _BodyReader(WordTool._list_styles(archive, styles_path))
+            with archive.open(document_path) as stream:
+                reader.read(stream)
+            extracted.update(content=reader.text(), paragraphs=reader.paragraphs, tables=reader.tables)
+            
+            extracted["images"] = WordTool._collect_images(archive, reader.images, document_rels, extract_images)
+        return extracted
+    
+    @staticmethod
+    def _collect_images(archive: zipfile.ZipFile, rel_ids: List[str], document_rels: Dict[str, Tuple[str, str]],
+                        extract_images: bool) -> List[Dict[str, Any]]:
+        """
+        按关系ID找到每个锚点对应的图片部件，读取图片数据并按内容哈希去重
+
+        同一部件只读取一次；内容相同的图片（如重复粘贴的信头、印章）只保留第一张的数据，
+        过小、内容单一的图片和矢量图不做识别。
+        """
+        names = set(archive.namelist())
+        images: List[Dict[str, Any]] = []
+        # 部件路径 -> 内容哈希，内容哈希 -> 第一次出现的序号或跳过原因
+        part_hashes: Dict[str, str] = {}
+        first_seen: Dict[str, int] = {}
+        for rel_id in rel_ids:
+            rel_type, part = document_rels.get(rel_id, ("", ""))
+            image: Dict[str, Any] = {"part": part}
+            images.append(image)
+            if rel_type != "image" or part not in names:
+                image["error"] = "图片未嵌入文档（外部链接或关系缺失）"
+                continue
+            if not extract_images:
+                continue
+            if part.lower().endswith(_VECTOR_IMAGE_EXTENSIONS):
+                image["skip"] = SKIP_VECTOR
+                continue
+            
+            content_hash = part_hashes.get(part)
+            if content_hash is None:
+                data = archive.read(part)
+                content_hash = part_hashes[part] = hashlib.sha256(data).hexdigest()
+            else:
+                data = None
+            if content_hash in first_seen:
+                image["same_as"] = first_seen[content_hash]
+                continue
+            first_seen[content_hash] = len(images) - 1
+            
+            if data is None:
+                data = archive.read(part)
+            skip = image_skip_reason(data)
+            if skip:
+                image["skip"] = skip
+            else:
+                image["image"] = data
+        return images
+    
+    @staticmethod
+    def _format_image_analysis(text: str) -> str:
+        """格式化OCR识别结果"""
+        if text.strip():
+            return f"图片中识别出的文字：\n{text.strip()}"
+        return "未在图片中识别出文字"
+    
+    @staticmethod
+    def _format_document(extracted: Dict[str, Any], analyses: Optional[List[str]] = None,
+                         ocr_stats: Optional[Dict[str, float]] = None) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+        """
+        将_extract_document的结果格式化为文本
+
+        Args:
+            analyses: 需要识别的图片（带"image"的图片）按顺序的识别结果，为None时不输出图片识别结果
+        """
+        results = []
+        
+        # 添加文件信息
+        file_size_mb = extracted["size"] / (1024 * 1024)
+        results.append(types.TextContent(
+            type="text",
+            text=f"# Word文档解析\n\n文件大小: {file_size_mb:.2f} MB"
+        ))
+        
+        # 添加文档属性信息
+        properties = extracted["properties"]
+        if properties:
+            results.append(types.TextContent(
+                type="text",
+                text="## 文档属性\n\n" + "".join(f"- {key}: {value}\n" for key, value in properties.items())
+            ))
+        
+        # 图片识别结果放回各自的锚点位置
+        images = extracted["images"]
+        rendered = WordTool._render_images(images, analyses) if analyses is not None else {}
+        content = _IMAGE_PLACEHOLDER.sub(lambda match: rendered.get(int(match.group(1)), ""), extracted["content"])
+        results.append(types.TextContent(
+            type="text",
+            text=f"## 文档内容\n\n共{extracted['paragraphs']}个段落，{extracted['tables']}个表格\n\n{content}"
+        ))
+        
+        if images:
+            results.append(WordTool._summarize_images(images, analyses is not None, ocr_stats or {}))
+        
+        # 添加处理完成的提示
+        results.append(types.TextContent(
+            type="text",
+            text="Word文档处理完成！"
+        ))
+        
+        return results
+    
+    @staticmethod
+    def _render_images(images: List[Dict[str, Any]], analyses: List[str]) -> Dict[int, str]:
+        """生成每张图片在锚点处的输出：识别结果、与之前哪张图片相同或无法读取的原因；跳过的图片不输出"""
+        analyses_iter = iter(analyses)
+        rendered = {}
+        for index, image in enumerate(images):
+            if "image" in image:
+                rendered[index] = f"[图片{index + 1}] {next(analyses_iter)}\n\n"
+            elif "error" in image:
+                rendered[index] = f"[图片{index + 1}] {image['error']}\n\n"
+            elif "same_as" in image and image["same_as"] in rendered:
+                rendered[index] = f"[图片{index + 1}] 与图片{image['same_as'] + 1}内容相同\n\n"
+        return rendered
+    
+    @staticmethod
+    def _summarize_images(images: List[Dict[str, Any]], recognized: bool, ocr_stats: Dict[str, float]) -> types.TextContent:
+        """生成图片信息：图片数量，以及识别、去重和跳过的图片数"""
+        text = f"## 图片信息\n\n文档中包含 {len(images)} 张图片，已在正文中以[图片N]标注位置。"
+        if not recognized:
+            return types.TextContent(type="text", text=text + "未识别图片中的文字（ocr参数为false）。\n")
+        
+        planned = sum(1 for image in images if "image" in image)
+        duplicates = sum(1 for image in images if "same_as" in image)
+        small = sum(1 for image in images if image.get("skip") == SKIP_SMALL)
+        low_entropy = sum(1 for image in images if image.get("skip") == SKIP_LOW_ENTROPY)
+        vector = sum(1 for image in images if image.get("skip") == SKIP_VECTOR)
+        seconds = ocr_stats.get("seconds", 0.0)
+        recognized = int(ocr_stats.get("recognized", 0))
+        failed = int(ocr_stats.get("failed", 0))
+        
+        parts = [f"识别{planned}张（tesseract成功识别{recognized}次，耗时{seconds:.2f}秒）"]
+        if failed:
+            parts.append(f"{failed}张识别失败")
+        if duplicates:
+            parts.append(f"{duplicates}张与前面的图片内容相同")
+        if small or low_entropy:
+            parts.append(f"跳过{small + low_entropy}张尺寸过小或内容单一的图片")
+        if vector:
+            parts.append(f"{vector}张矢量图（EMF/WMF/SVG）无法识别")
+        return types.TextContent(
+            type="text",
+            text=text + "，".join(parts) + "。\n",
+            _meta={"ocr": {
+                "images": len(images),
+                "planned": planned,
+                "duplicates": duplicates,
+                "skipped_small": small,
+                "skipped_low_entropy": low_entropy,
+                "skipped_vector": vector,
+                "recognized": recognized,
+                "failed": failed,
+                "seconds": round(seconds, 3),
+            }}
+        )
+    
+    @staticmethod
+    def _read_relationships(archive: zipfile.ZipFile, rels_path: str) -> Dict[str, Tuple[str, str]]:
+        """读取关系文件，返回 关系ID -> (关系类型的最后一段, 目标路径)，关系文件不存在时返回空字典"""
+        try:
+            root = ET.fromstring(archive.read(rels_path))
+        except KeyError:
+            return {}
+        return {
+            rel.get("Id"): (rel.get("Type", "").rsplit("/", 1)[-1], rel.get("Target", ""))
+            for rel in root.iter(f"{_REL}Relationship")
+        }
+    
+    @staticmethod
+    def _package_parts(archive: zipfile.ZipFile) -> Dict[str, str]:
+        """按包关系（_rels/.rels）定位主文档和核心属性，返回 关系类型 -> 压缩包内路径"""
+        return {
+            rel_type: target.lstrip("/")
+            for rel_type, target in WordTool._read_relationships(archive, "_rels/.rels").values()
+        }
+    
+    @staticmethod
+    def _part_relationships(archive: zipfile.ZipFile, part_path: str) -> Dict[str, Tuple[str, str]]:
+        """读取某个部件（如word/document.xml）的关系，返回 关系ID -> (关系类型, 压缩包内路径)"""
+        directory, name = posixpath.split(part_path)
+        rels = WordTool._read_relationships(archive, posixpath.join(directory, "_rels", f"{name}.rels"))
+        return {
+            rel_id: (
+                rel_type,
+                target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join(directory, target)),
+            )
+            for rel_id, (rel_type, target) in rels.items()
+        }
+    
+    @staticmethod
+    def _list_styles(archive: zipfile.ZipFile, styles_path: str | None) -> Dict[str, int]:
+        """返回带编号的段落样式（如"List Bullet"）：样式ID -> 列表层级，包括通过basedOn继承编号的样式"""
+        if not styles_path or styles_path not in archive.namelist():
+            return {}
+        root = ET.fromstring(archive.read(styles_path))
+        based_on: Dict[str, str] = {}
+        numbering: Dict[str, int | None] = {}
+        for style in root.iter(f"{_W}style"):
+            if style.get(f"{_W}type") != "paragraph":
+                continue
+            style_id = style.get(f"{_W}styleId")
+            parent = style.find(f"{_W}basedOn")
+            if parent is not None:
+                based_on[style_id] = parent.get(f"{_W}val")
+            num_pr = style.find(f"{_W}pPr/{_W}numPr")
+            if num_pr is not None:
+                num_id = num_pr.find(f"{_W}numId")
+                ilvl = num_pr.find(f"{_W}ilvl")
+                # numId为0表示取消继承的编号
+                if num_id is not None and num_id.get(f"{_W}val") == "0":
+                    numbering[style_id] = None
+                else:
+                    numbering[style_id] = int(ilvl.get(f"{_W}val", "0")) if ilvl is not None else 0
+
+        levels = {}
+        for style_id in based_on.keys() | numbering.keys():
+            current, seen = style_id, set()
+            while current is not None and current not in numbering and current not in seen:
+                seen.add(current)
+                current = based_on.get(current)
+            level = numbering.get(current) if current is not None else None
+            if level is not None:
+                levels[style_id] = level
+        return levels
+    
+    @staticmethod
+    def _read_core_properties(archive: zipfile.ZipFile, core_path: str | None) -> Dict[str, str]:
+        """读取docProps/core.xml中的标题、作者、创建和修改时间以及备注"""
+        if not core_path or core_path not in archive.namelist():
+            return {}
+        root = ET.fromstring(archive.read(core_path))
+        properties = {}
+        for label, tag in _CORE_PROPERTIES:
+            value = (root.findtext(tag) or "").strip()
+            if not value:
+                continue
+            if tag.startswith(_DCTERMS):
+                # 与python-docx一致，时间显示为 2024-01-01 08:00:00+00:00
+                try:
+                    value = str(datetime.datetime.fromisoformat(value))
+                except ValueError:
+                    pass
+            properties[label] = value
+        return properties
+    
+
+
+class _BodyReader:
+    """
+    流式读取word/document.xml，按文档顺序输出段落和表格
+
+    使用iterparse逐个处理元素，每个元素处理完后立即从父元素中移除，内存中只保留
+    当前路径上的元素和已生成的文本；文本片段放在列表中最后一次性拼接。
+
+    图片在所在位置以[图片N]标注，并在所在段落（表格中的图片为所在表格）之后留出占位符，
+    之后替换为识别结果。
+    """
+
+    def __init__(self, list_styles: Dict[str, int] | None = None):
+        """
+        Args:
+            list_styles: 带编号的段落样式ID -> 列表层级，见WordTool._list_styles
+        """
+        self.list_styles = list_styles or {}
+        # 顶层段落和表格的数量
+        self.paragraphs = 0
+        self.tables = 0
+        # 按出现顺序的图片关系ID
+        self.images: List[str] = []
+        self._blocks: List[str] = []
+        # 正在读取的段落（文本框中的段落嵌套在外层段落中），及其列表层级（不是列表项时为None）
+        self._runs: List[List[str]] = []
+        self._levels: List[int | None] = []
+        # 各层段落中的图片序号，以及当前顶层表格中的图片序号
+        self._paragraph_images: List[List[int]] = []
+        self._table_images: List[int] = []
+        self._num_id: str | None = None
+        self._level = 0
+        # 正在读取的表格、行和单元格（嵌套表格会压入新的一层）
+        self._tables: List[Dict[str, Any]] = []
+        self._cells: List[Dict[str, Any]] = []
+        self._in_run = 0
+        self._in_fallback = 0
+        self._in_list = False
+
+    def read(self, stream: Any) -> None:
+        """读取整个主文档"""
+        path = []
+        start_handlers = {
+            f"{_W}p": self._start_paragraph,
+            f"{_W}r": self._start_run,
+            f"{_W}tbl": self._start_table,
+            f"{_W}tr": self._start_row,
+            f"{_W}tc": self._start_cell,
+            _MC_FALLBACK: self._start_fallback,
+        }
+        end_handlers = {
+            f"{_W}t": self._end_text,
+            f"{_W}tab": self._end_tab,
+            f"{_W}br": self._end_break,
+            f"{_W}cr": self._end_break,
+            f"{_W}r": self._end_run,
+            f"{_W}p": self._end_paragraph,
+            f"{_W}pStyle": self._end_paragraph_style,
+            f"{_W}numId": self._end_num_id,
+            f"{_W}ilvl": self._end_ilvl,
+            f"{_W}numPr": self._end_num_pr,
+            f"{_W}gridSpan": self._end_grid_span,
+            f"{_W}vMerge": self._end_v_merge,
+            f"{_W}tc": self._end_cell,
+            f"{_W}tr": self._end_row,
+            f"{_W}tbl": self._end_table,
+            _A_BLIP: self._end_image,
+            _V_IMAGEDATA: self._end_image,
+            _MC_FALLBACK: self._end_fallback,
+        }
+        for event, elem in ET.iterparse(stream, events=("start", "end")):
+            if event == "start":
+                path.append(elem)
+                handler = start_handlers.get(elem.tag)
+                if handler is not None:
+                    handler()
+                continue
+            path.pop()
+            handler = end_handlers.get(elem.tag)
+            if handler is not None:
+                handler(elem)
+            # 已处理的元素不再需要，父元素因此始终最多只有一个子元素
+            if path:
+                path[-1].remove(elem)
+        self._end_list()
+
+    def text(self) -> str:
+        return "".join(self._blocks)
+
+    def _add_block(self, text: str) -> None:
+        self._end_list()
+        self._blocks.append(f"{text}\n\n")
+
+    def _add_image_placeholders(self, indexes: List[int]) -> None:
+        if indexes:
+            self._end_list()
+            self._blocks.extend(f"\x00{index}\x00" for index in indexes)
+
+    def _end_list(self) -> None:
+        # 连续的列表项之间只换一行，列表结束后空一行
+        if self._in_list:
+            self._blocks.append("\n")
+            self._in_list = False
+
+    def _start_paragraph(self) -> None:
+        self._runs.append([])
+        self._levels.append(None)
+        self._paragraph_images.append([])
+
+    def _start_run(self) -> None:
+        self._in_run += 1
+
+    def _end_run(self, elem: Any) -> None:
+        self._in_run -= 1
+
+    def _start_fallback(self) -> None:
+        self._in_fallback += 1
+
+    def _end_fallback(self, elem: Any) -> None:
+        self._in_fallback -= 1
+
+    def _end_text(self, elem: Any) -> None:
+        # mc:Fallback是兼容旧版Word的重复内容，跳过
+        if self._runs and not self._in_fallback and elem.text:
+            self._runs[-1].append(elem.text)
+
+    def _end_tab(self, elem: Any) -> None:
+        # 段落属性中的w:tabs/w:tab是制表位定义，不是文字
+        if self._runs and self._in_run and not self._in_fallback:
+            self._runs[-1].append("\t")
+
+    def _end_image(self, elem: Any) -> None:
+        # 兼容内容（mc:Fallback）中的v:imagedata与a:blip是同一张图片
+        rel_id = elem.get(f"{_R}embed") or elem.get(f"{_R}link") or elem.get(f"{_R}id")
+        if not rel_id or not self._runs or self._in_fallback:
+            return
+        index = len(self.images)
+        self.images.append(rel_id)
+        self._runs[-1].append(f"[图片{index + 1}]")
+        self._paragraph_images[-1].append(index)
+
+    def _end_break(self, elem: Any) -> None:
+        # 分页符和分栏符不产生换行
+        if self._runs and self._in_run and not self._in_fallback and elem.get(f"{_W}type", "textWrapping") == "textWrapping":
+            self._runs[-1].append("\n")
+
+    def _end_paragraph_style(self, elem: Any) -> None:
+        if self._levels:
+            self._levels[-1] = self.list_styles.get(elem.get(f"{_W}val"))
+
+    def _end_num_id(self, elem: Any) -> None:
+        self._num_id = elem.get(f"{_W}val")
+
+    def _end_ilvl(self, elem: Any) -> None:
+        try:
+            self._level = int(elem.get(f"{_W}val", "0"))
+        except ValueError:
+            self._level = 0
+
+    def _end_num_pr(self, elem: Any) -> None:
+        # 段落自身的编号优先于样式中的编号，numId为0表示取消样式中的编号
+        if self._levels and self._num_id is not None:
+            self._levels[-1] = None if self._num_id == "0" else self._level
+        self._num_id = None
+        self._level = 0
+
+    def _end_paragraph(self, elem: Any) -> None:
+        text = "".join(self._runs.pop())
+        level = self._levels.pop()
+        images = self._paragraph_images.pop()
+        if self._runs:
+            # 文本框中的段落并入外层段落
+            if text.strip():
+                self._runs[-1].append(f"{text}\n")
+            self._paragraph_images[-1].extend(images)
+            return
+        if self._cells:
+            self._cells[-1]["texts"].append(text)
+            self._table_images.extend(images)
+            return
+
+        self.paragraphs += 1
+        if text.strip():
+            if level is None:
+                self._add_block(text)
+            else:
+                self._blocks.append(f"{'  ' * level}- {text}\n")
+                self._in_list = True
+        self._add_image_placeholders(images)
+
+    def _start_table(self) -> None:
+        self._tables.append({"rows": [], "row": [], "previous": []})
+
+    def _start_row(self) -> None:
+        self._tables[-1]["row"] = []
+
+    def _start_cell(self) -> None:
+        self._cells.append({"texts": [], "span": 1, "continued": False})
+
+    def _end_grid_span(self, elem: Any) -> None:
+        if self._cells:
+            try:
+                self._cells[-1]["span"] = max(int(elem.get(f"{_W}val", "1")), 1)
+            except ValueError:
+                pass
+
+    def _end_v_merge(self, elem: Any) -> None:
+        # 没有val或val为continue时，该单元格与上一行同一列的单元格合并
+        if self._cells and elem.get(f"{_W}val", "continue") == "continue":
+            self._cells[-1]["continued"] = True
+
+    def _end_cell(self, elem: Any) -> None:
+        self._tables[-1]["row"].append(self._cells.pop())
+
+    def _end_row(self, elem: Any) -> None:
+        # 与python-docx的row.cells一致：横向合并的单元格按所占列数重复，纵向合并的单元格取合并起点的文字
+        table = self._tables[-1]
+        previous = table["previous"]
+        cells = []
+        for cell in table["row"]:
+            text = "\n".join(cell["texts"]).replace("\n", " ").strip()
+            for _ in range(cell["span"]):
+                column = len(cells)
+                cells.append(previous[column] if cell["continued"] and column < len(previous) else text)
+        table["rows"].append(cells)
+        table["previous"] = cells
+        table["row"] = []
+
+    def _end_table(self, elem: Any) -> None:
+        rows = self._tables.pop()["rows"]
+        if self._cells:
+            # 嵌套表格的每一行并入外层单元格
+            self._cells[-1]["texts"].extend(" / ".join(row) for row in rows)
+            return
+
+        self.tables += 1
+        lines = [f"#### 表格 {self.tables}\n"]
+        if rows:
+            lines.append("| " + " | ".join(rows[0]) + " |")
+            lines.append("| " + " | ".join(["---"] * len(rows[0])) + " |")
+            lines.extend("| " + " | ".join(row) + " |" for row in rows[1:])
+        self._add_block("\n".join(lines))
+        self._add_image_placeholders(self._table_images)
+        self._table_images = []
@@ -0,0 +1,46 @@
+"""检索索引的切分和查询测试"""
+
+from mcp_tool.tools.utils.search_index import SearchIndex, build_query, tokenize
+
+
+def _index_texts(tmp_path, texts):
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    root = tmp_path / "docs"
+    for name, text in texts.items():
+        path = str(root / name)
+        index.replace_file(path, len(text), 0, [("片段1", {"part": 1}, text, tokenize(text))])
+    return index, str(root)
+
+
+def _hit_names(index, root, query):
+    return sorted(hit["path"].rsplit("/", 1)[-1] for hit in index.search(query, root)["hits"])
+
+
+def test_tokenize_appends_run_final_character():
+    assert tokenize("所得税") == "所得 得税 税"
+    assert tokenize("税") == "税"
+    assert tokenize("Tax 申报") == "tax 申报 报"
+
+
+def test_single_character_matches_any_position(tmp_path):
+    index, root = _index_texts(tmp_path, {
+        "start.docx": "税务登记事项",
+        "middle.docx": "纳税人应当申报",
+        "end.docx": "本年度应缴纳个人所得税。",
+        "none.docx": "其他内容",
+    })
+    assert _hit_names(index, root, "税") == ["end.docx", "middle.docx", "start.docx"]
+
+
+def test_phrase_query_still_requires_adjacent_characters(tmp_path):
+    index, root = _index_texts(tmp_path, {
+        "a.docx": "个人所得税",
+        "b.docx": "所得 税",
+    })
+    assert _hit_names(index, root, "所得税") == ["a.docx"]
+
+
+def test_build_query_single_character_is_prefix():
+    expression, terms = build_query("税")
+    assert expression == '"税"*'
+    assert terms == ["税"]